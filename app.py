@@ -1,16 +1,49 @@
-import io
 import os
 import traceback
-import urllib.request
+from functools import partial
 
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
-import matplotlib.ticker as ticker
-from matplotlib.backends.backend_pdf import PdfPages
 import pandas as pd
 import streamlit as st
 
+from ilustraciones.cache import CacheLRU, cache_disco_desde_entorno, clave_documento, documento_diferido
+from ilustraciones.config import (
+    ALMACEN_MERCADO_DIR,
+    CACHE_DOCUMENTOS_MAX_BYTES,
+    CACHE_DOCUMENTOS_MAX_ENTRADAS,
+    CACHE_RESULTADOS_MAX_BYTES,
+    CACHE_RESULTADOS_MAX_ENTRADAS,
+    CACHE_RESULTADOS_TTL,
+    LISTA_MESES,
+    MAPA_REBALANCEO,
+)
+from ilustraciones.exportar import (
+    crear_grafico_interactivo,
+    excel_disponible,
+    figura_principal_png,
+    plotly_disponible,
+    generar_tabla_excel,
+    subtitulo_ilustracion,
+)
+from ilustraciones.mercado import (
+    RefrescoMercado,
+    cargar_indices,
+    cargar_serie_diaria,
+    cargar_serie_mercado,
+    leer_metadatos_almacen,
+    leer_rechazo_mercado,
+    serie_cartera,
+    version_mercado,
+)
+from ilustraciones.reporte import generar_pdf_completo, generar_tabla_pdf
+from ilustraciones.resumen import preparar_tabla_exportar, preparar_tabla_mostrar
+from ilustraciones.simulacion import (
+    barrer_inicios_mis,
+    barrer_inicios_mss,
+    calcular_ilustracion,
+    detectar_planes_csv,
+)
+from ilustraciones.utilidades import antiguedad_texto, fmt_pct, fmt_usd, mes_numero
+
 # --- CONFIGURACIÓN DE PÁGINA ---
 st.set_page_config(
     page_title="Generador de Ilustraciones Financieras",
@@ -42,806 +75,49 @@ def check_password():
 if not check_password():
     st.stop()
 
-# --- CONSTANTES ---
-FACTORES_COSTOS = {
-    5: (0.2475, 0.0619), 6: (0.2970, 0.0743), 7: (0.3465, 0.0866), 8: (0.3960, 0.0990),
-    9: (0.4455, 0.1114), 10: (0.4950, 0.1238), 11: (0.5445, 0.1361), 12: (0.5940, 0.1485),
-    13: (0.6435, 0.1609), 14: (0.6930, 0.1733), 15: (0.7425, 0.1856), 16: (0.7920, 0.1980),
-    17: (0.8415, 0.2104), 18: (0.8910, 0.2228), 19: (0.9405, 0.2351), 20: (0.9900, 0.2475)
-}
-
-LISTA_MESES = [
-    "ene", "feb", "mar", "abr", "may", "jun",
-    "jul", "ago", "sept", "oct", "nov", "dic"
-]
-
-CACHE_DIR = "data_cache"
-os.makedirs(CACHE_DIR, exist_ok=True)
-
-STOOQ_DAILY_URL = "https://stooq.com/q/d/l/?s=%5Espx&i=d"
-AMC_ANUAL = 0.02
-
-
-# --- UTILIDADES ---
-def mes_numero(nombre_mes: str) -> int:
-    return LISTA_MESES.index(nombre_mes.lower()) + 1
-
-
-def fmt_usd(x):
-    return f"USD {x:,.2f}"
-
-
-def fmt_pct(x):
-    return f"{x:+.2f}%"
-
-
-def xnpv(rate, cashflows):
-    total = 0.0
-    t0 = cashflows[0][0]
-    for fecha, monto in cashflows:
-        dias = (fecha - t0).days
-        total += monto / ((1 + rate) ** (dias / 365.25))
-    return total
-
-
-def xirr(cashflows, guess=0.08):
-    """
-    cashflows: lista de tuplas (fecha, monto)
-    aportes = negativos
-    retiros / valor final = positivos
-    """
-    if not cashflows or len(cashflows) < 2:
-        return None
-
-    positivos = any(m > 0 for _, m in cashflows)
-    negativos = any(m < 0 for _, m in cashflows)
-
-    if not positivos or not negativos:
-        return None
-
-    low, high = -0.9999, 10.0
-
-    try:
-        npv_low = xnpv(low, cashflows)
-        npv_high = xnpv(high, cashflows)
-    except Exception:
-        return None
-
-    intentos = 0
-    while npv_low * npv_high > 0 and intentos < 50:
-        high *= 2
-        try:
-            npv_high = xnpv(high, cashflows)
-        except Exception:
-            return None
-        intentos += 1
-
-    if npv_low * npv_high > 0:
-        return None
-
-    for _ in range(200):
-        mid = (low + high) / 2
-        npv_mid = xnpv(mid, cashflows)
-
-        if abs(npv_mid) < 1e-7:
-            return mid
-
-        if npv_low * npv_mid < 0:
-            high = mid
-            npv_high = npv_mid
-        else:
-            low = mid
-            npv_low = npv_mid
-
-    return (low + high) / 2
 
+# --- RECURSOS COMPARTIDOS ---
+@st.cache_resource(show_spinner=False)
+def refresco_mercado() -> RefrescoMercado:
+    # Compartido por todas las sesiones del proceso.
+    return RefrescoMercado()
 
-def calcular_rendimiento_resumen(df: pd.DataFrame, resumen: pd.DataFrame, tipo_plan: str):
-    """
-    MIS  -> rendimiento anual promedio
-    MSS  -> rendimiento anual equivalente del plan (XIRR)
-    """
-    if resumen.empty or df.empty:
-        return "Rendimiento anual", 0.0
 
-    val_final = float(resumen["Valor_Cuenta"].iloc[-1])
-
-    if tipo_plan == "MIS":
-        inv_total = float(resumen["Aporte_Acum"].iloc[-1])
-
-        if inv_total <= 0 or val_final <= 0 or len(df) < 2:
-            return "Rendimiento anual promedio", 0.0
-
-        años = (df["Date"].iloc[-1] - df["Date"].iloc[0]).days / 365.25
-        if años <= 0:
-            return "Rendimiento anual promedio", 0.0
-
-        tasa = ((val_final / inv_total) ** (1 / años) - 1) * 100
-        return "Rendimiento anual promedio", tasa
-
-    # MSS -> XIRR
-    cashflows = []
-
-    aporte_prev = 0.0
-    for _, row in df.iterrows():
-        fecha = pd.Timestamp(row["Date"]).to_pydatetime()
-
-        aporte_acum = float(row["Aporte_Acum"])
-        aporte_nuevo = aporte_acum - aporte_prev
-        aporte_prev = aporte_acum
-
-        if aporte_nuevo > 0:
-            cashflows.append((fecha, -aporte_nuevo))
-
-        retiro = float(row["Retiro"])
-        if retiro > 0:
-            cashflows.append((fecha, retiro))
-
-    fecha_final = pd.Timestamp(df["Date"].iloc[-1]).to_pydatetime()
-    cashflows.append((fecha_final, val_final))
-
-    tasa_xirr = xirr(cashflows)
-
-    if tasa_xirr is None:
-        return "Rendimiento anual equivalente del plan", 0.0
-
-    return "Rendimiento anual equivalente del plan", tasa_xirr * 100
-
-
-def descargar_sp500_mensual() -> pd.DataFrame:
-    req = urllib.request.Request(
-        STOOQ_DAILY_URL,
-        headers={"User-Agent": "Mozilla/5.0"}
+@st.cache_resource(show_spinner=False)
+def cache_resultados() -> CacheLRU:
+    # Una sola instancia por proceso, compartida entre sesiones y reruns.
+    return CacheLRU(
+        max_entradas=CACHE_RESULTADOS_MAX_ENTRADAS,
+        max_bytes=CACHE_RESULTADOS_MAX_BYTES,
+        ttl_segundos=CACHE_RESULTADOS_TTL
     )
 
-    with urllib.request.urlopen(req, timeout=30) as response:
-        raw = response.read().decode("utf-8")
-
-    df = pd.read_csv(io.StringIO(raw))
-    df.columns = [c.strip().title() for c in df.columns]
-
-    if "Date" not in df.columns or "Close" not in df.columns:
-        raise ValueError("Stooq no devolvió el formato esperado.")
-
-    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
-    df["Price"] = pd.to_numeric(df["Close"], errors="coerce")
-    df = df.dropna(subset=["Date", "Price"]).sort_values("Date").reset_index(drop=True)
-
-    # Último cierre disponible de cada mes
-    df["Month"] = df["Date"].dt.to_period("M")
-    df = df.groupby("Month", as_index=False).last()
-    df["Date"] = df["Month"].dt.to_timestamp("M")
-    df = df[["Date", "Price"]].reset_index(drop=True)
-
-    return df
-
-
-def agregar_rendimiento_neto_tracker(df: pd.DataFrame, amc_anual: float = AMC_ANUAL) -> pd.DataFrame:
-    df = df.copy().sort_values("Date").reset_index(drop=True)
-
-    df["Retorno_Bruto"] = df["Price"].pct_change().fillna(0.0)
-
-    factor_fee_mensual = (1 - amc_anual) ** (1 / 12)
-
-    df["Retorno_Neto"] = ((1 + df["Retorno_Bruto"]) * factor_fee_mensual) - 1
 
-    return df
-
-
-def cargar_serie_mercado(forzar_actualizacion: bool = False):
-    cache_file = os.path.join(CACHE_DIR, "sp500_stooq_monthly.csv")
-    origen = "cache local"
-
-    if forzar_actualizacion or not os.path.exists(cache_file):
-        try:
-            df = descargar_sp500_mensual()
-            df.to_csv(cache_file, index=False)
-            origen = "descarga online"
-        except Exception:
-            if not os.path.exists(cache_file):
-                raise
-
-    df = pd.read_csv(cache_file)
-    df.columns = [c.strip() for c in df.columns]
-    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
-    df["Price"] = pd.to_numeric(df["Price"], errors="coerce")
-    df = df.dropna(subset=["Date", "Price"]).sort_values("Date").reset_index(drop=True)
-
-    df = agregar_rendimiento_neto_tracker(df, amc_anual=AMC_ANUAL)
-
-    return df, origen
-
-
-def detectar_planes_csv():
-    archivos = [f for f in os.listdir() if f.lower().endswith(".csv")]
-    planes = {}
-
-    for f in archivos:
-        nombre = f.lower()
-
-        if "mis" in nombre:
-            planes["MIS - Aporte Único"] = (f, 0, "MIS")
-
-        elif "mss" in nombre:
-            plazo = None
-
-            for i in range(5, 21):
-                patrones = [
-                    f"mss - {i}",
-                    f"mss-{i}",
-                    f"mss {i}",
-                    f" {i} años",
-                    f" {i} anos",
-                ]
-                if any(p in nombre for p in patrones):
-                    plazo = i
-                    break
-
-            if plazo is None:
-                for i in range(5, 21):
-                    if nombre.endswith(f"{i}.csv"):
-                        plazo = i
-                        break
-
-            if plazo is not None:
-                planes[f"MSS - {plazo} Años"] = (f, plazo, "MSS")
-
-    return planes
-
-
-def simular_mis(
-    df_base: pd.DataFrame,
-    monto_inicial: float,
-    anio_inicio: int,
-    mes_inicio: int,
-    aportes_extra: list,
-    retiros_programados: list
-) -> pd.DataFrame:
-    df = df_base.copy()
-    fecha_filtro = pd.Timestamp(year=anio_inicio, month=mes_inicio, day=1) + pd.offsets.MonthEnd(0)
-    df = df[df["Date"] >= fecha_filtro].copy().reset_index(drop=True)
-
-    if df.empty:
-        raise ValueError("No hay datos históricos disponibles desde la fecha seleccionada.")
-
-    df["Year"] = df["Date"].dt.year
-    retornos_netos = df["Retorno_Neto"].values
-
-    cubetas = [{
-        "monto": float(monto_inicial),
-        "saldo": 0.0,
-        "edad": 0,
-        "activa": False,
-        "ini": (anio_inicio, mes_inicio)
-    }]
-
-    for extra in aportes_extra:
-        cubetas.append({
-            "monto": float(extra["monto"]),
-            "saldo": 0.0,
-            "edad": 0,
-            "activa": False,
-            "ini": (int(extra["anio"]), int(extra["mes"]))
-        })
-
-    lista_vn, lista_vr, lista_aportes_acum, lista_retiros = [], [], [], []
-    acumulado_aportes = 0.0
-
-    for i in range(len(df)):
-        fecha_act = df["Date"].iloc[i]
-        anio_act, mes_act = fecha_act.year, fecha_act.month
-
-        retiro_mes = 0.0
-        for r in retiros_programados:
-            if int(r["anio"]) == anio_act and int(r["mes"]) == mes_act:
-                retiro_mes += float(r["monto"])
-        lista_retiros.append(retiro_mes)
-
-        saldo_total_previo = sum(c["saldo"] for c in cubetas if c["activa"])
-
-        vn_mes_total = 0.0
-        vr_mes_total = 0.0
-
-        for c in cubetas:
-            if not c["activa"] and (
-                anio_act > c["ini"][0] or
-                (anio_act == c["ini"][0] and mes_act >= c["ini"][1])
-            ):
-                c["activa"] = True
-                c["saldo"] = c["monto"]
-                acumulado_aportes += c["monto"]
-                saldo_total_previo += c["monto"]
-
-            if c["activa"]:
-                if c["edad"] > 0:
-                    c["saldo"] *= (1 + retornos_netos[i])
-
-                if retiro_mes > 0 and saldo_total_previo > 0:
-                    peso = c["saldo"] / saldo_total_previo if saldo_total_previo > 0 else 0
-                    deduccion_retiro = retiro_mes * peso
-                    c["saldo"] = max(0.0, c["saldo"] - deduccion_retiro)
-
-                costo_establecimiento = (c["monto"] * 0.016) / 12.0
-                if c["edad"] < 60:
-                    c["saldo"] -= costo_establecimiento
-                else:
-                    c["saldo"] -= (c["saldo"] * (0.01 / 12.0))
-
-                c["saldo"] = max(0.0, c["saldo"])
-
-                penalizacion = 0.0
-                if c["edad"] < 60:
-                    meses_restantes = 60 - (c["edad"] + 1)
-                    penalizacion = meses_restantes * costo_establecimiento
-
-                vr_cubeta = max(0.0, c["saldo"] - penalizacion)
-
-                vn_mes_total += c["saldo"]
-                vr_mes_total += vr_cubeta
-                c["edad"] += 1
-
-        lista_vn.append(vn_mes_total)
-        lista_vr.append(vr_mes_total)
-        lista_aportes_acum.append(acumulado_aportes)
-
-    df["Aporte_Acum"] = lista_aportes_acum
-    df["Valor_Cuenta"] = lista_vn
-    df["Valor_Rescate"] = lista_vr
-    df["Retiro"] = lista_retiros
-    df["Mes_Plan"] = range(1, len(df) + 1)
-    return df
-
-
-def simular_mss(
-    df_base: pd.DataFrame,
-    plazo_anios: int,
-    monto_aporte: float,
-    frecuencia_pago: str,
-    anio_inicio: int,
-    mes_inicio: int,
-    retiros_programados: list
-) -> pd.DataFrame:
-    df = df_base.copy()
-    fecha_filtro = pd.Timestamp(year=anio_inicio, month=mes_inicio, day=1) + pd.offsets.MonthEnd(0)
-    df = df[df["Date"] >= fecha_filtro].copy().reset_index(drop=True)
-
-    if df.empty:
-        raise ValueError("No hay datos históricos disponibles desde la fecha seleccionada.")
-
-    df["Year"] = df["Date"].dt.year
-    retornos_netos = df["Retorno_Neto"].values
-
-    mapa_pasos = {"Mensual": 1, "Trimestral": 3, "Semestral": 6, "Anual": 12}
-    step_meses = mapa_pasos[frecuencia_pago]
-    pagos_anio = 12 / step_meses
-    aporte_anual = monto_aporte * pagos_anio
-
-    factor1, factor2 = FACTORES_COSTOS.get(plazo_anios, (0, 0))
-    costo_total_apertura = (aporte_anual * factor1) + (aporte_anual * factor2)
-    meses_totales = plazo_anios * 12
-    deduccion_mensual = costo_total_apertura / meses_totales if meses_totales > 0 else 0
-
-    lista_vn, lista_vr, lista_aportes_acum, lista_retiros, lista_etapa = [], [], [], [], []
-    saldo_actual = 0.0
-    aporte_acumulado = 0.0
-
-    for i in range(len(df)):
-        fecha_act = df["Date"].iloc[i]
-
-        if i < meses_totales and i % step_meses == 0:
-            saldo_actual += monto_aporte
-            aporte_acumulado += monto_aporte
-
-        if i > 0:
-            saldo_actual *= (1 + retornos_netos[i])
-
-        retiro_mes = 0.0
-        for r in retiros_programados:
-            if int(r["anio"]) == fecha_act.year and int(r["mes"]) == fecha_act.month:
-                retiro_mes += float(r["monto"])
-        lista_retiros.append(retiro_mes)
-
-        if retiro_mes > 0:
-            saldo_actual = max(0.0, saldo_actual - retiro_mes)
-
-        if i < meses_totales:
-            saldo_actual -= deduccion_mensual
-            meses_restantes = meses_totales - (i + 1)
-            penalizacion = meses_restantes * deduccion_mensual if meses_restantes > 0 else 0
-            valor_rescate = max(0.0, saldo_actual - penalizacion)
-            etapa = "Acumulación"
-        else:
-            saldo_actual -= (saldo_actual * (0.01 / 12.0))
-            valor_rescate = max(0.0, saldo_actual)
-            etapa = "Post-maduración"
-
-        saldo_actual = max(0.0, saldo_actual)
-
-        lista_vn.append(saldo_actual)
-        lista_vr.append(valor_rescate)
-        lista_aportes_acum.append(aporte_acumulado)
-        lista_etapa.append(etapa)
-
-    df["Aporte_Acum"] = lista_aportes_acum
-    df["Valor_Cuenta"] = lista_vn
-    df["Valor_Rescate"] = lista_vr
-    df["Retiro"] = lista_retiros
-    df["Etapa"] = lista_etapa
-    df["Mes_Plan"] = range(1, len(df) + 1)
-    return df
-
-
-def construir_resumen_anual(df: pd.DataFrame, anio_inicio: int, mes_inicio: int) -> pd.DataFrame:
-    df = df.copy().sort_values("Date").reset_index(drop=True)
-
-    if df.empty:
-        return pd.DataFrame()
-
-    df["Year"] = df["Date"].dt.year
-    df["Month"] = df["Date"].dt.month
-
-    hoy = pd.Timestamp.today()
-    ultimo_anio = int(df["Year"].max())
-    ultimo_mes_real = int(df.loc[df["Year"] == ultimo_anio, "Month"].max())
-
-    if ultimo_anio == hoy.year:
-        mes_corte = hoy.month - 1
-        if mes_corte < 1:
-            mes_corte = 1
-        ultimo_mes = min(ultimo_mes_real, mes_corte)
-    else:
-        ultimo_mes = ultimo_mes_real
-
-    periodos = []
-    idx_periodo = 1
-
-    for anio in sorted(df["Year"].unique()):
-        if anio == anio_inicio:
-            mes_desde = mes_inicio
-            mes_hasta = 12
-        elif anio == ultimo_anio:
-            mes_desde = 1
-            mes_hasta = ultimo_mes
-        else:
-            mes_desde = 1
-            mes_hasta = 12
-
-        sub = df[(df["Year"] == anio) & (df["Month"] >= mes_desde) & (df["Month"] <= mes_hasta)].copy()
-
-        if sub.empty:
-            continue
-
-        fila = {
-            "Periodo_N": idx_periodo,
-            "Periodo_Label": f"{LISTA_MESES[mes_desde - 1]} - {LISTA_MESES[mes_hasta - 1]} {anio}",
-            "Aporte_Acum": sub["Aporte_Acum"].iloc[-1],
-            "Retiro": sub["Retiro"].sum(),
-            "Valor_Cuenta": sub["Valor_Cuenta"].iloc[-1],
-            "Valor_Rescate": sub["Valor_Rescate"].iloc[-1],
-        }
-
-        if "Etapa" in sub.columns:
-            fila["Etapa"] = sub["Etapa"].iloc[-1]
-
-        periodos.append(fila)
-        idx_periodo += 1
-
-    resumen = pd.DataFrame(periodos)
-
-    if resumen.empty:
-        return resumen
-
-    resumen["Saldo_Inicial"] = resumen["Valor_Cuenta"].shift(1).fillna(0)
-    resumen["Aporte_Nuevo"] = resumen["Aporte_Acum"] - resumen["Aporte_Acum"].shift(1).fillna(0)
-
-    resumen["Ganancia"] = (
-        resumen["Valor_Cuenta"]
-        - resumen["Saldo_Inicial"]
-        - resumen["Aporte_Nuevo"]
-        + resumen["Retiro"]
+@st.cache_resource(show_spinner=False)
+def cache_documentos() -> CacheLRU:
+    # Excel y PDF ya generados, por ilustración; se llenan al descargar.
+    return CacheLRU(
+        max_entradas=CACHE_DOCUMENTOS_MAX_ENTRADAS,
+        max_bytes=CACHE_DOCUMENTOS_MAX_BYTES,
+        ttl_segundos=CACHE_RESULTADOS_TTL
     )
 
-    resumen["Base_Calculo"] = (resumen["Saldo_Inicial"] + resumen["Aporte_Nuevo"]).replace(0, pd.NA)
-    resumen["Rendimiento"] = (resumen["Ganancia"] / resumen["Base_Calculo"]) * 100
-    resumen["Rendimiento"] = resumen["Rendimiento"].fillna(0)
-
-    resumen["Retiro_Acumulado"] = resumen["Retiro"].cumsum()
-    base_acumulada = resumen["Aporte_Acum"].replace(0, pd.NA)
-
-    resumen["Rendimiento_Acumulado"] = (
-        (resumen["Valor_Cuenta"] + resumen["Retiro_Acumulado"] - resumen["Aporte_Acum"])
-        / base_acumulada
-    ) * 100
-    resumen["Rendimiento_Acumulado"] = resumen["Rendimiento_Acumulado"].fillna(0)
-
-    columnas_finales = [
-        "Periodo_N",
-        "Periodo_Label",
-        "Aporte_Acum",
-        "Retiro",
-        "Valor_Cuenta",
-        "Valor_Rescate",
-        "Rendimiento",
-        "Rendimiento_Acumulado"
-    ]
-
-    if "Etapa" in resumen.columns:
-        columnas_finales.append("Etapa")
-
-    return resumen[columnas_finales]
-
-
-def crear_figura_principal(df: pd.DataFrame, resumen: pd.DataFrame, seleccion: str, nombre_cliente: str, subtitulo: str, tipo_plan: str):
-    fig = plt.figure(figsize=(15, 8.8), facecolor="white")
-    ax = fig.add_subplot(111)
-
-    fig.text(
-        0.5, 0.965,
-        f"{seleccion}",
-        ha="center", va="top",
-        fontsize=22, fontweight="bold", color="#1f1f1f"
-    )
 
-    fig.text(
-        0.5, 0.928,
-        f"Cliente: {nombre_cliente}",
-        ha="center", va="top",
-        fontsize=16, fontweight="bold", color="#2f2f2f"
-    )
-
-    fig.text(
-        0.5, 0.895,
-        "Serie histórica neta basada en el S&P 500, con costos anuales prorrateados mensualmente.",
-        ha="center", va="top",
-        fontsize=10.5, color="#666666"
-    )
-
-    fig.text(
-        0.5, 0.870,
-        subtitulo,
-        ha="center", va="top",
-        fontsize=12, color="#4a4a4a"
-    )
-
-    inv_total = resumen["Aporte_Acum"].iloc[-1] if not resumen.empty else 0
-    ret_total = resumen["Retiro"].sum() if not resumen.empty else 0
-    val_final = resumen["Valor_Cuenta"].iloc[-1] if not resumen.empty else 0
-    val_rescate_final = resumen["Valor_Rescate"].iloc[-1] if not resumen.empty else 0
-
-    etiqueta_rend, valor_rend = calcular_rendimiento_resumen(df, resumen, tipo_plan)
-
-    texto_resumen = (
-        f"Inversión total: {fmt_usd(inv_total)}   |   "
-        f"Valor en cuenta: {fmt_usd(val_final)}   |   "
-        f"Valor de rescate: {fmt_usd(val_rescate_final)}   |   "
-        f"{etiqueta_rend}: {valor_rend:.2f}%"
-    )
-    if ret_total > 0:
-        texto_resumen += f"   |   Retiros: {fmt_usd(ret_total)}"
-
-    fig.text(
-        0.5, 0.830,
-        texto_resumen,
-        ha="center", va="top",
-        fontsize=11, fontweight="bold", color="#1f1f1f",
-        bbox=dict(
-            facecolor="#f7f9fc",
-            edgecolor="#c7d2e3",
-            boxstyle="round,pad=0.45"
-        )
-    )
-
-    ax.set_facecolor("white")
-
-    ax.plot(
-        df["Date"], df["Aporte_Acum"],
-        color="#2ca02c", linestyle="--", linewidth=2.2,
-        label="Capital invertido"
-    )
-    ax.plot(
-        df["Date"], df["Valor_Rescate"],
-        color="#8c8c8c", linestyle="--", linewidth=2.0,
-        label="Valor rescate"
-    )
-    ax.plot(
-        df["Date"], df["Valor_Cuenta"],
-        color="#0b5cad", linewidth=2.8,
-        label="Valor cuenta"
-    )
-
-    ax.legend(
-        loc="upper left",
-        frameon=True,
-        facecolor="white",
-        edgecolor="#d9d9d9",
-        fontsize=11
-    )
-
-    ax.grid(True, alpha=0.18, linewidth=0.8)
-    ax.yaxis.set_major_formatter(ticker.StrMethodFormatter('USD {x:,.0f}'))
-
-    ax.spines["top"].set_visible(False)
-    ax.spines["right"].set_visible(False)
-    ax.spines["left"].set_color("#c8c8c8")
-    ax.spines["bottom"].set_color("#c8c8c8")
-
-    ax.tick_params(axis="x", labelsize=10, colors="#444444")
-    ax.tick_params(axis="y", labelsize=10, colors="#444444")
-
-    ax.set_xlabel("")
-    ax.set_ylabel("")
-
-    plt.tight_layout(rect=[0.04, 0.06, 0.98, 0.70])
-
-    return fig
-
-
-def preparar_tabla_mostrar(resumen: pd.DataFrame) -> pd.DataFrame:
-    mostrar = resumen.copy().rename(columns={
-        "Periodo_N": "Año",
-        "Periodo_Label": "Meses",
-        "Aporte_Acum": "Aporte acumulado",
-        "Retiro": "Retiro",
-        "Valor_Cuenta": "Valor en cuenta",
-        "Valor_Rescate": "Valor de rescate",
-        "Rendimiento": "Rendimiento",
-        "Rendimiento_Acumulado": "Rendimiento acumulado"
-    })
-
-    columnas_orden = [
-        "Año",
-        "Meses",
-        "Aporte acumulado",
-        "Retiro",
-        "Valor en cuenta",
-        "Valor de rescate",
-        "Rendimiento",
-        "Rendimiento acumulado"
-    ]
-
-    if "Etapa" in mostrar.columns:
-        columnas_orden.append("Etapa")
-
-    return mostrar[columnas_orden]
-
-
-def generar_tabla_excel(tabla_df: pd.DataFrame):
-    try:
-        import openpyxl  # noqa: F401
-    except ImportError:
-        return None
-
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine="openpyxl") as writer:
-        tabla_df.to_excel(writer, index=False, sheet_name="Resumen")
-    output.seek(0)
-    return output.getvalue()
-
-
-def generar_tabla_pdf(tabla_df: pd.DataFrame, titulo: str = "Resumen anual") -> bytes:
-    output = io.BytesIO()
-
-    fig, ax = plt.subplots(figsize=(17, max(4.5, 0.50 * len(tabla_df) + 2.4)))
-    ax.axis("off")
-    ax.set_title(titulo, fontsize=16, fontweight="bold", pad=20)
-
-    tabla = ax.table(
-        cellText=tabla_df.values,
-        colLabels=tabla_df.columns,
-        loc="center",
-        cellLoc="center"
-    )
-
-    tabla.auto_set_font_size(False)
-    tabla.set_fontsize(8.5)
-    tabla.scale(1.18, 1.6)
-
-    cols = list(tabla_df.columns)
-
-    for (row, col), cell in tabla.get_celld().items():
-        cell.set_edgecolor("#d8dde6")
-        cell.set_linewidth(0.6)
-
-        if row == 0:
-            cell.set_facecolor("#40466e")
-            cell.set_text_props(color="white", weight="bold", fontsize=9)
-        elif row % 2 == 0:
-            cell.set_facecolor("#f7f9fc")
-        else:
-            cell.set_facecolor("white")
-
-    if "Valor de rescate" in cols and "Aporte acumulado" in cols:
-        idx_rescate = cols.index("Valor de rescate")
-        idx_aporte = cols.index("Aporte acumulado")
-
-        for i in range(len(tabla_df)):
-            rescate_txt = str(tabla_df.iloc[i, idx_rescate]).replace("USD", "").replace(",", "").strip()
-            aporte_txt = str(tabla_df.iloc[i, idx_aporte]).replace("USD", "").replace(",", "").strip()
-
-            try:
-                rescate_val = float(rescate_txt)
-                aporte_val = float(aporte_txt)
-                if rescate_val < aporte_val:
-                    tabla[(i + 1, idx_rescate)].set_text_props(color="#D4AC0D", weight="bold")
-            except Exception:
-                pass
-
-    plt.tight_layout()
-    fig.savefig(output, format="pdf", bbox_inches="tight")
-    plt.close(fig)
-    output.seek(0)
-    return output.getvalue()
-
-
-def generar_pdf_completo(fig_principal, tabla_export: pd.DataFrame, nombre_cliente: str) -> bytes:
-    output = io.BytesIO()
-
-    with PdfPages(output) as pdf:
-        pdf.savefig(fig_principal, bbox_inches="tight")
-
-        fig2, ax2 = plt.subplots(figsize=(17, max(5.5, 0.50 * len(tabla_export) + 2.8)))
-        ax2.axis("off")
-        ax2.set_title(f"Resumen anual - {nombre_cliente}", fontsize=16, fontweight="bold", pad=20)
-
-        tabla = ax2.table(
-            cellText=tabla_export.values,
-            colLabels=tabla_export.columns,
-            loc="center",
-            cellLoc="center"
-        )
-
-        tabla.auto_set_font_size(False)
-        tabla.set_fontsize(8.5)
-        tabla.scale(1.18, 1.62)
-
-        cols = list(tabla_export.columns)
-        for (row, col), cell in tabla.get_celld().items():
-            cell.set_edgecolor("#d8dde6")
-            cell.set_linewidth(0.6)
-
-            if row == 0:
-                cell.set_facecolor("#40466e")
-                cell.set_text_props(color="white", weight="bold", fontsize=9)
-            elif row % 2 == 0:
-                cell.set_facecolor("#f7f9fc")
-            else:
-                cell.set_facecolor("white")
-
-        if "Valor de rescate" in cols and "Aporte acumulado" in cols:
-            idx_rescate = cols.index("Valor de rescate")
-            idx_aporte = cols.index("Aporte acumulado")
-            for i in range(len(tabla_export)):
-                rescate_txt = str(tabla_export.iloc[i, idx_rescate]).replace("USD", "").replace(",", "").strip()
-                aporte_txt = str(tabla_export.iloc[i, idx_aporte]).replace("USD", "").replace(",", "").strip()
-                try:
-                    rescate_val = float(rescate_txt)
-                    aporte_val = float(aporte_txt)
-                    if rescate_val < aporte_val:
-                        tabla[(i + 1, idx_rescate)].set_text_props(color="#D4AC0D", weight="bold")
-                except Exception:
-                    pass
-
-        fig2.text(
-            0.5, 0.03,
-            "Disclaimer: esta herramienta es únicamente ilustrativa. No constituye una proyección garantizada, una oferta, ni asesoría financiera, legal o fiscal.",
-            ha="center", fontsize=9, color="#666"
-        )
-
-        plt.tight_layout(rect=[0.02, 0.05, 0.98, 0.95])
-        pdf.savefig(fig2, bbox_inches="tight")
-        plt.close(fig2)
-
-    output.seek(0)
-    return output.getvalue()
+@st.cache_resource(show_spinner=False)
+def cache_disco():
+    # Opcional: se activa con ILUSTRACIONES_CACHE_DISCO=1 en cada proceso.
+    return cache_disco_desde_entorno()
 
 
 # --- CARGA DE MERCADO ---
 st.sidebar.header("Serie de mercado")
 st.sidebar.caption("Serie histórica neta basada en el S&P 500.")
-forzar_actualizacion = st.sidebar.button("🔄 Actualizar base ahora")
+refresco = refresco_mercado()
+if st.sidebar.button("🔄 Actualizar base ahora", disabled=refresco.en_curso()):
+    refresco.iniciar()
 
 try:
-    df_mercado, origen_base = cargar_serie_mercado(forzar_actualizacion=forzar_actualizacion)
+    df_mercado, origen_base = cargar_serie_mercado()
     st.sidebar.success(f"Base cargada: {len(df_mercado)} meses")
 
     hoy = pd.Timestamp.today()
@@ -856,11 +132,113 @@ try:
         f"Rango disponible: {df_mercado['Date'].min().strftime('%Y-%m')} a {fecha_mostrar.strftime('%Y-%m')}"
     )
     st.sidebar.caption(f"Origen: {origen_base}")
+
+    metadatos_mercado = leer_metadatos_almacen() or {}
+    if metadatos_mercado.get("actualizado"):
+        actualizado = pd.Timestamp(metadatos_mercado["actualizado"])
+    else:
+        actualizado = pd.Timestamp.fromtimestamp(os.path.getmtime(os.path.join(ALMACEN_MERCADO_DIR, "vigente.json")))
+    st.sidebar.caption(f"Datos actualizados {antiguedad_texto(actualizado)}")
+
+    # El reporte se calculó al importar; aquí sólo se lee de los metadatos.
+    calidad = metadatos_mercado.get("calidad") or {}
+    rechazo = leer_rechazo_mercado() if "rechazado" in origen_base else None
+    # Se guarda el expander para agregar luego los huecos de la cartera.
+    expander_calidad = st.sidebar.expander("🩺 Calidad de datos")
+    with expander_calidad:
+        if calidad:
+            st.caption(
+                f"{calidad['filas']} meses, cobertura {calidad['cobertura']:.1%}, "
+                f"{len(calidad['atipicos'])} retornos atípicos."
+            )
+            for aviso in calidad["advertencias"]:
+                st.caption(f"⚠️ {aviso}")
+            for hueco in calidad["huecos"]:
+                st.caption(f"Hueco: {hueco['desde']} a {hueco['hasta']} ({hueco['meses']} meses)")
+        if rechazo is not None:
+            st.warning(
+                f"Datos rechazados el {rechazo['fecha'][:10]}: " + "; ".join(rechazo["reporte"]["errores"])
+                + ". Se sigue usando la versión publicada."
+            )
+
+    df_diario = cargar_serie_diaria()
+    if df_diario is not None:
+        st.sidebar.caption(f"Serie diaria: {len(df_diario)} días hábiles")
+
+    # Publica de nuevo el almacén de índices si cambió la serie mensual.
+    df_indices = cargar_indices(df_mercado)
 except Exception:
     st.error("No se pudo cargar la base de mercado.")
     st.code(traceback.format_exc())
     st.stop()
 
+
+@st.fragment(run_every=2)
+def seguir_refresco():
+    # Mientras el refresco corre se consulta su estado sin rehacer la página;
+    # al terminar se relanza la app completa para tomar la nueva versión.
+    if refresco.en_curso():
+        estado = refresco.estado()
+        st.caption(f"⏳ Actualizando en segundo plano (intento {estado['intento']} de {refresco.reintentos})…")
+        if estado["error"]:
+            st.caption(f"Último error: {estado['error']}")
+    else:
+        st.rerun()
+
+
+estado_refresco = refresco.estado()
+with st.sidebar:
+    if refresco.en_curso():
+        seguir_refresco()
+    elif estado_refresco["estado"] == "ok":
+        st.caption(
+            f"Último refresco correcto ({estado_refresco['meses']} meses escritos, "
+            f"{antiguedad_texto(estado_refresco['fin'])})."
+        )
+    elif estado_refresco["estado"] == "error":
+        st.warning(
+            f"No se pudo actualizar la base ({estado_refresco['error']}). "
+            "Se sigue usando la versión guardada."
+        )
+
+# --- CARTERA ---
+nombres_indices = [c for c in df_indices.columns if c != "Date"]
+cartera = None
+if len(nombres_indices) > 1:
+    with st.sidebar.expander("📊 Cartera"):
+        st.caption("Pesos por índice (%), rebalanceados al inicio de cada período.")
+        pesos_cartera = {
+            nombre: st.number_input(nombre, min_value=0.0, max_value=100.0,
+                                    value=100.0 if nombre == "SP500" else 0.0, step=5.0, key=f"peso_{nombre}")
+            for nombre in nombres_indices
+        }
+        rebalanceo = st.selectbox("Rebalanceo", list(MAPA_REBALANCEO), index=3)
+        if abs(sum(pesos_cartera.values()) - 100) > 1e-9:
+            st.error(f"Los pesos suman {sum(pesos_cartera.values()):g}%; deben sumar 100%.")
+            st.stop()
+        if pesos_cartera.get("SP500", 0) < 100:
+            cartera = {n: w / 100 for n, w in pesos_cartera.items() if w > 0}
+            try:
+                df_mercado = serie_cartera(df_indices, cartera, MAPA_REBALANCEO[rebalanceo])
+            except ValueError as e:
+                st.error(str(e))
+                st.stop()
+            # La serie diaria sólo existe para el S&P 500.
+            df_diario = None
+            st.caption(
+                f"Cartera: {df_mercado['Date'].min().strftime('%Y-%m')} a "
+                f"{df_mercado['Date'].max().strftime('%Y-%m')} ({len(df_mercado)} meses)"
+            )
+            if df_mercado.attrs["huecos"]:
+                st.caption("⚠️ Meses sin dato de algún índice, completados con el último precio (ver Calidad de datos).")
+    if cartera is not None:
+        with expander_calidad:
+            for hueco in df_mercado.attrs["huecos"]:
+                st.caption(
+                    f"Hueco en la cartera: {hueco['desde']} a {hueco['hasta']} "
+                    f"({hueco['meses']} meses, último precio)"
+                )
+
 # --- DETECCIÓN DE PLANES ---
 planes_disponibles = detectar_planes_csv()
 
@@ -893,12 +271,29 @@ with st.sidebar:
     years = list(range(min_year, max_year + 1))
     default_year = 2010 if 2010 in years else min_year
 
-    c1, c2 = st.columns(2)
+    resolucion = st.radio(
+        "Resolución",
+        ["Mensual", "Diaria"],
+        horizontal=True,
+        disabled=df_diario is None,
+        help="La resolución diaria aplica aportes y retiros en su día y prorratea el AMC por día hábil. "
+             "Se habilita cuando la serie diaria está descargada (🔄 Actualizar base ahora)."
+    )
+    diaria = resolucion == "Diaria" and df_diario is not None
+
+    if diaria:
+        c1, c2, c3 = st.columns([1.2, 1, 0.8])
+    else:
+        c1, c2 = st.columns(2)
     with c1:
         anio_inicio = st.selectbox("Año Inicio", years, index=years.index(default_year))
     with c2:
         mes_inicio_txt = st.selectbox("Mes Inicio", LISTA_MESES, index=0)
         mes_inicio = mes_numero(mes_inicio_txt)
+    dia_inicio = 1
+    if diaria:
+        with c3:
+            dia_inicio = st.number_input("Día", min_value=1, max_value=31, value=1, step=1)
 
     nombre_cliente = st.text_input("Nombre Cliente", value="Cliente Ejemplo")
 
@@ -906,6 +301,7 @@ with st.sidebar:
     retiros_programados = []
 
     _, plazo_anios, tipo_plan = planes_disponibles[seleccion]
+    frecuencia_pago = None
 
     if tipo_plan == "MIS":
         monto_input = st.number_input("Inversión Inicial (USD)", min_value=1000, value=10000, step=1000)
@@ -930,7 +326,10 @@ with st.sidebar:
                         me_x = mes_numero(me_x_txt)
 
                     if m_x > 0:
-                        aportes_extra.append({"monto": m_x, "anio": an_x, "mes": me_x})
+                        aporte = {"monto": m_x, "anio": an_x, "mes": me_x}
+                        if diaria:
+                            aporte["dia"] = st.number_input(f"Día {i+1}", min_value=1, max_value=31, value=1, key=f"dx_{i}")
+                        aportes_extra.append(aporte)
 
     else:
         monto_input = st.number_input("Aporte periódico (USD)", min_value=150, value=500, step=50)
@@ -956,51 +355,150 @@ with st.sidebar:
                     me_r = mes_numero(me_r_txt)
 
                 if m_r > 0:
-                    retiros_programados.append({"monto": m_r, "anio": an_r, "mes": me_r})
+                    retiro = {"monto": m_r, "anio": an_r, "mes": me_r}
+                    if diaria:
+                        retiro["dia"] = st.number_input(f"Día retiro {i+1}", min_value=1, max_value=31, value=1, key=f"dr_{i}")
+                    retiros_programados.append(retiro)
+
+    with st.expander("🔁 Barrido histórico"):
+        modo_barrido = st.checkbox(
+            "Simular todas las fechas de inicio",
+            help="Calcula el mismo plan iniciado en cada mes de la serie mensual. No incluye retiros parciales."
+        )
+        anios_barrido = st.number_input(
+            "Años por corrida (0 = hasta el último mes)",
+            min_value=0, max_value=100, value=0, step=1
+        )
 
 generar = st.button("Generar Ilustración", type="primary")
 
-if generar:
+
+# --- GRÁFICOS ---
+def grafico_en_rango(df: pd.DataFrame, clave: str, fecha: str = "Date", **opciones):
+    # El rango elegido se reduce en el servidor: sólo viajan los puntos de ese tramo.
+    fechas = df[fecha]
+    meses = fechas.dt.strftime("%Y-%m").drop_duplicates().tolist()
+    desde, hasta = fechas.iloc[0], fechas.iloc[-1]
+    if len(meses) > 2:
+        mes_desde, mes_hasta = st.select_slider(
+            "Rango visible", options=meses, value=(meses[0], meses[-1]), key=f"rango_{clave}"
+        )
+        desde = max(desde, pd.Timestamp(mes_desde))
+        hasta = min(hasta, pd.Timestamp(mes_hasta) + pd.offsets.MonthEnd(0))
+    fig = crear_grafico_interactivo(df, desde.date(), hasta.date(), fecha=fecha, **opciones)
+    st.plotly_chart(fig, config={"displaylogo": False}, key=f"plotly_{clave}")
+
+
+@st.fragment
+def grafico_principal(df: pd.DataFrame, producir_png, clave: str):
+    # Fragmento: cambiar de modo o de rango no rehace la ilustración.
+    if plotly_disponible() and st.toggle("Gráfico interactivo", key="grafico_interactivo"):
+        grafico_en_rango(df, clave)
+    else:
+        st.image(producir_png(), width="stretch")
+
+
+@st.fragment
+def grafico_barrido(barrido: pd.DataFrame):
+    if not plotly_disponible():
+        st.line_chart(barrido.set_index("Fecha_Inicio")["Rendimiento_XIRR"])
+        return
+    grafico_en_rango(
+        barrido.dropna(subset=["Rendimiento_XIRR"]), "barrido", fecha="Fecha_Inicio", unidad="%",
+        series=[("Rendimiento_XIRR", "XIRR anual", "#0b5cad", False)]
+    )
+
+
+if generar and modo_barrido:
     try:
+        horizonte_barrido = int(anios_barrido) * 12 or None
+
         if tipo_plan == "MIS":
-            df_resultado = simular_mis(
-                df_base=df_mercado,
-                monto_inicial=float(monto_input),
-                anio_inicio=int(anio_inicio),
-                mes_inicio=int(mes_inicio),
-                aportes_extra=aportes_extra,
-                retiros_programados=retiros_programados
-            )
-            subtitulo = f"Estrategia ({1 + len(aportes_extra)} aportes)"
+            extras_relativos = [
+                {
+                    "monto": extra["monto"],
+                    "mes_plan": max(1, (int(extra["anio"]) - int(anio_inicio)) * 12 + int(extra["mes"]) - int(mes_inicio) + 1)
+                }
+                for extra in aportes_extra
+            ]
+            barrido = barrer_inicios_mis(df_mercado, float(monto_input), extras_relativos, horizonte_barrido)
         else:
-            df_resultado = simular_mss(
-                df_base=df_mercado,
-                plazo_anios=int(plazo_anios),
-                monto_aporte=float(monto_input),
-                frecuencia_pago=frecuencia_pago,
-                anio_inicio=int(anio_inicio),
-                mes_inicio=int(mes_inicio),
-                retiros_programados=retiros_programados
+            barrido = barrer_inicios_mss(
+                df_mercado, int(plazo_anios), float(monto_input), frecuencia_pago, horizonte_barrido
             )
-            subtitulo = f"Aporte {frecuencia_pago}: {fmt_usd(monto_input)}"
 
-        resumen = construir_resumen_anual(
-            df_resultado,
-            anio_inicio=int(anio_inicio),
-            mes_inicio=int(mes_inicio)
+        st.success(f"✅ Barrido de {len(barrido)} fechas de inicio.")
+        st.subheader("Rendimiento anual equivalente (XIRR) por fecha de inicio")
+        grafico_barrido(barrido)
+
+        st.dataframe(
+            barrido.style.format({
+                "Fecha_Inicio": lambda f: f.strftime("%Y-%m"),
+                "Fecha_Final": lambda f: f.strftime("%Y-%m"),
+                "Aporte_Acum": fmt_usd,
+                "Valor_Cuenta": fmt_usd,
+                "Valor_Rescate": fmt_usd,
+                "Rendimiento_XIRR": fmt_pct,
+            }),
+            width="stretch",
+            hide_index=True
         )
 
-        fig_principal = crear_figura_principal(
-            df_resultado,
-            resumen,
-            seleccion,
-            nombre_cliente,
-            subtitulo,
-            tipo_plan
+        st.download_button(
+            "📥 Descargar barrido en CSV",
+            data=barrido.to_csv(index=False).encode("utf-8"),
+            file_name=f"Barrido_{seleccion}.csv",
+            mime="text/csv"
+        )
+
+    except Exception:
+        st.error("❌ Ocurrió un error al generar el barrido histórico.")
+        st.code(traceback.format_exc())
+
+elif generar:
+    try:
+        df_resultado, resumen = calcular_ilustracion(
+            df_diario if diaria else df_mercado,
+            tipo_plan=tipo_plan,
+            plazo_anios=plazo_anios,
+            monto=float(monto_input),
+            frecuencia_pago=frecuencia_pago,
+            anio_inicio=int(anio_inicio),
+            mes_inicio=int(mes_inicio),
+            aportes_extra=aportes_extra,
+            retiros_programados=retiros_programados,
+            resolucion=resolucion,
+            dia_inicio=int(dia_inicio),
+            cache=cache_resultados(),
+            disco=cache_disco()
         )
 
+        subtitulo = subtitulo_ilustracion(tipo_plan, monto_input, frecuencia_pago, aportes_extra, diaria, cartera)
+
+        clave = df_resultado.attrs.get("clave_ilustracion")
+        version = version_mercado(df_mercado)
+
+        def documento(tipo: str, ext: str, generar: partial):
+            # Devuelve un callable que arma el documento una sola vez por
+            # ilustración. ``generar`` es un partial y no una lambda: lo que
+            # queda guardado (descargas diferidas, fragmentos) retiene sólo
+            # sus datos y no todas las variables de esta ejecución.
+            if clave is None:
+                return generar
+            return documento_diferido(
+                generar, clave_documento(clave, tipo, seleccion, nombre_cliente, subtitulo), ext,
+                memoria=cache_documentos(), disco=cache_disco(), version=version
+            )
+
         st.success("✅ Ilustración generada.")
-        st.pyplot(fig_principal, use_container_width=True)
+        grafico_principal(
+            df_resultado,
+            documento(
+                "figura_principal", ".png",
+                partial(figura_principal_png, df_resultado, resumen, seleccion, nombre_cliente, subtitulo, tipo_plan)
+            ),
+            clave or "ilustracion"
+        )
 
         st.subheader("Resumen anual")
 
@@ -1062,26 +560,23 @@ if generar:
             )
         )
 
-        st.dataframe(styled, use_container_width=True, hide_index=True)
-
-        tabla_export = mostrar.copy()
-        tabla_export["Aporte acumulado"] = tabla_export["Aporte acumulado"].map(fmt_usd)
-        tabla_export["Retiro"] = tabla_export["Retiro"].map(fmt_usd)
-        tabla_export["Valor en cuenta"] = tabla_export["Valor en cuenta"].map(fmt_usd)
-        tabla_export["Valor de rescate"] = tabla_export["Valor de rescate"].map(fmt_usd)
-        tabla_export["Rendimiento"] = tabla_export["Rendimiento"].map(fmt_pct)
-        tabla_export["Rendimiento acumulado"] = tabla_export["Rendimiento acumulado"].map(fmt_pct)
+        st.dataframe(styled, width="stretch", hide_index=True)
+        # El Styler ya se serializó; sin esto quedaría vivo con la sesión hasta el próximo rerun.
+        del styled
 
         c1, c2, c3 = st.columns(3)
 
         with c1:
-            excel_data = generar_tabla_excel(tabla_export)
-            if excel_data:
+            if excel_disponible():
                 st.download_button(
                     "📥 Descargar tabla en Excel",
-                    data=excel_data,
+                    data=documento(
+                        "tabla_excel", ".xlsx",
+                        partial(generar_tabla_excel, preparar_tabla_exportar(mostrar))
+                    ),
                     file_name=f"Tabla_Resumen_{nombre_cliente}.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                    on_click="ignore"
                 )
             else:
                 st.info("Exportación a Excel no disponible (falta instalar openpyxl).")
@@ -1089,17 +584,25 @@ if generar:
         with c2:
             st.download_button(
                 "📥 Descargar tabla en PDF",
-                data=generar_tabla_pdf(tabla_export, titulo=f"Resumen anual - {nombre_cliente}"),
+                data=documento(
+                    "reporte_tabla", ".pdf",
+                    partial(generar_tabla_pdf, resumen, titulo=f"Resumen anual - {nombre_cliente}")
+                ),
                 file_name=f"Tabla_Resumen_{nombre_cliente}.pdf",
-                mime="application/pdf"
+                mime="application/pdf",
+                on_click="ignore"
             )
 
         with c3:
             st.download_button(
                 "📥 Descargar ilustración completa en PDF",
-                data=generar_pdf_completo(fig_principal, tabla_export, nombre_cliente),
+                data=documento(
+                    "reporte_completo", ".pdf",
+                    partial(generar_pdf_completo, df_resultado, resumen, seleccion, nombre_cliente, subtitulo, tipo_plan)
+                ),
                 file_name=f"Ilustracion_{nombre_cliente}.pdf",
-                mime="application/pdf"
+                mime="application/pdf",
+                on_click="ignore"
             )
 
     except Exception:
@@ -0,0 +1,127 @@
+"""
+Verifica la actualización incremental del almacén mensual
+(``actualizar_serie_mercado``) contra un CSV diario de prueba
+(``benchmarks/datos/sp500_diario_fixture.csv``, de enero de 2023 a mediados
+de marzo de 2024), en una carpeta temporal y sin red:
+
+1. Un almacén publicado hasta diciembre de 2023 se actualiza con el archivo
+   completo: diciembre se reemplaza desde la marca de agua y se agregan los
+   meses de 2024.
+2. Se revisa el último mes (abierto): cambia su cierre y aparece un día
+   más. Sólo ese mes se reemplaza.
+3. Repetir la última actualización no escribe nada.
+
+En cada paso, el almacén resultante debe ser idéntico (misma versión, que
+es el hash de las columnas) a publicar desde cero los cierres mensuales
+esperados. Termina con código 1 si alguna comprobación falla. Uso:
+
+    python benchmarks/actualizacion_incremental.py
+"""
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from ilustraciones.mercado import (  # noqa: E402
+    _abrir_almacen,
+    actualizar_serie_mercado,
+    cierres_mensuales_en_flujo,
+    escribir_almacen_mercado,
+    fuente_archivo,
+    huella_archivo,
+    leer_metadatos_almacen,
+)
+
+FIXTURE = os.path.join(RAIZ, "benchmarks", "datos", "sp500_diario_fixture.csv")
+
+fallas = []
+
+
+def comprobar(condicion: bool, mensaje: str):
+    print(f"{'ok   ' if condicion else 'FALLA'} {mensaje}")
+    if not condicion:
+        fallas.append(mensaje)
+
+
+def version_desde_cero(mensual: pd.DataFrame, carpeta: str) -> str:
+    return escribir_almacen_mercado(mensual, directorio=os.path.join(carpeta, "desde_cero"))["version"]
+
+
+def comprobar_almacen(directorio: str, esperado: pd.DataFrame, carpeta: str, paso: str):
+    metadatos = leer_metadatos_almacen(directorio)
+    almacen = _abrir_almacen(os.path.join(directorio, metadatos["version"]))
+    comprobar(len(almacen) == len(esperado), f"{paso}: {len(esperado)} meses en el almacén")
+    comprobar(
+        np.array_equal(almacen["Date"].to_numpy(), esperado["Date"].to_numpy())
+        and np.array_equal(almacen["Price"].to_numpy(), esperado["Price"].to_numpy()),
+        f"{paso}: fechas y cierres iguales a los del CSV"
+    )
+    comprobar(
+        metadatos["version"] == version_desde_cero(esperado, carpeta),
+        f"{paso}: misma versión que publicar la serie desde cero"
+    )
+    versiones = [n for n in os.listdir(directorio) if os.path.isdir(os.path.join(directorio, n))]
+    comprobar(versiones == [metadatos["version"]], f"{paso}: sólo queda publicada la versión vigente")
+    return metadatos
+
+
+def main() -> int:
+    carpeta = tempfile.mkdtemp(prefix="actualizacion-")
+    try:
+        directorio = os.path.join(carpeta, "sp500_mensual")
+        ruta_csv = os.path.join(carpeta, "sp500_mensual.csv")
+        completo = cierres_mensuales_en_flujo(FIXTURE)
+
+        # Almacén inicial hasta diciembre de 2023, como lo deja una importación.
+        inicial = completo[completo["Date"] <= "2023-12-31"].reset_index(drop=True)
+        inicial.to_csv(ruta_csv, index=False)
+        escribir_almacen_mercado(inicial, directorio=directorio, huella_csv=huella_archivo(ruta_csv))
+
+        # 1. Meses nuevos desde la marca de agua (diciembre se vuelve a pedir).
+        metadatos, meses = actualizar_serie_mercado(fuente_archivo(FIXTURE), directorio, ruta_csv)
+        comprobar(meses == 4, f"paso 1: diciembre reemplazado y 3 meses nuevos (escribió {meses})")
+        comprobar(metadatos["hasta"] == "2024-03", f"paso 1: el almacén llega a {metadatos['hasta']}")
+        comprobar(metadatos["huella_csv"] == huella_archivo(ruta_csv), "paso 1: huella del CSV de intercambio registrada")
+        comprobar_almacen(directorio, completo, carpeta, "paso 1")
+
+        # 2. El mes abierto se revisa: otro cierre para el 15 y un día nuevo.
+        diario = pd.read_csv(FIXTURE)
+        diario.loc[diario.index[-1], "Close"] += 25.0
+        nuevo_dia = diario.iloc[[-1]].assign(Date="2024-03-18", Close=diario["Close"].iloc[-1] + 10.0)
+        revisado = os.path.join(carpeta, "revisado.csv")
+        pd.concat([diario, nuevo_dia]).to_csv(revisado, index=False)
+        esperado = cierres_mensuales_en_flujo(revisado)
+
+        anterior = metadatos["version"]
+        metadatos, meses = actualizar_serie_mercado(fuente_archivo(revisado), directorio, ruta_csv)
+        comprobar(meses == 1, f"paso 2: sólo se reemplaza marzo (escribió {meses})")
+        comprobar(metadatos["version"] != anterior, "paso 2: se publica una versión nueva")
+        comprobar(float(esperado["Price"].iloc[-1]) == float(diario["Close"].iloc[-1] + 10.0), "paso 2: marzo cierra con el día agregado")
+        comprobar_almacen(directorio, esperado, carpeta, "paso 2")
+        comprobar(
+            pd.read_csv(ruta_csv, parse_dates=["Date"])["Price"].to_numpy().tolist() == esperado["Price"].tolist(),
+            "paso 2: el CSV de intercambio tiene la serie actualizada"
+        )
+
+        # 3. Sin datos nuevos no se escribe.
+        anterior = metadatos["version"]
+        metadatos, meses = actualizar_serie_mercado(fuente_archivo(revisado), directorio, ruta_csv)
+        comprobar(meses == 0 and metadatos["version"] == anterior, "paso 3: repetir no publica nada")
+    finally:
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+    if fallas:
+        print(f"ERROR: {len(fallas)} comprobaciones fallaron.", file=sys.stderr)
+        return 1
+    print("Actualización incremental correcta.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
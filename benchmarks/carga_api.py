@@ -0,0 +1,113 @@
+"""
+Prueba de carga de la API local (``ilustraciones.servidor``). Levanta el
+servidor en un puerto libre de 127.0.0.1 (o usa ``--url``), envía pedidos
+concurrentes y reporta rendimiento (pedidos/s) y latencias p50/p95 por
+endpoint. No usa red externa. Uso:
+
+    python benchmarks/carga_api.py --pedidos 200 --concurrencia 8 --trabajadores 2
+
+Los pedidos varían la fecha de inicio entre ``--variantes`` combinaciones,
+así una parte se resuelve en la caché de cada proceso y otra se calcula.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def cliente(i: int, variantes: int) -> dict:
+    k = i % variantes
+    if k % 2:
+        return {"plan": "MIS", "monto": 10000, "inicio": f"{1990 + k % 30}-{1 + k % 12:02d}",
+                "aportes_extra": f"5000@{1995 + k % 30}-06"}
+    return {"plan": f"MSS - {5 + k % 16} Años", "monto": 500, "frecuencia": "Mensual",
+            "inicio": f"{1980 + k % 40}-{1 + k % 12:02d}"}
+
+
+def pedir(url: str, ruta: str, cuerpo: dict):
+    datos = json.dumps(cuerpo).encode("utf-8")
+    pedido = urllib.request.Request(url + ruta, data=datos, headers={"Content-Type": "application/json"})
+    inicio = time.perf_counter()
+    try:
+        with urllib.request.urlopen(pedido, timeout=300) as respuesta:
+            respuesta.read()
+            codigo = respuesta.status
+    except urllib.error.HTTPError as e:
+        codigo = e.code
+    return codigo, time.perf_counter() - inicio
+
+
+def percentil(valores: list, p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def escenario(url: str, ruta: str, cuerpos: list, concurrencia: int) -> dict:
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(concurrencia) as pool:
+        resultados = list(pool.map(lambda c: pedir(url, ruta, c), cuerpos))
+    total = time.perf_counter() - inicio
+
+    latencias = [s for codigo, s in resultados if codigo == 200]
+    return {
+        "pedidos": len(cuerpos),
+        "errores": sum(codigo != 200 for codigo, _ in resultados),
+        "por_segundo": len(cuerpos) / total,
+        "p50_ms": statistics.median(latencias) * 1000 if latencias else None,
+        "p95_ms": percentil(latencias, 95) * 1000 if latencias else None,
+    }
+
+
+def levantar_servidor(trabajadores: int):
+    proceso = subprocess.Popen(
+        [sys.executable, "-m", "ilustraciones.servidor", "--puerto", "0", "--trabajadores", str(trabajadores)],
+        cwd=RAIZ, stderr=subprocess.PIPE, text=True
+    )
+    linea = proceso.stderr.readline()
+    if "http://" not in linea:
+        proceso.kill()
+        raise RuntimeError(f"El servidor no arrancó: {linea}{proceso.stderr.read()}")
+    return proceso, linea.strip().split()[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=None, help="servidor ya levantado (por defecto se levanta uno)")
+    parser.add_argument("--trabajadores", type=int, default=2)
+    parser.add_argument("--pedidos", type=int, default=100)
+    parser.add_argument("--concurrencia", type=int, default=8)
+    parser.add_argument("--variantes", type=int, default=40)
+    parser.add_argument("--endpoints", nargs="+", default=["resumen", "simular", "xirr", "pdf"])
+    args = parser.parse_args()
+
+    proceso, url = (None, args.url) if args.url else levantar_servidor(args.trabajadores)
+    try:
+        print(f"{'endpoint':>10} {'pedidos':>8} {'errores':>8} {'pedidos/s':>10} {'p50 ms':>8} {'p95 ms':>8}")
+        for ruta in args.endpoints:
+            # Los PDF son mucho más lentos: se mide una fracción de los pedidos.
+            n = max(args.concurrencia, args.pedidos // 10) if ruta == "pdf" else args.pedidos
+            r = escenario(url, "/" + ruta, [cliente(i, args.variantes) for i in range(n)], args.concurrencia)
+            p50 = f"{r['p50_ms']:>8.0f}" if r["p50_ms"] is not None else f"{'-':>8}"
+            p95 = f"{r['p95_ms']:>8.0f}" if r["p95_ms"] is not None else f"{'-':>8}"
+            print(f"{ruta:>10} {r['pedidos']:>8} {r['errores']:>8} {r['por_segundo']:>10.1f} {p50} {p95}")
+
+        lote = [cliente(i, args.variantes) for i in range(args.variantes)]
+        inicio = time.perf_counter()
+        codigo, _ = pedir(url, "/lote", {"operacion": "resumen", "clientes": lote})
+        print(f"lote de {len(lote)} resúmenes: HTTP {codigo}, {time.perf_counter() - inicio:.2f}s")
+    finally:
+        if proceso is not None:
+            proceso.terminate()
+            proceso.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Compara los motores de referencia (``simular_mis`` y ``simular_mss``, con
+bucles) con los vectorizados sobre ilustraciones aleatorias: plazos y
+frecuencias MSS, aportes extra MIS (incluso antes del inicio o después del
+último mes) y retiros que pueden vaciar la cuenta. Los montos deben
+coincidir al centavo y ``Etapa`` y ``Mes_Plan`` exactamente; termina con
+código 1 si algún caso difiere. Uso:
+
+    python benchmarks/equivalencia_motores.py --casos 200 --semilla 0
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+os.chdir(RAIZ)
+
+from ilustraciones.config import FACTORES_COSTOS, MAPA_PASOS_PAGO  # noqa: E402
+from ilustraciones.mercado import cargar_serie_mercado  # noqa: E402
+from ilustraciones.simulacion import (  # noqa: E402
+    simular_mis,
+    simular_mis_vectorizado,
+    simular_mss,
+    simular_mss_vectorizado,
+)
+
+MONTOS = ("Aporte_Acum", "Valor_Cuenta", "Valor_Rescate", "Retiro")
+EXACTAS = ("Mes_Plan", "Etapa")
+TOLERANCIA = 0.005
+
+
+def _movimientos(rng: random.Random, desde: int, hasta: int, cantidad: int, monto_max: float) -> list:
+    """Movimientos en meses absolutos (anio * 12 + mes - 1) entre ``desde`` y ``hasta``."""
+    movimientos = []
+    for _ in range(cantidad):
+        mes = rng.randint(desde, hasta)
+        movimientos.append({"monto": round(rng.uniform(100, monto_max), 2), "anio": mes // 12, "mes": mes % 12 + 1})
+    return movimientos
+
+
+def caso_aleatorio(rng: random.Random, primero: int, ultimo: int) -> tuple:
+    """``(motor, argumentos)`` de una ilustración al azar dentro de la serie."""
+    inicio = rng.randint(primero, ultimo - 12)
+    anio, mes = inicio // 12, inicio % 12 + 1
+    # Algunos retiros son mayores que el saldo para cubrir el recorte a cero.
+    retiros = _movimientos(rng, inicio, min(ultimo, inicio + 480), rng.randint(0, 4), 60000)
+
+    if rng.random() < 0.5:
+        extras = _movimientos(rng, inicio - 24, min(ultimo + 12, inicio + 360), rng.randint(0, 5), 50000)
+        return "MIS", dict(
+            monto_inicial=round(rng.uniform(1000, 100000), 2), anio_inicio=anio, mes_inicio=mes,
+            aportes_extra=extras, retiros_programados=retiros
+        )
+    return "MSS", dict(
+        plazo_anios=rng.choice(sorted(FACTORES_COSTOS)), monto_aporte=round(rng.uniform(50, 5000), 2),
+        frecuencia_pago=rng.choice(sorted(MAPA_PASOS_PAGO)), anio_inicio=anio, mes_inicio=mes,
+        retiros_programados=retiros
+    )
+
+
+def diferencias(bucle, vectorizado) -> dict:
+    """Mayor diferencia absoluta por columna de montos; ``inf`` si otra columna no coincide."""
+    if len(bucle) != len(vectorizado):
+        return {"filas": float("inf")}
+    resultado = {
+        columna: float(np.max(np.abs(bucle[columna].to_numpy(dtype=float) - vectorizado[columna].to_numpy(dtype=float))))
+        for columna in MONTOS
+    }
+    for columna in EXACTAS:
+        if columna in bucle and not np.array_equal(bucle[columna].to_numpy(), vectorizado[columna].to_numpy()):
+            resultado[columna] = float("inf")
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--casos", type=int, default=200)
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+
+    df_base, _ = cargar_serie_mercado()
+    fechas = df_base["Date"]
+    primero = int(fechas.iloc[0].year * 12 + fechas.iloc[0].month - 1)
+    ultimo = int(fechas.iloc[-1].year * 12 + fechas.iloc[-1].month - 1)
+    motores = {"MIS": (simular_mis, simular_mis_vectorizado), "MSS": (simular_mss, simular_mss_vectorizado)}
+
+    rng = random.Random(args.semilla)
+    peor = {"MIS": 0.0, "MSS": 0.0}
+    tiempos = {"bucle": 0.0, "vectorizado": 0.0}
+    fallas = 0
+    for i in range(1, args.casos + 1):
+        motor, argumentos = caso_aleatorio(rng, primero, ultimo)
+        bucle, vectorizado = motores[motor]
+
+        inicio = time.perf_counter()
+        esperado = bucle(df_base, **argumentos)
+        tiempos["bucle"] += time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        obtenido = vectorizado(df_base, **argumentos)
+        tiempos["vectorizado"] += time.perf_counter() - inicio
+
+        diferencia = diferencias(esperado, obtenido)
+        maximo = max(diferencia.values())
+        peor[motor] = max(peor[motor], maximo)
+        if maximo > TOLERANCIA:
+            fallas += 1
+            print(f"Caso {i} ({motor}) difiere: {diferencia}\n  {argumentos}", file=sys.stderr)
+
+    for motor, maximo in peor.items():
+        print(f"{motor}: mayor diferencia {maximo:.2e}")
+    print(f"bucle {tiempos['bucle']:.1f} s, vectorizado {tiempos['vectorizado']:.1f} s, {args.casos} casos")
+    if fallas:
+        print(f"ERROR: {fallas} de {args.casos} casos difieren en más de {TOLERANCIA}", file=sys.stderr)
+        return 1
+    print("Los motores coinciden al centavo.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
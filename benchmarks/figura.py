@@ -0,0 +1,91 @@
+"""
+Compara la figura principal como la dibujaba ``st.pyplot`` (todos los
+puntos, PNG a 200 dpi) con ``figura_principal_png`` (series reducidas con
+LTTB, PNG a ``GRAFICO_DPI``) y con la lectura desde la caché de documentos.
+Informa mediana de segundos, tamaño del PNG y puntos dibujados por serie.
+Uso:
+
+    python benchmarks/figura.py --repeticiones 5
+"""
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+os.chdir(RAIZ)
+
+from ilustraciones.cache import CacheLRU  # noqa: E402
+from ilustraciones.cli import calcular_trabajo, preparar_trabajo  # noqa: E402
+from ilustraciones.config import GRAFICO_MAX_PUNTOS  # noqa: E402
+from ilustraciones.exportar import crear_figura_principal, figura_principal_png, subtitulo_ilustracion  # noqa: E402
+from ilustraciones.simulacion import detectar_planes_csv  # noqa: E402
+
+CASOS = {
+    "MSS 10 años, 2010": {"plan": "MSS - 10 Años", "monto": 500, "frecuencia": "Mensual", "inicio": "2010-01"},
+    "MIS, 1850": {"plan": "MIS", "monto": 10000, "inicio": "1850-01"},
+    "MIS diaria, 1850": {"plan": "MIS", "monto": 10000, "inicio": "1850-01-02", "resolucion": "Diaria"},
+}
+
+
+def png_completo(df, resumen, argumentos) -> bytes:
+    # Camino anterior: todos los puntos y los parámetros por defecto de st.pyplot.
+    fig = crear_figura_principal(df, resumen, *argumentos, max_puntos=len(df))
+    output = io.BytesIO()
+    fig.savefig(output, format="png", dpi=200, bbox_inches="tight")
+    return output.getvalue()
+
+
+def medir(funcion, repeticiones: int):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        datos = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos), len(datos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    planes = detectar_planes_csv()
+    print(f"{'caso':>18} {'filas':>6} {'puntos':>7} {'camino':>14} {'segundos':>9} {'KB':>7}")
+    for caso, cliente in CASOS.items():
+        try:
+            trabajo = preparar_trabajo({**cliente, "nombre": "Cliente"}, planes)
+            df, resumen = calcular_trabajo(trabajo)
+        except ValueError as e:
+            print(f"{caso:>18}  omitido: {e}")
+            continue
+        subtitulo = subtitulo_ilustracion(
+            trabajo["tipo_plan"], trabajo["monto"], trabajo["frecuencia_pago"], trabajo["aportes_extra"],
+            trabajo["resolucion"] == "Diaria"
+        )
+        argumentos = (trabajo["seleccion"], trabajo["nombre"], subtitulo, trabajo["tipo_plan"])
+
+        cache = CacheLRU()
+
+        def desde_cache():
+            datos = cache.obtener(caso)
+            if datos is None:
+                datos = figura_principal_png(df, resumen, *argumentos)
+                cache.guardar(caso, datos)
+            return datos
+
+        variantes = {
+            ("completo", len(df)): lambda: png_completo(df, resumen, argumentos),
+            ("LTTB + Figure", min(len(df), GRAFICO_MAX_PUNTOS)): lambda: figura_principal_png(df, resumen, *argumentos),
+            ("caché", min(len(df), GRAFICO_MAX_PUNTOS)): desde_cache,
+        }
+        for (camino, puntos), funcion in variantes.items():
+            segundos, tamanio = medir(funcion, args.repeticiones)
+            print(f"{caso:>18} {len(df):>6} {puntos:>7} {camino:>14} {segundos:>9.3f} {tamanio / 1024:>7.0f}")
+
+
+if __name__ == "__main__":
+    main()
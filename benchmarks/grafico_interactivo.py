@@ -0,0 +1,79 @@
+"""
+Tamaño del JSON que recibe el navegador y tiempo de armado del gráfico
+interactivo (``crear_grafico_interactivo``) para una ilustración MIS desde
+1850 y para el barrido histórico de inicios, enviando la serie completa o
+reduciéndola en el servidor al rango visible. Uso:
+
+    python benchmarks/grafico_interactivo.py --repeticiones 5
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+os.chdir(RAIZ)
+
+from ilustraciones.cli import calcular_trabajo, preparar_trabajo  # noqa: E402
+from ilustraciones.config import GRAFICO_INTERACTIVO_PUNTOS  # noqa: E402
+from ilustraciones.exportar import crear_grafico_interactivo  # noqa: E402
+from ilustraciones.mercado import cargar_serie_mercado  # noqa: E402
+from ilustraciones.simulacion import barrer_inicios_mis, detectar_planes_csv  # noqa: E402
+
+RANGOS = {
+    "completo": None,
+    "50 años": ("1950-01-01", "1999-12-31"),
+    "10 años": ("1990-01-01", "1999-12-31"),
+    "1 año": ("2008-01-01", "2008-12-31"),
+}
+
+
+def medir(funcion, repeticiones: int):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        fig = funcion()
+        datos = fig.to_json()
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos), len(datos), max(len(traza.x) for traza in fig.data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    trabajo = preparar_trabajo({"plan": "MIS", "monto": 10000, "inicio": "1850-01"}, detectar_planes_csv())
+    df, _ = calcular_trabajo(trabajo)
+    barrido = barrer_inicios_mis(cargar_serie_mercado()[0], 10000.0, [], None).dropna(subset=["Rendimiento_XIRR"])
+
+    casos = {
+        "MIS 1850": (df, {}),
+        "barrido MIS": (barrido, {
+            "fecha": "Fecha_Inicio", "unidad": "%", "series": [("Rendimiento_XIRR", "XIRR", "#0b5cad", False)]
+        }),
+    }
+
+    print(f"{'caso':>12} {'rango':>9} {'envío':>10} {'puntos':>7} {'KB':>7} {'ms':>7}")
+    for caso, (datos, opciones) in casos.items():
+        for rango, limites in RANGOS.items():
+            desde, hasta = limites or (None, None)
+            for envio, max_puntos in (("completo", len(datos)), ("reducido", GRAFICO_INTERACTIVO_PUNTOS)):
+                if limites is not None and envio == "completo":
+                    # Sin reducción el navegador recibe la serie entera y el rango sólo mueve el eje.
+                    desde_envio, hasta_envio = None, None
+                else:
+                    desde_envio, hasta_envio = desde, hasta
+                segundos, tamanio, puntos = medir(
+                    lambda: crear_grafico_interactivo(
+                        datos, desde_envio, hasta_envio, max_puntos=max_puntos, **opciones
+                    ),
+                    args.repeticiones
+                )
+                print(f"{caso:>12} {rango:>9} {envio:>10} {puntos:>7} {tamanio / 1024:>7.1f} {segundos * 1000:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Tiempo de importación en frío del motor (``ilustraciones``) comparado con
+las dependencias que carga la app de Streamlit. Cada importación corre en
+un proceso nuevo, en una carpeta vacía, y se informa la mediana. También
+verifica que importar no cree archivos ni cargue matplotlib, openpyxl o
+streamlit. Uso:
+
+    python benchmarks/importacion.py --repeticiones 7 --maximo-ms 1500
+
+Con ``--maximo-ms`` termina con código 1 si el motor supera ese tiempo, y
+``--historial`` agrega una línea JSON por corrida para seguir la evolución.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULOS = {
+    "motor": "import ilustraciones.simulacion",
+    "cli": "import ilustraciones.cli",
+    "exportar": "import ilustraciones.exportar",
+    "app (streamlit + matplotlib)": "import pandas, streamlit, matplotlib.pyplot",
+}
+PESADOS = ("matplotlib", "openpyxl", "streamlit")
+
+
+def medir(codigo: str):
+    inicio = time.perf_counter()
+    exec(codigo)
+    segundos = time.perf_counter() - inicio
+    print(json.dumps({
+        "ms": segundos * 1000,
+        "pesados": [m for m in PESADOS if m in sys.modules],
+        "archivos": sorted(os.listdir(".")),
+    }))
+
+
+def correr(codigo: str) -> dict:
+    with tempfile.TemporaryDirectory() as carpeta:
+        entorno = {**os.environ, "PYTHONPATH": RAIZ}
+        salida = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--medir", codigo],
+            cwd=carpeta, env=entorno, capture_output=True, text=True, check=True
+        )
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--maximo-ms", type=float, default=None, help="tope para la importación del motor")
+    parser.add_argument("--historial", default=None, help="archivo JSONL donde agregar el resultado")
+    parser.add_argument("--medir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.medir:
+        medir(args.medir)
+        return 0
+
+    resultados, problemas = {}, []
+    print(f"{'módulo':>30} {'mediana ms':>11} {'mín ms':>8}  pesados")
+    for nombre, codigo in MODULOS.items():
+        corridas = [correr(codigo) for _ in range(args.repeticiones)]
+        tiempos = [c["ms"] for c in corridas]
+        resultados[nombre] = statistics.median(tiempos)
+        pesados = corridas[-1]["pesados"]
+        print(f"{nombre:>30} {resultados[nombre]:>11.0f} {min(tiempos):>8.0f}  {', '.join(pesados) or '-'}")
+
+        if nombre != "app (streamlit + matplotlib)":
+            if pesados:
+                problemas.append(f"{nombre} carga {', '.join(pesados)} al importar")
+            if any(c["archivos"] for c in corridas):
+                problemas.append(f"{nombre} crea archivos al importar: {corridas[-1]['archivos']}")
+
+    if args.maximo_ms is not None and resultados["motor"] > args.maximo_ms:
+        problemas.append(f"motor: {resultados['motor']:.0f} ms > {args.maximo_ms:.0f} ms")
+
+    if args.historial:
+        with open(args.historial, "a", encoding="utf-8") as f:
+            f.write(json.dumps({
+                "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": sys.version.split()[0],
+                "ms": resultados,
+            }) + "\n")
+
+    for problema in problemas:
+        print(f"ERROR: {problema}", file=sys.stderr)
+    return 1 if problemas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
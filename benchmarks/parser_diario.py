@@ -0,0 +1,109 @@
+"""
+Compara la lectura de precios diarios completa en memoria (camino anterior
+de ``descargar_sp500_mensual``) con ``cierres_mensuales_en_flujo``.
+
+Cada medición corre en un proceso aparte para que el pico de memoria (RSS)
+de una no contamine a la otra. Uso:
+
+    python benchmarks/parser_diario.py --filas 60000 240000
+"""
+import argparse
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def generar_csv(ruta: str, filas: int, semilla: int = 0):
+    rng = np.random.default_rng(semilla)
+    fechas = pd.bdate_range(end="2026-03-31", periods=filas)
+    cierre = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.01, filas)))
+    pd.DataFrame({
+        "Date": fechas.strftime("%Y-%m-%d"),
+        "Open": np.round(cierre * 0.999, 2),
+        "High": np.round(cierre * 1.005, 2),
+        "Low": np.round(cierre * 0.995, 2),
+        "Close": np.round(cierre, 2),
+        "Volume": rng.integers(1_000_000, 5_000_000, filas),
+    }).to_csv(ruta, index=False)
+
+
+def cierres_en_memoria(ruta: str) -> pd.DataFrame:
+    # Camino anterior: todo el archivo como texto y un DataFrame diario completo.
+    with open(ruta, "rb") as f:
+        raw = f.read().decode("utf-8")
+
+    df = pd.read_csv(io.StringIO(raw))
+    df.columns = [c.strip().title() for c in df.columns]
+    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+    df["Price"] = pd.to_numeric(df["Close"], errors="coerce")
+    df = df.dropna(subset=["Date", "Price"]).sort_values("Date").reset_index(drop=True)
+
+    df["Month"] = df["Date"].dt.to_period("M")
+    df = df.groupby("Month", as_index=False).last()
+    df["Date"] = df["Month"].dt.to_timestamp("M")
+    return df[["Date", "Price"]].reset_index(drop=True)
+
+
+def cierres_en_flujo(ruta: str) -> pd.DataFrame:
+    sys.path.insert(0, RAIZ)
+    from ilustraciones.mercado import cierres_mensuales_en_flujo
+    return cierres_mensuales_en_flujo(ruta)
+
+
+def medir(modo: str, ruta: str):
+    funcion = {"memoria": cierres_en_memoria, "flujo": cierres_en_flujo}[modo]
+    if modo == "flujo":
+        # La importación no forma parte de la medición.
+        sys.path.insert(0, RAIZ)
+        import ilustraciones.mercado  # noqa: F401
+
+    base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    inicio = time.perf_counter()
+    resultado = funcion(ruta)
+    segundos = time.perf_counter() - inicio
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    print(json.dumps({
+        "segundos": segundos,
+        "rss_extra_mb": (pico - base) / 1024,
+        "meses": len(resultado),
+        "ultimo": float(resultado["Price"].iloc[-1]),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filas", type=int, nargs="+", default=[60_000, 240_000])
+    parser.add_argument("--medir", nargs=2, metavar=("MODO", "RUTA"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.medir:
+        medir(*args.medir)
+        return
+
+    print(f"{'filas':>10} {'modo':>8} {'segundos':>10} {'RSS extra (MB)':>15} {'meses':>7}")
+    with tempfile.TemporaryDirectory() as carpeta:
+        for filas in args.filas:
+            ruta = os.path.join(carpeta, f"diario_{filas}.csv")
+            generar_csv(ruta, filas)
+            for modo in ("memoria", "flujo"):
+                salida = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), "--medir", modo, ruta],
+                    cwd=RAIZ, capture_output=True, text=True, check=True
+                )
+                r = json.loads(salida.stdout.strip().splitlines()[-1])
+                print(f"{filas:>10} {modo:>8} {r['segundos']:>10.3f} {r['rss_extra_mb']:>15.1f} {r['meses']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Compara los PDF armados con matplotlib (figura + ``ax.table`` en una sola
+página que crece con las filas, camino anterior) con ``ilustraciones.reporte``
+(fpdf2, tabla paginada). Informa la mediana de segundos y el tamaño por PDF
+para una ilustración corta y una que empieza en el siglo XIX. Uso:
+
+    python benchmarks/reporte_pdf.py --repeticiones 5
+"""
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+os.chdir(RAIZ)
+
+from ilustraciones.cli import calcular_trabajo, preparar_trabajo  # noqa: E402
+from ilustraciones.exportar import crear_figura_principal, subtitulo_ilustracion  # noqa: E402
+from ilustraciones.reporte import generar_pdf_completo, generar_tabla_pdf  # noqa: E402
+from ilustraciones.resumen import preparar_tabla_exportar, preparar_tabla_mostrar  # noqa: E402
+from ilustraciones.simulacion import detectar_planes_csv  # noqa: E402
+
+CASOS = {
+    "corto (MSS 10 años, 2010)": {"plan": "MSS - 10 Años", "monto": 500, "frecuencia": "Mensual", "inicio": "2010-01"},
+    "largo (MIS, 1850)": {"plan": "MIS", "monto": 10000, "inicio": "1850-01"},
+}
+
+
+def _pyplot():
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def _tabla_matplotlib(ax, tabla_export, titulo: str):
+    # Camino anterior: la tabla completa en un único eje, alto proporcional a las filas.
+    ax.axis("off")
+    ax.set_title(titulo, fontsize=16, fontweight="bold", pad=20)
+    tabla = ax.table(cellText=tabla_export.values, colLabels=tabla_export.columns, loc="center", cellLoc="center")
+    tabla.auto_set_font_size(False)
+    tabla.set_fontsize(8.5)
+    tabla.scale(1.18, 1.62)
+    for (row, _), cell in tabla.get_celld().items():
+        cell.set_edgecolor("#d8dde6")
+        cell.set_linewidth(0.6)
+        if row == 0:
+            cell.set_facecolor("#40466e")
+            cell.set_text_props(color="white", weight="bold", fontsize=9)
+        else:
+            cell.set_facecolor("#f7f9fc" if row % 2 == 0 else "white")
+
+
+def tabla_matplotlib(tabla_export, titulo: str) -> bytes:
+    plt = _pyplot()
+    output = io.BytesIO()
+    fig, ax = plt.subplots(figsize=(17, max(4.5, 0.50 * len(tabla_export) + 2.4)))
+    _tabla_matplotlib(ax, tabla_export, titulo)
+    plt.tight_layout()
+    fig.savefig(output, format="pdf", bbox_inches="tight")
+    plt.close(fig)
+    return output.getvalue()
+
+
+def completo_matplotlib(df, resumen, tabla_export, seleccion, nombre, subtitulo, tipo_plan) -> bytes:
+    from matplotlib.backends.backend_pdf import PdfPages
+
+    plt = _pyplot()
+    output = io.BytesIO()
+    fig = crear_figura_principal(df, resumen, seleccion, nombre, subtitulo, tipo_plan)
+    with PdfPages(output) as pdf:
+        pdf.savefig(fig, bbox_inches="tight")
+        fig2, ax2 = plt.subplots(figsize=(17, max(5.5, 0.50 * len(tabla_export) + 2.8)))
+        _tabla_matplotlib(ax2, tabla_export, f"Resumen anual - {nombre}")
+        plt.tight_layout(rect=[0.02, 0.05, 0.98, 0.95])
+        pdf.savefig(fig2, bbox_inches="tight")
+        plt.close(fig2)
+    return output.getvalue()
+
+
+def medir(funcion, repeticiones: int):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        datos = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos), len(datos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    planes = detectar_planes_csv()
+    # Las importaciones de ambos caminos quedan fuera de la medición.
+    _pyplot()
+    from matplotlib.backends import backend_pdf  # noqa: F401
+    import fpdf  # noqa: F401
+
+    print(f"{'caso':>26} {'filas':>6} {'PDF':>9} {'camino':>11} {'segundos':>9} {'KB':>8}")
+    for caso, cliente in CASOS.items():
+        trabajo = preparar_trabajo({**cliente, "nombre": "Cliente"}, planes)
+        df, resumen = calcular_trabajo(trabajo)
+        tabla_export = preparar_tabla_exportar(preparar_tabla_mostrar(resumen))
+        subtitulo = subtitulo_ilustracion(
+            trabajo["tipo_plan"], trabajo["monto"], trabajo["frecuencia_pago"], trabajo["aportes_extra"], False
+        )
+        argumentos = (trabajo["seleccion"], trabajo["nombre"], subtitulo, trabajo["tipo_plan"])
+
+        variantes = {
+            ("tabla", "matplotlib"): lambda: tabla_matplotlib(tabla_export, "Resumen anual"),
+            ("tabla", "fpdf2"): lambda: generar_tabla_pdf(resumen, "Resumen anual"),
+            ("completo", "matplotlib"): lambda: completo_matplotlib(df, resumen, tabla_export, *argumentos),
+            ("completo", "fpdf2"): lambda: generar_pdf_completo(df, resumen, *argumentos),
+        }
+        for (pdf, camino), funcion in variantes.items():
+            segundos, tamanio = medir(funcion, args.repeticiones)
+            print(f"{caso:>26} {len(resumen):>6} {pdf:>9} {camino:>11} {segundos:>9.3f} {tamanio / 1024:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Prueba de resistencia de la app de Streamlit con su API de testing
+(``streamlit.testing.v1.AppTest``): genera miles de ilustraciones con
+planes, fechas y clientes distintos, abre una sesión nueva cada
+``--por-sesion`` ilustraciones y mide la memoria residente (RSS) del
+proceso. Termina con código 1 si, pasado el calentamiento, la RSS crece
+más que ``--max-crecimiento-mb``. Uso:
+
+    python benchmarks/soak_app.py --ilustraciones 2000 --max-crecimiento-mb 64
+
+El calentamiento llena las cachés acotadas (resultados, documentos,
+gráficos) y las importaciones perezosas; lo que crece después es una fuga.
+Antes de cada muestra se devuelve al sistema la memoria libre del
+asignador (``malloc_trim`` de glibc) y se comparan medianas de las primeras
+y las últimas ``--ventana`` muestras, para no confundir fragmentación con
+crecimiento.
+"""
+import argparse
+import ctypes
+import gc
+import json
+import os
+import random
+import resource
+import statistics
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(RAIZ)
+
+
+def rss_mb() -> float:
+    # RSS actual (no el pico): /proc en Linux, ru_maxrss como respaldo.
+    try:
+        with open("/proc/self/statm") as f:
+            paginas = int(f.read().split()[1])
+        return paginas * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def liberar_memoria():
+    gc.collect()
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+def nueva_sesion(timeout: float):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(RAIZ, "app.py"), default_timeout=timeout)
+    at.session_state["password_correct"] = True
+    return at.run()
+
+
+def ilustrar(at, rng: random.Random, i: int):
+    planes = [s for s in at.selectbox if s.label == "Tipo de Plan"][0]
+    planes.select(rng.choice(planes.options)).run()
+
+    anios = [s for s in at.selectbox if s.label == "Año Inicio"][0]
+    anios.select(rng.choice([a for a in anios.options if 1900 <= int(a) <= 2020]))
+    [t for t in at.text_input if t.label == "Nombre Cliente"][0].input(f"Cliente {i}")
+    at.session_state["grafico_interactivo"] = rng.random() < 0.3
+
+    [b for b in at.button if b.label == "Generar Ilustración"][0].click().run()
+    if at.exception or at.error:
+        raise RuntimeError(f"Ilustración {i} falló: {[e.value for e in at.exception or at.error]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ilustraciones", type=int, default=2000)
+    parser.add_argument("--por-sesion", type=int, default=50, help="ilustraciones antes de abrir una sesión nueva")
+    parser.add_argument("--calentamiento", type=int, default=200)
+    parser.add_argument("--muestra-cada", type=int, default=100)
+    parser.add_argument("--ventana", type=int, default=3, help="muestras promediadas (mediana) al inicio y al final")
+    parser.add_argument("--max-crecimiento-mb", type=float, default=64.0)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--historial", default=None, help="archivo JSONL donde agregar las muestras")
+    args = parser.parse_args()
+
+    rng = random.Random(args.semilla)
+    muestras = []
+    inicio = time.perf_counter()
+    at = None
+
+    print(f"{'ilustración':>12} {'RSS MB':>8} {'Δ MB':>7} {'seg':>7}")
+    for i in range(1, args.ilustraciones + 1):
+        if at is None or (i - 1) % args.por_sesion == 0:
+            at = None
+            liberar_memoria()
+            at = nueva_sesion(args.timeout)
+        ilustrar(at, rng, i)
+
+        if i == args.calentamiento or i % args.muestra_cada == 0 or i == args.ilustraciones:
+            liberar_memoria()
+            rss = rss_mb()
+            muestras.append({"ilustracion": i, "rss_mb": round(rss, 1)})
+            delta = rss - muestras[0]["rss_mb"]
+            print(f"{i:>12} {rss:>8.1f} {delta:>7.1f} {time.perf_counter() - inicio:>7.0f}", flush=True)
+
+    # Sólo cuentan las muestras tomadas con las cachés ya llenas.
+    estables = [m["rss_mb"] for m in muestras if m["ilustracion"] >= args.calentamiento]
+    ventana = max(1, min(args.ventana, len(estables) // 2))
+    base = statistics.median(estables[:ventana]) if len(estables) >= 2 else None
+    crecimiento = statistics.median(estables[-ventana:]) - base if base is not None else 0.0
+    if args.historial:
+        with open(args.historial, "a", encoding="utf-8") as f:
+            f.write(json.dumps({
+                "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "ilustraciones": args.ilustraciones,
+                "crecimiento_mb": round(crecimiento, 1),
+                "muestras": muestras,
+            }) + "\n")
+
+    if base is None:
+        print("Faltan muestras después del calentamiento para comparar.", file=sys.stderr)
+        return 1
+    if crecimiento > args.max_crecimiento_mb:
+        print(
+            f"ERROR: la RSS creció {crecimiento:.1f} MB después del calentamiento "
+            f"(máximo {args.max_crecimiento_mb:.0f} MB)", file=sys.stderr
+        )
+        return 1
+    print(f"RSS acotada: {crecimiento:+.1f} MB después del calentamiento.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
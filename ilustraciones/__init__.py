@@ -0,0 +1,7 @@
+"""
+Motor del generador de ilustraciones financieras, importable sin Streamlit.
+
+``app.py`` es la interfaz web; ``python -m ilustraciones.cli`` genera
+ilustraciones en lote y ``python -m ilustraciones.servidor`` las expone
+como API HTTP local.
+"""
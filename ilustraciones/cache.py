@@ -0,0 +1,341 @@
+"""Claves de ilustración y cachés de resultados en memoria y en disco."""
+import functools
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+from .config import (
+    ALMACEN_DIARIO_DIR,
+    ALMACEN_MERCADO_DIR,
+    CACHE_DISCO_DIR,
+    CACHE_DISCO_INTERVALO_RECORTE,
+    CACHE_DISCO_MAX_MB,
+    INDICES_DIR,
+)
+from .mercado import _escribir_atomico
+
+
+# --- CACHÉ DE RESULTADOS ---
+def clave_ilustracion(
+    tipo_plan: str,
+    plazo_anios,
+    monto: float,
+    frecuencia_pago,
+    anio_inicio: int,
+    mes_inicio: int,
+    aportes_extra: list,
+    retiros_programados: list,
+    version: str,
+    resolucion: str = "Mensual",
+    dia_inicio: int = None
+) -> str:
+    """
+    Hash canónico de los datos que determinan una ilustración. El orden de
+    los aportes extra se conserva porque define el orden de los buckets.
+    """
+    diaria = resolucion == "Diaria"
+
+    def movimientos(lista):
+        return [
+            [float(m["monto"]), int(m["anio"]), int(m["mes"]), int(m["dia"]) if diaria and m.get("dia") else None]
+            for m in lista
+        ]
+
+    datos = {
+        "tipo_plan": tipo_plan,
+        "plazo_anios": None if tipo_plan == "MIS" else int(plazo_anios),
+        "monto": float(monto),
+        "frecuencia_pago": None if tipo_plan == "MIS" else frecuencia_pago,
+        "inicio": [int(anio_inicio), int(mes_inicio), int(dia_inicio) if diaria else None],
+        "resolucion": resolucion,
+        "aportes_extra": movimientos(aportes_extra) if tipo_plan == "MIS" else [],
+        "retiros": movimientos(retiros_programados),
+        "mercado": version,
+    }
+    texto = json.dumps(datos, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+def tamano_resultado(valor) -> int:
+    """Bytes aproximados que ocupa un resultado (DataFrames, bytes o tuplas de ellos)."""
+    if isinstance(valor, pd.DataFrame):
+        return int(valor.memory_usage(index=True, deep=True).sum())
+    if isinstance(valor, (bytes, bytearray)):
+        return len(valor)
+    if isinstance(valor, dict):
+        return sum(tamano_resultado(v) for v in valor.values())
+    if isinstance(valor, (list, tuple)):
+        return sum(tamano_resultado(v) for v in valor)
+    return 64
+
+
+class CacheLRU:
+    """
+    Caché LRU acotada por número de entradas, bytes totales y antigüedad.
+    Es segura entre hilos: Streamlit atiende cada sesión en un hilo propio.
+    """
+
+    def __init__(self, max_entradas: int = 64, max_bytes: int = 64 * 1024 ** 2, ttl_segundos: float = 3600.0):
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self.ttl_segundos = ttl_segundos
+        self._entradas = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entradas)
+
+    @property
+    def bytes_usados(self) -> int:
+        return self._bytes
+
+    def obtener(self, clave):
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                return None
+            valor, tamano, creado = entrada
+            if time.monotonic() - creado > self.ttl_segundos:
+                self._quitar(clave)
+                return None
+            self._entradas.move_to_end(clave)
+            return valor
+
+    def guardar(self, clave, valor):
+        tamano = tamano_resultado(valor)
+        with self._lock:
+            if clave in self._entradas:
+                self._quitar(clave)
+            if tamano > self.max_bytes:
+                return valor
+            self._entradas[clave] = (valor, tamano, time.monotonic())
+            self._bytes += tamano
+            self._recortar()
+        return valor
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+            self._bytes = 0
+
+    def _quitar(self, clave):
+        _, tamano, _ = self._entradas.pop(clave)
+        self._bytes -= tamano
+
+    def _recortar(self):
+        ahora = time.monotonic()
+        vencidas = [c for c, (_, _, creado) in self._entradas.items() if ahora - creado > self.ttl_segundos]
+        for clave in vencidas:
+            self._quitar(clave)
+        while self._entradas and (len(self._entradas) > self.max_entradas or self._bytes > self.max_bytes):
+            self._quitar(next(iter(self._entradas)))
+
+
+class CacheDisco:
+    """
+    Almacén en disco direccionado por contenido, compartido entre procesos.
+    Cada entrada vive en ``<directorio>/<version>/<clave[:2]>/<clave><ext>``.
+    Las versiones conviven (mensual, diaria, carteras, procesos a mitad de
+    un refresco) y se desalojan por tamaño, de la menos usada a la más
+    usada, según la fecha de modificación. Una versión se borra entera sólo
+    cuando el almacén de mercado del que salió publicó otra en
+    ``vigente.json`` y eliminó su carpeta.
+
+    Recorrer la carpeta cuesta un ``stat`` por archivo, así que no se hace
+    en cada escritura: cada proceso suma lo que escribe a la última
+    medición y recorre todo cuando esa estimación pasa el límite o cada
+    ``intervalo_segundos`` (lo que escriben otros procesos entra ahí).
+    """
+
+    def __init__(
+        self,
+        directorio: str,
+        max_bytes: int = 512 * 1024 ** 2,
+        almacenes: tuple = (ALMACEN_MERCADO_DIR, ALMACEN_DIARIO_DIR, INDICES_DIR),
+        intervalo_segundos: float = CACHE_DISCO_INTERVALO_RECORTE
+    ):
+        self.directorio = directorio
+        self.max_bytes = max_bytes
+        self.almacenes = almacenes
+        self.intervalo_segundos = intervalo_segundos
+        self._bytes_estimados = None
+        self._proximo_recorte = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _carpeta_version(version: str) -> str:
+        return hashlib.sha256(version.encode("utf-8")).hexdigest()[:16]
+
+    def _ruta(self, version: str, clave: str, ext: str) -> str:
+        return os.path.join(self.directorio, self._carpeta_version(version), clave[:2], clave + ext)
+
+    def _origen(self, version: str):
+        # Las versiones de los almacenes son el nombre de su carpeta; las
+        # derivadas (diaria con AMC, carteras) le agregan sufijos con "-".
+        base = version.split("-")[0]
+        for almacen in self.almacenes:
+            carpeta = os.path.join(almacen, base)
+            if os.path.isdir(carpeta):
+                return os.path.abspath(carpeta)
+        return None
+
+    def _registrar_version(self, version: str):
+        ruta = os.path.join(self.directorio, self._carpeta_version(version), "version.json")
+        if not os.path.exists(ruta):
+            datos = {"version": version, "almacen": self._origen(version)}
+            _escribir_atomico(ruta, json.dumps(datos).encode("utf-8"))
+
+    def _podar_versiones(self):
+        """Borra las versiones cuyo almacén de origen ya publicó otra."""
+        if not os.path.isdir(self.directorio):
+            return
+        for nombre in os.listdir(self.directorio):
+            carpeta = os.path.join(self.directorio, nombre)
+            try:
+                with open(os.path.join(carpeta, "version.json"), encoding="utf-8") as f:
+                    almacen = json.load(f).get("almacen")
+            except (OSError, ValueError):
+                continue
+            if almacen is not None and not os.path.isdir(almacen):
+                shutil.rmtree(carpeta, ignore_errors=True)
+
+    def obtener_bytes(self, version: str, clave: str, ext: str):
+        ruta = self._ruta(version, clave, ext)
+        try:
+            with open(ruta, "rb") as f:
+                datos = f.read()
+            os.utime(ruta)
+        except FileNotFoundError:
+            return None
+        return datos
+
+    def guardar_bytes(self, version: str, clave: str, ext: str, datos: bytes):
+        ruta = self._ruta(version, clave, ext)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        self._registrar_version(version)
+        # Escritura atómica: otro proceso nunca ve un archivo a medio escribir.
+        _escribir_atomico(ruta, datos)
+
+        with self._lock:
+            if self._bytes_estimados is not None:
+                self._bytes_estimados += len(datos)
+            ahora = time.monotonic()
+            recorrer = (
+                self._bytes_estimados is None
+                or self._bytes_estimados > self.max_bytes
+                or ahora >= self._proximo_recorte
+            )
+            if recorrer:
+                self._proximo_recorte = ahora + self.intervalo_segundos
+        if recorrer:
+            self._podar_versiones()
+            total = self._recortar()
+            with self._lock:
+                self._bytes_estimados = total
+
+    def obtener(self, version: str, clave: str):
+        datos = self.obtener_bytes(version, clave, ".pkl")
+        if datos is None:
+            return None
+        try:
+            return pickle.loads(datos)
+        except Exception:
+            return None
+
+    def guardar(self, version: str, clave: str, valor):
+        self.guardar_bytes(version, clave, ".pkl", pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def _recortar(self) -> int:
+        """
+        Si se pasó de ``max_bytes``, borra los archivos menos usados hasta
+        quedar en el 90%, así las escrituras siguientes no vuelven a
+        recorrer la carpeta enseguida. Devuelve los bytes que quedan.
+        """
+        archivos = []
+        total = 0
+        for raiz, _, nombres in os.walk(self.directorio):
+            for nombre in nombres:
+                if nombre.endswith(".tmp") or nombre == "version.json":
+                    continue
+                ruta = os.path.join(raiz, nombre)
+                try:
+                    info = os.stat(ruta)
+                except FileNotFoundError:
+                    continue
+                archivos.append((info.st_mtime_ns, info.st_size, ruta))
+                total += info.st_size
+
+        if total <= self.max_bytes:
+            return total
+        objetivo = int(self.max_bytes * 0.9)
+        for _, tamano, ruta in sorted(archivos):
+            try:
+                os.remove(ruta)
+            except FileNotFoundError:
+                pass
+            total -= tamano
+            if total <= objetivo:
+                break
+        return total
+
+
+@functools.lru_cache(maxsize=None)
+def _cache_disco(directorio: str, max_bytes: int) -> CacheDisco:
+    return CacheDisco(directorio, max_bytes=max_bytes)
+
+
+def cache_disco_desde_entorno():
+    """
+    ``CacheDisco`` si ``ILUSTRACIONES_CACHE_DISCO=1``; si no, ``None``. Es
+    la misma instancia en todo el proceso, así su estimación de tamaño dura
+    entre llamadas.
+    """
+    if os.environ.get("ILUSTRACIONES_CACHE_DISCO", "").lower() not in ("1", "true", "si", "sí"):
+        return None
+    max_mb = float(os.environ.get("ILUSTRACIONES_CACHE_DISCO_MB", CACHE_DISCO_MAX_MB))
+    return _cache_disco(CACHE_DISCO_DIR, int(max_mb * 1024 ** 2))
+
+
+def clave_documento(clave: str, *partes) -> str:
+    """Clave de un archivo exportado a partir de la ilustración y sus textos."""
+    texto = json.dumps([clave, *partes], separators=(",", ":"))
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+def documento_diferido(generar, clave_doc: str, ext: str, memoria: CacheLRU = None, disco: CacheDisco = None, version: str = None):
+    """
+    Callable que arma un documento (bytes) una sola vez: busca en
+    ``memoria``, luego en ``disco`` y recién entonces llama a ``generar``.
+    Sólo retiene sus argumentos, así quien lo guarda (una descarga diferida,
+    un fragmento) no mantiene vivo el resto de la ejecución de la app.
+    """
+    def producir() -> bytes:
+        datos = memoria.obtener(clave_doc) if memoria is not None else None
+        if datos is None:
+            if disco is None:
+                datos = generar()
+            else:
+                # Con el disco lleno o de sólo lectura el documento se arma igual.
+                try:
+                    datos = disco.obtener_bytes(version, clave_doc, ext)
+                except OSError:
+                    datos = None
+                if datos is None:
+                    datos = generar()
+                    try:
+                        disco.guardar_bytes(version, clave_doc, ext, datos)
+                    except OSError:
+                        pass
+            if memoria is not None:
+                memoria.guardar(clave_doc, datos)
+        return datos
+
+    return producir
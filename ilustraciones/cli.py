@@ -0,0 +1,314 @@
+"""
+Generación de ilustraciones en lote, sin interfaz. Lee una lista de
+clientes en CSV o JSON y escribe una carpeta por cliente con el resumen
+anual (CSV y Excel), la tabla en PDF y la ilustración completa en PDF.
+
+    python -m ilustraciones.cli clientes.csv --salida lote --procesos 4
+
+Columnas (o claves JSON): ``nombre``, ``plan`` (p. ej. ``MSS - 10 Años``
+o ``MIS``), ``monto``, ``frecuencia`` (MSS), ``inicio`` (``AAAA-MM`` o
+``AAAA-MM-DD``), ``resolucion`` (opcional) y ``aportes_extra`` / ``retiros``
+(MIS y retiros). En CSV los movimientos se escriben como
+``5000@2012-03; 3000@2014-06-15``; en JSON también como listas de
+``{"monto", "anio", "mes", "dia"}``.
+
+Índices adicionales para armar carteras en la app (el nombre es la
+columna; la fuente, un símbolo de Stooq o un CSV local de precios con
+``Date`` y ``Close`` o ``Price``):
+
+    python -m ilustraciones.cli indice agregar NASDAQ --stooq ^NDQ
+    python -m ilustraciones.cli indice agregar BONOS bonos.csv
+    python -m ilustraciones.cli indice listar
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from .cache import cache_disco_desde_entorno
+from .config import ALMACEN_DIARIO_DIR, ALMACEN_MERCADO_DIR, INDICES_DIR
+from .exportar import generar_tabla_excel, subtitulo_ilustracion
+from .mercado import agregar_indice, cargar_indices, cargar_serie_diaria, cargar_serie_mercado, leer_metadatos_almacen
+from .reporte import generar_pdf_completo, generar_tabla_pdf
+from .resumen import preparar_tabla_exportar, preparar_tabla_mostrar
+from .simulacion import calcular_ilustracion, detectar_planes_csv
+
+# Series abiertas por proceso de trabajo (memmaps del almacén), por versión.
+_SERIES = {}
+
+
+def leer_clientes(ruta: str) -> list:
+    if ruta.lower().endswith(".json"):
+        with open(ruta, encoding="utf-8") as f:
+            clientes = json.load(f)
+    else:
+        df = pd.read_csv(ruta, dtype=str, keep_default_na=False)
+        df.columns = [c.strip().lower() for c in df.columns]
+        clientes = df.to_dict("records")
+    return [{k: v for k, v in c.items() if v not in ("", None)} for c in clientes]
+
+
+def _fecha(texto: str):
+    partes = [int(p) for p in str(texto).strip().split("-")]
+    if len(partes) not in (2, 3):
+        raise ValueError(f"Fecha inválida: {texto!r} (se espera AAAA-MM o AAAA-MM-DD)")
+    return partes + [None] * (3 - len(partes))
+
+
+def _movimientos(valor) -> list:
+    if not valor:
+        return []
+    if isinstance(valor, list):
+        return [{k: m[k] for k in ("monto", "anio", "mes", "dia") if m.get(k) is not None} for m in valor]
+
+    movimientos = []
+    for parte in str(valor).split(";"):
+        if not parte.strip():
+            continue
+        monto, fecha = parte.split("@")
+        anio, mes, dia = _fecha(fecha)
+        movimiento = {"monto": float(monto), "anio": anio, "mes": mes}
+        if dia is not None:
+            movimiento["dia"] = dia
+        movimientos.append(movimiento)
+    return movimientos
+
+
+def _resolver_plan(texto: str, planes: dict):
+    if texto in planes:
+        return texto
+    if texto.strip().upper().startswith("MIS"):
+        nombre = "MIS - Aporte Único"
+    else:
+        plazo = re.search(r"\d+", texto)
+        nombre = f"MSS - {int(plazo.group())} Años" if plazo else texto
+    if nombre not in planes:
+        raise ValueError(f"Plan no disponible: {texto!r}")
+    return nombre
+
+
+def preparar_trabajo(cliente: dict, planes: dict) -> dict:
+    """Valida un cliente y lo traduce a los argumentos de ``calcular_ilustracion``."""
+    seleccion = _resolver_plan(str(cliente["plan"]), planes)
+    _, plazo_anios, tipo_plan = planes[seleccion]
+    anio, mes, dia = _fecha(cliente["inicio"])
+    resolucion = str(cliente.get("resolucion", "Mensual")).capitalize()
+    if resolucion not in ("Mensual", "Diaria"):
+        raise ValueError(f"Resolución inválida: {resolucion!r}")
+
+    return {
+        "nombre": str(cliente.get("nombre", "Cliente")),
+        "seleccion": seleccion,
+        "tipo_plan": tipo_plan,
+        "plazo_anios": plazo_anios,
+        "monto": float(cliente["monto"]),
+        "frecuencia_pago": None if tipo_plan == "MIS" else str(cliente.get("frecuencia", "Mensual")).capitalize(),
+        "anio_inicio": anio,
+        "mes_inicio": mes,
+        "dia_inicio": dia or 1,
+        "aportes_extra": _movimientos(cliente.get("aportes_extra")) if tipo_plan == "MIS" else [],
+        "retiros_programados": _movimientos(cliente.get("retiros")),
+        "resolucion": resolucion,
+    }
+
+
+def _nombre_seguro(nombre: str) -> str:
+    # Sólo letras, dígitos, "." y "-": sin separadores de ruta.
+    return re.sub(r"[^\w.-]+", "_", nombre, flags=re.UNICODE).strip("_") or "cliente"
+
+
+def _nombre_carpeta(indice: int, nombre: str) -> str:
+    return f"{indice:04d}_{_nombre_seguro(nombre)}"
+
+
+def iniciar_trabajador(cwd: str):
+    # Los almacenes usan rutas relativas al directorio de la app.
+    os.chdir(cwd)
+
+
+def _serie(diaria: bool) -> pd.DataFrame:
+    clave = "diaria" if diaria else "mensual"
+    # Leer el puntero es barato: si un refresco publicó otra versión, los
+    # procesos de larga vida (el servidor) la abren en el pedido siguiente.
+    metadatos = leer_metadatos_almacen(ALMACEN_DIARIO_DIR if diaria else ALMACEN_MERCADO_DIR)
+    serie = _SERIES.get(clave)
+    if serie is None or (metadatos is not None and serie.attrs.get("version_mercado") != metadatos["version"]):
+        serie = cargar_serie_diaria() if diaria else cargar_serie_mercado()[0]
+        if serie is None:
+            raise ValueError("No hay serie diaria descargada; actualícela desde la app.")
+        _SERIES[clave] = serie
+    return serie
+
+
+def calcular_trabajo(trabajo: dict, cache=None):
+    """``calcular_ilustracion`` para un trabajo de ``preparar_trabajo``, con la serie del proceso."""
+    return calcular_ilustracion(
+        _serie(trabajo["resolucion"] == "Diaria"),
+        tipo_plan=trabajo["tipo_plan"],
+        plazo_anios=trabajo["plazo_anios"],
+        monto=trabajo["monto"],
+        frecuencia_pago=trabajo["frecuencia_pago"],
+        anio_inicio=trabajo["anio_inicio"],
+        mes_inicio=trabajo["mes_inicio"],
+        aportes_extra=trabajo["aportes_extra"],
+        retiros_programados=trabajo["retiros_programados"],
+        resolucion=trabajo["resolucion"],
+        dia_inicio=trabajo["dia_inicio"],
+        cache=cache,
+        disco=cache_disco_desde_entorno()
+    )
+
+
+def generar_cliente(trabajo: dict, carpeta: str) -> dict:
+    """Calcula y exporta la ilustración de un cliente. Devuelve una fila del reporte del lote."""
+    inicio = time.perf_counter()
+    diaria = trabajo["resolucion"] == "Diaria"
+    df_resultado, resumen = calcular_trabajo(trabajo)
+
+    os.makedirs(carpeta, exist_ok=True)
+    nombre = trabajo["nombre"]
+    # El nombre tal cual va en los títulos; en los archivos, saneado como la carpeta.
+    archivo = _nombre_seguro(nombre)
+    mostrar = preparar_tabla_mostrar(resumen)
+    tabla_export = preparar_tabla_exportar(mostrar)
+    subtitulo = subtitulo_ilustracion(
+        trabajo["tipo_plan"], trabajo["monto"], trabajo["frecuencia_pago"], trabajo["aportes_extra"], diaria
+    )
+
+    resumen.to_csv(os.path.join(carpeta, "resumen_anual.csv"), index=False)
+    excel = generar_tabla_excel(tabla_export)
+    if excel:
+        with open(os.path.join(carpeta, f"Tabla_Resumen_{archivo}.xlsx"), "wb") as f:
+            f.write(excel)
+    with open(os.path.join(carpeta, f"Tabla_Resumen_{archivo}.pdf"), "wb") as f:
+        f.write(generar_tabla_pdf(resumen, titulo=f"Resumen anual - {nombre}"))
+    with open(os.path.join(carpeta, f"Ilustracion_{archivo}.pdf"), "wb") as f:
+        f.write(generar_pdf_completo(df_resultado, resumen, trabajo["seleccion"], nombre, subtitulo, trabajo["tipo_plan"]))
+
+    return {
+        "nombre": nombre,
+        "estado": "ok",
+        "valor_final": float(resumen["Valor_Cuenta"].iloc[-1]),
+        "segundos": round(time.perf_counter() - inicio, 3),
+        "error": "",
+    }
+
+
+def _generar_seguro(trabajo: dict, carpeta: str) -> dict:
+    try:
+        return generar_cliente(trabajo, carpeta)
+    except Exception as e:
+        return {"nombre": trabajo["nombre"], "estado": "error", "valor_final": None, "segundos": None,
+                "error": f"{type(e).__name__}: {e}"}
+
+
+def generar_lote(clientes: list, salida: str, procesos: int = None, progreso=None) -> pd.DataFrame:
+    """
+    Genera las ilustraciones de ``clientes`` en un pool de procesos, una
+    carpeta por cliente bajo ``salida``. La serie de mercado se importa una
+    vez en el proceso principal; cada trabajador sólo abre el almacén.
+    Devuelve el reporte del lote (también escrito en ``salida/lote.csv``).
+    """
+    planes = detectar_planes_csv()
+    cargar_serie_mercado()
+    os.makedirs(salida, exist_ok=True)
+
+    filas, trabajos = [None] * len(clientes), {}
+    for i, cliente in enumerate(clientes):
+        carpeta = os.path.join(salida, _nombre_carpeta(i + 1, str(cliente.get("nombre", "cliente"))))
+        try:
+            trabajos[i] = (preparar_trabajo(cliente, planes), carpeta)
+        except (KeyError, ValueError) as e:
+            filas[i] = {"nombre": cliente.get("nombre", ""), "estado": "error", "valor_final": None,
+                        "segundos": None, "error": f"{type(e).__name__}: {e}"}
+        if filas[i] is not None:
+            filas[i]["carpeta"] = carpeta
+
+    hechos = 0
+    for fila in filas:
+        if fila is not None:
+            hechos += 1
+            if progreso is not None:
+                progreso(hechos, len(clientes), fila)
+
+    with ProcessPoolExecutor(max_workers=procesos, initializer=iniciar_trabajador, initargs=(os.getcwd(),)) as pool:
+        futuros = {pool.submit(_generar_seguro, *args): i for i, args in trabajos.items()}
+        for futuro in as_completed(futuros):
+            i = futuros[futuro]
+            filas[i] = {**futuro.result(), "carpeta": trabajos[i][1]}
+            hechos += 1
+            if progreso is not None:
+                progreso(hechos, len(clientes), filas[i])
+
+    reporte = pd.DataFrame(filas, columns=["nombre", "estado", "valor_final", "segundos", "error", "carpeta"])
+    reporte.to_csv(os.path.join(salida, "lote.csv"), index=False)
+    return reporte
+
+
+def _mostrar_progreso(hechos: int, total: int, fila: dict):
+    detalle = f"{fila['segundos']:.1f}s" if fila["estado"] == "ok" else fila["error"]
+    print(f"[{hechos}/{total}] {fila['nombre']}: {fila['estado']} ({detalle})", file=sys.stderr, flush=True)
+
+
+def main_indice(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m ilustraciones.cli indice", description="Índices para carteras.")
+    acciones = parser.add_subparsers(dest="accion", required=True)
+    agregar = acciones.add_parser("agregar", help="agrega o reemplaza un índice")
+    agregar.add_argument("nombre", help="nombre de la columna (p. ej. NASDAQ)")
+    origen = agregar.add_mutually_exclusive_group(required=True)
+    origen.add_argument("archivo", nargs="?", help="CSV local de precios (Date y Close o Price)")
+    origen.add_argument("--stooq", metavar="SIMBOLO", help="símbolo de Stooq (p. ej. ^NDQ)")
+    acciones.add_parser("listar", help="muestra los índices publicados")
+    args = parser.parse_args(argv)
+
+    # El almacén de índices se crea (con el SP500) a partir de la serie mensual.
+    cargar_indices(cargar_serie_mercado()[0])
+    if args.accion == "agregar":
+        # La ruta queda absoluta en los metadatos: el refresco puede correr desde otra carpeta.
+        config = {"tipo": "stooq", "simbolo": args.stooq} if args.stooq else {
+            "tipo": "archivo", "ruta": os.path.abspath(args.archivo)
+        }
+        try:
+            agregar_indice(args.nombre, config)
+        except (OSError, ValueError) as e:
+            print(f"No se pudo agregar {args.nombre}: {type(e).__name__}: {e}", file=sys.stderr)
+            return 1
+
+    metadatos = leer_metadatos_almacen(INDICES_DIR)
+    for nombre in metadatos["indices"]:
+        fuente = metadatos["fuentes"][nombre]
+        detalle = fuente.get("simbolo") or fuente.get("ruta") or fuente["tipo"]
+        print(f"{nombre}: {detalle}")
+    print(f"{metadatos['filas']} meses, {metadatos['desde']} a {metadatos['hasta']}", file=sys.stderr)
+    return 0
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["indice"]:
+        return main_indice(argv[1:])
+
+    parser = argparse.ArgumentParser(prog="python -m ilustraciones.cli", description="Genera ilustraciones en lote.")
+    parser.add_argument("clientes", help="CSV o JSON con un cliente por fila/elemento")
+    parser.add_argument("--salida", default="ilustraciones_lote", help="carpeta de salida (una subcarpeta por cliente)")
+    parser.add_argument("--procesos", type=int, default=None, help="procesos de trabajo (por defecto, uno por CPU)")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    reporte = generar_lote(leer_clientes(args.clientes), args.salida, args.procesos, _mostrar_progreso)
+    errores = int((reporte["estado"] != "ok").sum())
+    print(
+        f"{len(reporte) - errores} ilustraciones generadas, {errores} con error, "
+        f"en {time.perf_counter() - inicio:.1f}s. Reporte: {os.path.join(args.salida, 'lote.csv')}",
+        file=sys.stderr
+    )
+    return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
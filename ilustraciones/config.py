@@ -0,0 +1,66 @@
+"""Constantes compartidas por la app, el motor y la línea de comandos."""
+import os
+
+# --- CONSTANTES ---
+FACTORES_COSTOS = {
+    5: (0.2475, 0.0619), 6: (0.2970, 0.0743), 7: (0.3465, 0.0866), 8: (0.3960, 0.0990),
+    9: (0.4455, 0.1114), 10: (0.4950, 0.1238), 11: (0.5445, 0.1361), 12: (0.5940, 0.1485),
+    13: (0.6435, 0.1609), 14: (0.6930, 0.1733), 15: (0.7425, 0.1856), 16: (0.7920, 0.1980),
+    17: (0.8415, 0.2104), 18: (0.8910, 0.2228), 19: (0.9405, 0.2351), 20: (0.9900, 0.2475)
+}
+
+LISTA_MESES = [
+    "ene", "feb", "mar", "abr", "may", "jun",
+    "jul", "ago", "sept", "oct", "nov", "dic"
+]
+
+CACHE_DIR = "data_cache"
+ALMACEN_MERCADO_DIR = os.path.join(CACHE_DIR, "sp500_mensual")
+COLUMNAS_ALMACEN = ("Price", "Retorno_Bruto", "Retorno_Neto", "Indice_Neto")
+ALMACEN_DIARIO_DIR = os.path.join(CACHE_DIR, "sp500_diario")
+INDICES_DIR = os.path.join(CACHE_DIR, "indices")
+CSV_FILAS_POR_BLOQUE = 16384
+# Celdas (cubetas x días) por bloque del motor MIS diario: ~8 MB por matriz.
+DIARIO_CELDAS_POR_BLOQUE = 2 ** 20
+REFRESCO_REINTENTOS = 3
+REFRESCO_ESPERA_INICIAL = 2.0
+# Validación al importar: un retorno por encima de este valor absoluto se
+# reporta como atípico; un cierre que se multiplica o divide por más que el
+# factor máximo se trata como error de datos y bloquea la publicación.
+VALIDACION_RETORNO_ATIPICO = 0.25
+VALIDACION_FACTOR_MAXIMO = 3.0
+VALIDACION_MAX_DETALLE = 20
+
+STOOQ_URL = "https://stooq.com/q/d/l/?s={simbolo}&i=d"
+STOOQ_DAILY_URL = STOOQ_URL.format(simbolo="%5Espx")
+AMC_ANUAL = 0.02
+
+MAPA_PASOS_PAGO = {"Mensual": 1, "Trimestral": 3, "Semestral": 6, "Anual": 12}
+MAPA_REBALANCEO = {"Mensual": 1, "Trimestral": 3, "Semestral": 6, "Anual": 12, "Sin rebalanceo": 0}
+
+CACHE_RESULTADOS_MAX_ENTRADAS = 64
+CACHE_RESULTADOS_MAX_BYTES = 64 * 1024 ** 2
+CACHE_RESULTADOS_TTL = 3600
+
+CACHE_DOCUMENTOS_MAX_ENTRADAS = 48
+CACHE_DOCUMENTOS_MAX_BYTES = 64 * 1024 ** 2
+
+# Gráfico principal: puntos por serie tras reducir con LTTB y resolución del PNG.
+GRAFICO_MAX_PUNTOS = 1200
+GRAFICO_DPI = 150
+# Gráfico interactivo: puntos por serie enviados al navegador para el rango visible.
+GRAFICO_INTERACTIVO_PUNTOS = 800
+
+CACHE_DISCO_DIR = os.path.join(CACHE_DIR, "resultados")
+CACHE_DISCO_MAX_MB = 512
+# Cada cuánto un proceso vuelve a medir la caché en disco aunque su propia
+# estimación no haya llegado al límite.
+CACHE_DISCO_INTERVALO_RECORTE = 300.0
+
+SERVIDOR_HOST = "127.0.0.1"
+SERVIDOR_PUERTO = 8765
+# La cola cuenta simulaciones (cada cliente de un lote es una): con el
+# servicio libre debe entrar un lote completo.
+SERVIDOR_MAX_LOTE = 500
+SERVIDOR_COLA = SERVIDOR_MAX_LOTE
+SERVIDOR_TIMEOUT = 120
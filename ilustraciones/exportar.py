@@ -0,0 +1,308 @@
+"""Gráficos de la ilustración (matplotlib y Plotly) y exportación de la tabla a Excel."""
+import importlib.util
+import io
+
+import numpy as np
+import pandas as pd
+
+from .config import GRAFICO_DPI, GRAFICO_INTERACTIVO_PUNTOS, GRAFICO_MAX_PUNTOS
+from .rendimiento import calcular_rendimiento_resumen
+from .utilidades import fmt_usd
+
+# (columna, etiqueta) de las series del gráfico principal, en orden de dibujo.
+SERIES_PRINCIPALES = [
+    ("Aporte_Acum", "Capital invertido"),
+    ("Valor_Rescate", "Valor rescate"),
+    ("Valor_Cuenta", "Valor cuenta"),
+]
+
+# (columna, etiqueta, color, guiones) del gráfico interactivo.
+SERIES_INTERACTIVAS = [
+    ("Aporte_Acum", "Capital invertido", "#2ca02c", True),
+    ("Valor_Rescate", "Valor rescate", "#8c8c8c", True),
+    ("Valor_Cuenta", "Valor cuenta", "#0b5cad", False),
+]
+
+
+def subtitulo_ilustracion(
+    tipo_plan: str,
+    monto: float,
+    frecuencia_pago,
+    aportes_extra: list,
+    diaria: bool = False,
+    cartera: dict = None
+) -> str:
+    if tipo_plan == "MIS":
+        subtitulo = f"Estrategia ({1 + len(aportes_extra)} aportes)"
+    else:
+        subtitulo = f"Aporte {frecuencia_pago}: {fmt_usd(monto)}"
+    if diaria:
+        subtitulo += " · resolución diaria"
+    if cartera:
+        subtitulo += " · cartera " + " / ".join(f"{n} {w:.0%}" for n, w in cartera.items())
+    return subtitulo
+
+
+def texto_resumen_ilustracion(df: pd.DataFrame, resumen: pd.DataFrame, tipo_plan: str, separador: str = "   |   ") -> str:
+    """Línea de totales que encabeza la figura y el reporte PDF."""
+    inv_total = resumen["Aporte_Acum"].iloc[-1] if not resumen.empty else 0
+    ret_total = resumen["Retiro"].sum() if not resumen.empty else 0
+    val_final = resumen["Valor_Cuenta"].iloc[-1] if not resumen.empty else 0
+    val_rescate_final = resumen["Valor_Rescate"].iloc[-1] if not resumen.empty else 0
+
+    etiqueta_rend, valor_rend = calcular_rendimiento_resumen(df, resumen, tipo_plan)
+
+    partes = [
+        f"Inversión total: {fmt_usd(inv_total)}",
+        f"Valor en cuenta: {fmt_usd(val_final)}",
+        f"Valor de rescate: {fmt_usd(val_rescate_final)}",
+        f"{etiqueta_rend}: {valor_rend:.2f}%",
+    ]
+    if ret_total > 0:
+        partes.append(f"Retiros: {fmt_usd(ret_total)}")
+    return separador.join(partes)
+
+
+def indices_lttb(x: np.ndarray, y: np.ndarray, n: int) -> np.ndarray:
+    """
+    Índices de los ``n`` puntos que conserva Largest-Triangle-Three-Buckets:
+    el primero, el último y, en cada tramo intermedio, el que forma el
+    triángulo de mayor área con el elegido antes y el promedio del tramo
+    siguiente. Mantiene picos y caídas que un muestreo regular perdería.
+    """
+    largo = len(y)
+    if n >= largo or n < 3:
+        return np.arange(largo)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    # n - 2 tramos entre el primer y el último punto; el último punto hace
+    # de tramo siguiente del último tramo.
+    bordes = np.linspace(1, largo - 1, n - 1).astype(np.int64)
+    largos = np.diff(np.append(bordes, largo))
+    prom_x = np.add.reduceat(x, bordes) / largos
+    prom_y = np.add.reduceat(y, bordes) / largos
+
+    elegidos = np.empty(n, dtype=np.int64)
+    elegidos[0], elegidos[-1] = 0, largo - 1
+    a = 0
+    for i in range(n - 2):
+        ini, fin = bordes[i], bordes[i + 1]
+        xa, ya = x[a], y[a]
+        area = np.abs((xa - prom_x[i + 1]) * (y[ini:fin] - ya) - (xa - x[ini:fin]) * (prom_y[i + 1] - ya))
+        a = ini + int(area.argmax())
+        elegidos[i + 1] = a
+    return elegidos
+
+
+def series_grafico(
+    df: pd.DataFrame,
+    max_puntos: int = GRAFICO_MAX_PUNTOS,
+    columnas: list = None,
+    desde=None,
+    hasta=None,
+    fecha: str = "Date"
+) -> dict:
+    """
+    Fechas y valores de cada serie reducidos con LTTB. Con ``desde`` y
+    ``hasta`` sólo se reduce ese tramo (más un punto a cada lado, para que
+    las líneas lleguen a los bordes). La pantalla y el PDF dibujan los
+    mismos puntos.
+    """
+    fechas = df[fecha].to_numpy(dtype="datetime64[D]")
+    ini, fin = 0, len(fechas)
+    if desde is not None:
+        ini = max(0, int(np.searchsorted(fechas, np.datetime64(desde, "D"))) - 1)
+    if hasta is not None:
+        fin = min(fin, int(np.searchsorted(fechas, np.datetime64(hasta, "D"), side="right")) + 1)
+    fechas = fechas[ini:fin]
+    dias = fechas.astype(np.int64)
+
+    series = {}
+    for columna in columnas or [c for c, _ in SERIES_PRINCIPALES]:
+        valores = df[columna].to_numpy(dtype=float)[ini:fin]
+        idx = indices_lttb(dias, valores, max_puntos)
+        series[columna] = (fechas[idx], valores[idx])
+    return series
+
+
+def plotly_disponible() -> bool:
+    return importlib.util.find_spec("plotly") is not None
+
+
+def crear_grafico_interactivo(
+    df: pd.DataFrame,
+    desde=None,
+    hasta=None,
+    series: list = None,
+    fecha: str = "Date",
+    unidad: str = "USD",
+    max_puntos: int = GRAFICO_INTERACTIVO_PUNTOS
+):
+    """
+    Figura de Plotly con a lo sumo ``max_puntos`` por serie dentro del rango
+    visible: acercar el rango vuelve a reducir sólo ese tramo en el servidor,
+    así el navegador nunca recibe la serie completa. ``unidad`` es ``"USD"``
+    o ``"%"``.
+    """
+    import plotly.graph_objects as go
+
+    series = series or SERIES_INTERACTIVAS
+    puntos = series_grafico(df, max_puntos, [s[0] for s in series], desde, hasta, fecha)
+    formato = "USD %{y:,.2f}" if unidad == "USD" else "%{y:.2f}%"
+
+    fig = go.Figure()
+    for columna, etiqueta, color, guiones in series:
+        fechas, valores = puntos[columna]
+        fig.add_trace(go.Scatter(
+            x=np.datetime_as_string(fechas, unit="D"), y=valores, name=etiqueta, mode="lines",
+            line=dict(color=color, width=1.8 if guiones else 2.4, dash="dash" if guiones else "solid"),
+            hovertemplate=formato + "<extra>" + etiqueta + "</extra>"
+        ))
+
+    fig.update_layout(
+        template="plotly_white",
+        hovermode="x unified",
+        height=480,
+        margin=dict(l=10, r=10, t=30, b=10),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, x=0)
+    )
+    if unidad == "USD":
+        fig.update_yaxes(tickprefix="USD ", tickformat=",.0f")
+    else:
+        fig.update_yaxes(ticksuffix="%", tickformat=".1f")
+    if desde is not None and hasta is not None:
+        fig.update_xaxes(range=[str(desde), str(hasta)])
+    return fig
+
+
+def crear_figura_principal(
+    df: pd.DataFrame,
+    resumen: pd.DataFrame,
+    seleccion: str,
+    nombre_cliente: str,
+    subtitulo: str,
+    tipo_plan: str,
+    max_puntos: int = GRAFICO_MAX_PUNTOS
+):
+    """
+    Figura de matplotlib creada sin pyplot: no queda registrada en el
+    estado global y se libera con su última referencia, sin ``plt.close``.
+    """
+    from matplotlib import ticker
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(15, 8.8), facecolor="white")
+    ax = fig.add_subplot(111)
+
+    fig.text(
+        0.5, 0.965,
+        f"{seleccion}",
+        ha="center", va="top",
+        fontsize=22, fontweight="bold", color="#1f1f1f"
+    )
+
+    fig.text(
+        0.5, 0.928,
+        f"Cliente: {nombre_cliente}",
+        ha="center", va="top",
+        fontsize=16, fontweight="bold", color="#2f2f2f"
+    )
+
+    fig.text(
+        0.5, 0.895,
+        "Serie histórica neta basada en el S&P 500, con costos anuales prorrateados mensualmente.",
+        ha="center", va="top",
+        fontsize=10.5, color="#666666"
+    )
+
+    fig.text(
+        0.5, 0.870,
+        subtitulo,
+        ha="center", va="top",
+        fontsize=12, color="#4a4a4a"
+    )
+
+    fig.text(
+        0.5, 0.830,
+        texto_resumen_ilustracion(df, resumen, tipo_plan),
+        ha="center", va="top",
+        fontsize=11, fontweight="bold", color="#1f1f1f",
+        bbox=dict(
+            facecolor="#f7f9fc",
+            edgecolor="#c7d2e3",
+            boxstyle="round,pad=0.45"
+        )
+    )
+
+    ax.set_facecolor("white")
+
+    series = series_grafico(df, max_puntos)
+    estilos = {
+        "Aporte_Acum": dict(color="#2ca02c", linestyle="--", linewidth=2.2),
+        "Valor_Rescate": dict(color="#8c8c8c", linestyle="--", linewidth=2.0),
+        "Valor_Cuenta": dict(color="#0b5cad", linewidth=2.8),
+    }
+    for columna, etiqueta in SERIES_PRINCIPALES:
+        fechas, valores = series[columna]
+        ax.plot(fechas, valores, label=etiqueta, **estilos[columna])
+
+    ax.legend(
+        loc="upper left",
+        frameon=True,
+        facecolor="white",
+        edgecolor="#d9d9d9",
+        fontsize=11
+    )
+
+    ax.grid(True, alpha=0.18, linewidth=0.8)
+    ax.yaxis.set_major_formatter(ticker.StrMethodFormatter('USD {x:,.0f}'))
+
+    ax.spines["top"].set_visible(False)
+    ax.spines["right"].set_visible(False)
+    ax.spines["left"].set_color("#c8c8c8")
+    ax.spines["bottom"].set_color("#c8c8c8")
+
+    ax.tick_params(axis="x", labelsize=10, colors="#444444")
+    ax.tick_params(axis="y", labelsize=10, colors="#444444")
+
+    ax.set_xlabel("")
+    ax.set_ylabel("")
+
+    fig.tight_layout(rect=[0.04, 0.06, 0.98, 0.70])
+
+    return fig
+
+
+def figura_principal_png(
+    df: pd.DataFrame,
+    resumen: pd.DataFrame,
+    seleccion: str,
+    nombre_cliente: str,
+    subtitulo: str,
+    tipo_plan: str,
+    dpi: int = GRAFICO_DPI
+) -> bytes:
+    """Renderiza la figura principal una vez a PNG; la figura no sobrevive a la llamada."""
+    fig = crear_figura_principal(df, resumen, seleccion, nombre_cliente, subtitulo, tipo_plan)
+    output = io.BytesIO()
+    try:
+        fig.savefig(output, format="png", dpi=dpi, bbox_inches="tight", facecolor="white")
+    finally:
+        fig.clear()
+    return output.getvalue()
+
+
+def excel_disponible() -> bool:
+    return importlib.util.find_spec("openpyxl") is not None
+
+
+def generar_tabla_excel(tabla_df: pd.DataFrame):
+    if not excel_disponible():
+        return None
+
+    output = io.BytesIO()
+    with pd.ExcelWriter(output, engine="openpyxl") as writer:
+        tabla_df.to_excel(writer, index=False, sheet_name="Resumen")
+    output.seek(0)
+    return output.getvalue()
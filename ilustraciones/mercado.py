@@ -0,0 +1,900 @@
+"""
+Series de mercado: lectura y validación de cierres, almacenes columnares
+en disco, actualización incremental y carteras de varios índices.
+"""
+import functools
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from .config import (
+    ALMACEN_DIARIO_DIR,
+    ALMACEN_MERCADO_DIR,
+    AMC_ANUAL,
+    CACHE_DIR,
+    COLUMNAS_ALMACEN,
+    CSV_FILAS_POR_BLOQUE,
+    INDICES_DIR,
+    REFRESCO_ESPERA_INICIAL,
+    REFRESCO_REINTENTOS,
+    STOOQ_DAILY_URL,
+    STOOQ_URL,
+    VALIDACION_FACTOR_MAXIMO,
+    VALIDACION_MAX_DETALLE,
+    VALIDACION_RETORNO_ATIPICO,
+)
+
+
+def _ultimo_por_periodo(fechas: np.ndarray, precios: np.ndarray, unidad: str = "M"):
+    periodos = fechas.astype(f"datetime64[{unidad}]")
+    orden = np.lexsort((fechas, periodos))
+    fechas, precios, periodos = fechas[orden], precios[orden], periodos[orden]
+    ultimo = np.r_[periodos[1:] != periodos[:-1], True] if len(periodos) else np.zeros(0, dtype=bool)
+    return fechas[ultimo], precios[ultimo]
+
+
+def _cierres_en_flujo(origen, desde, filas_por_bloque: int, unidad: str):
+    limite = None if desde is None else np.datetime64(pd.Timestamp(desde), "us")
+    fechas, precios = [], []
+
+    with pd.read_csv(
+        origen,
+        chunksize=filas_por_bloque,
+        usecols=lambda c: c.strip().title() in ("Date", "Close", "Price")
+    ) as lector:
+        for bloque in lector:
+            bloque.columns = [c.strip().title() for c in bloque.columns]
+            if "Close" not in bloque.columns and "Price" in bloque.columns:
+                # Series ya exportadas por la app (``Date,Price``).
+                bloque = bloque.rename(columns={"Price": "Close"})
+            if "Date" not in bloque.columns or "Close" not in bloque.columns:
+                raise ValueError("Stooq no devolvió el formato esperado.")
+
+            f = pd.to_datetime(bloque["Date"], errors="coerce").to_numpy(dtype="datetime64[us]")
+            p = pd.to_numeric(bloque["Close"], errors="coerce").to_numpy(dtype=float)
+            validos = ~(np.isnat(f) | np.isnan(p))
+            if limite is not None:
+                validos &= f >= limite
+
+            f, p = _ultimo_por_periodo(f[validos], p[validos], unidad)
+            fechas.append(f)
+            precios.append(p)
+
+    if not fechas:
+        return np.zeros(0, dtype="datetime64[us]"), np.zeros(0)
+
+    return _ultimo_por_periodo(np.concatenate(fechas), np.concatenate(precios), unidad)
+
+
+def cierres_mensuales_en_flujo(origen, desde: pd.Timestamp = None, filas_por_bloque: int = CSV_FILAS_POR_BLOQUE) -> pd.DataFrame:
+    """
+    Reduce un CSV diario al estilo Stooq (``Date,...,Close``) al último cierre
+    de cada mes, leyendo por bloques: en memoria sólo hay un bloque de filas
+    y un cierre por mes ya visto. ``origen`` puede ser una ruta, un archivo
+    abierto o una respuesta HTTP; el orden de las filas no importa.
+    """
+    f, p = _cierres_en_flujo(origen, desde, filas_por_bloque, "M")
+    fin_de_mes = (f.astype("datetime64[M]") + 1).astype("datetime64[D]") - 1
+    return pd.DataFrame({"Date": fin_de_mes.astype("datetime64[us]"), "Price": p})
+
+
+def cierres_diarios_en_flujo(origen, desde: pd.Timestamp = None, filas_por_bloque: int = CSV_FILAS_POR_BLOQUE) -> pd.DataFrame:
+    """Como ``cierres_mensuales_en_flujo``, pero conserva un cierre por día."""
+    f, p = _cierres_en_flujo(origen, desde, filas_por_bloque, "D")
+    return pd.DataFrame({"Date": f.astype("datetime64[D]").astype("datetime64[us]"), "Price": p})
+
+
+def fuente_stooq(desde: pd.Timestamp = None, diaria: bool = False, simbolo: str = None) -> pd.DataFrame:
+    """
+    Cierres mensuales (o diarios con ``diaria=True``) de ``simbolo`` en Stooq,
+    por defecto el ^SPX; con ``desde`` sólo pide ese tramo.
+    """
+    import urllib.parse
+    import urllib.request
+
+    url = STOOQ_DAILY_URL if simbolo is None else STOOQ_URL.format(simbolo=urllib.parse.quote(simbolo))
+    if desde is not None:
+        url += f"&d1={pd.Timestamp(desde).strftime('%Y%m%d')}"
+
+    req = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0"})
+    lector = cierres_diarios_en_flujo if diaria else cierres_mensuales_en_flujo
+    with urllib.request.urlopen(req, timeout=30) as response:
+        return lector(response, desde=desde)
+
+
+def fuente_stooq_diaria(desde: pd.Timestamp = None) -> pd.DataFrame:
+    return fuente_stooq(desde, diaria=True)
+
+
+def fuente_archivo(ruta: str, diaria: bool = False):
+    """Fuente de precios diarios desde un CSV local (p. ej. un archivo de prueba)."""
+    lector = cierres_diarios_en_flujo if diaria else cierres_mensuales_en_flujo
+
+    def fuente(desde: pd.Timestamp = None) -> pd.DataFrame:
+        return lector(ruta, desde=desde)
+
+    return fuente
+
+
+def descargar_sp500_mensual(fuente=fuente_stooq) -> pd.DataFrame:
+    return fuente()
+
+
+def agregar_rendimiento_neto_tracker(df: pd.DataFrame, amc_anual: float = AMC_ANUAL) -> pd.DataFrame:
+    df = df.copy().sort_values("Date").reset_index(drop=True)
+
+    df["Retorno_Bruto"] = df["Price"].pct_change().fillna(0.0)
+
+    factor_fee_mensual = (1 - amc_anual) ** (1 / 12)
+
+    df["Retorno_Neto"] = ((1 + df["Retorno_Bruto"]) * factor_fee_mensual) - 1
+
+    # Índice neto acumulado (1.0 en el primer mes): el crecimiento entre dos
+    # meses cualesquiera es el cociente de sus valores.
+    crecimiento = 1 + df["Retorno_Neto"].to_numpy(dtype=float)
+    crecimiento[:1] = 1.0
+    df["Indice_Neto"] = np.cumprod(crecimiento)
+
+    return df
+
+
+def _indice_neto(df: pd.DataFrame) -> np.ndarray:
+    if "Indice_Neto" in df.columns:
+        return df["Indice_Neto"].to_numpy(dtype=float)
+
+    crecimiento = 1 + df["Retorno_Neto"].to_numpy(dtype=float)
+    crecimiento[:1] = 1.0
+    return np.cumprod(crecimiento)
+
+
+def crecimiento_neto(df: pd.DataFrame, desde, hasta):
+    """
+    Factor de crecimiento neto entre el cierre del mes ``desde`` y el del mes
+    ``hasta`` (posiciones en ``df``), en tiempo constante a partir de
+    ``Indice_Neto``. Acepta enteros o arreglos de ventanas.
+    """
+    indice = _indice_neto(df)
+    return indice[hasta] / indice[desde]
+
+
+def version_mercado(df_base: pd.DataFrame) -> str:
+    """Versión de la serie de mercado con la que se calculó ``df_base``."""
+    version = df_base.attrs.get("version_mercado")
+    if version is None:
+        fechas = df_base["Date"]
+        version = f"{len(df_base)}-{fechas.iloc[0]}-{fechas.iloc[-1]}-{float(_indice_neto(df_base)[-1])!r}"
+    return version
+
+
+def huella_archivo(ruta: str) -> str:
+    """Versión de un archivo según su fecha de modificación y tamaño."""
+    info = os.stat(ruta)
+    return f"{info.st_mtime_ns}-{info.st_size}"
+
+
+def leer_csv_mercado(ruta: str) -> pd.DataFrame:
+    """
+    Lee una serie mensual ``Date,Price`` en CSV (formato de importación/exportación).
+    Las filas ilegibles se descartan y se cuentan en ``attrs["filas_descartadas"]``.
+    """
+    df = pd.read_csv(ruta)
+    df.columns = [c.strip() for c in df.columns]
+    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+    df["Price"] = pd.to_numeric(df["Price"], errors="coerce")
+    validas = df.dropna(subset=["Date", "Price"]).sort_values("Date", kind="stable").reset_index(drop=True)[["Date", "Price"]]
+    validas.attrs["filas_descartadas"] = int(len(df) - len(validas))
+    return validas
+
+
+class DatosMercadoInvalidos(ValueError):
+    """La serie no pasó la validación; ``reporte`` tiene el detalle."""
+
+    def __init__(self, reporte: dict):
+        self.reporte = reporte
+        super().__init__("Datos de mercado inválidos: " + "; ".join(reporte["errores"]))
+
+
+def validar_serie_mercado(df: pd.DataFrame, unidad: str = "M") -> dict:
+    """
+    Reporte de calidad de una serie ``Date,Price`` ordenada: huecos de
+    calendario (sólo mensual), períodos duplicados, precios no positivos,
+    saltos atípicos y cobertura. Todo en operaciones vectorizadas; se
+    ejecuta una vez al importar y el reporte se guarda con la versión.
+    Los duplicados, los precios no positivos, las filas ilegibles y los
+    saltos por encima de ``VALIDACION_FACTOR_MAXIMO`` son errores; los
+    huecos y los saltos atípicos, advertencias.
+    """
+    fechas = df["Date"].to_numpy().astype(f"datetime64[{unidad}]")
+    precios = df["Price"].to_numpy(dtype=float)
+    periodos = fechas.astype(np.int64)
+    errores, advertencias = [], []
+
+    def _detalle(indices):
+        return [str(fechas[i]) for i in indices[:VALIDACION_MAX_DETALLE]]
+
+    descartadas = int(df.attrs.get("filas_descartadas", 0))
+    if descartadas:
+        errores.append(f"{descartadas} filas con fecha o precio ilegible")
+
+    if len(precios) == 0:
+        errores.append("La serie está vacía")
+        return {
+            "filas": 0, "filas_descartadas": descartadas, "cobertura": 0.0,
+            "huecos": [], "duplicados": [], "no_positivos": [], "atipicos": [],
+            "errores": errores, "advertencias": advertencias,
+        }
+
+    paso = np.diff(periodos)
+    if (paso < 0).any():
+        errores.append("Las fechas no están ordenadas")
+
+    duplicados = np.nonzero(paso == 0)[0] + 1
+    if len(duplicados):
+        errores.append(f"{len(duplicados)} períodos duplicados")
+
+    no_positivos = np.nonzero(~(precios > 0) | ~np.isfinite(precios))[0]
+    if len(no_positivos):
+        errores.append(f"{len(no_positivos)} precios no positivos o no finitos")
+
+    huecos = []
+    if unidad == "M":
+        saltos_calendario = np.nonzero(paso > 1)[0]
+        huecos = [
+            {"desde": str(fechas[i] + 1), "hasta": str(fechas[i + 1] - 1), "meses": int(paso[i] - 1)}
+            for i in saltos_calendario[:VALIDACION_MAX_DETALLE]
+        ]
+        if len(saltos_calendario):
+            advertencias.append(f"{int((paso[saltos_calendario] - 1).sum())} meses faltantes en {len(saltos_calendario)} huecos")
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_retorno = np.abs(np.diff(np.log(np.where(precios > 0, precios, np.nan))))
+    atipicos = np.nonzero(log_retorno > np.log1p(VALIDACION_RETORNO_ATIPICO))[0] + 1
+    extremos = np.nonzero(log_retorno > np.log(VALIDACION_FACTOR_MAXIMO))[0] + 1
+    if len(extremos):
+        errores.append(f"{len(extremos)} saltos mayores a x{VALIDACION_FACTOR_MAXIMO:g} ({', '.join(_detalle(extremos))})")
+    elif len(atipicos):
+        advertencias.append(f"{len(atipicos)} retornos mayores a {VALIDACION_RETORNO_ATIPICO:.0%} en valor absoluto")
+
+    rango = int(periodos.max() - periodos.min()) + 1
+    return {
+        "filas": int(len(precios)),
+        "filas_descartadas": descartadas,
+        "desde": str(fechas[0]),
+        "hasta": str(fechas[-1]),
+        "cobertura": float(len(np.unique(periodos)) / rango) if unidad == "M" else None,
+        "huecos": huecos,
+        "duplicados": _detalle(duplicados),
+        "no_positivos": _detalle(no_positivos),
+        "atipicos": [
+            {"fecha": str(fechas[i]), "retorno": float(precios[i] / precios[i - 1] - 1)}
+            for i in atipicos[:VALIDACION_MAX_DETALLE]
+        ],
+        "errores": errores,
+        "advertencias": advertencias,
+    }
+
+
+def exigir_serie_valida(df: pd.DataFrame, unidad: str = "M") -> dict:
+    """Valida la serie y levanta ``DatosMercadoInvalidos`` si tiene errores."""
+    reporte = validar_serie_mercado(df, unidad)
+    if reporte["errores"]:
+        raise DatosMercadoInvalidos(reporte)
+    return reporte
+
+
+def _escribir_atomico(ruta: str, datos: bytes):
+    os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+    fd, temporal = tempfile.mkstemp(dir=os.path.dirname(ruta) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(datos)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporal, ruta)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+
+
+def leer_metadatos_almacen(directorio: str = ALMACEN_MERCADO_DIR):
+    try:
+        with open(os.path.join(directorio, "vigente.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _publicar_columnas(directorio: str, columnas: dict, semilla: str, metadatos: dict) -> dict:
+    """
+    Escribe las columnas como ``.npy`` en una carpeta nombrada por el hash de
+    su contenido y la publica en ``vigente.json`` con un reemplazo atómico.
+    Las carpetas anteriores se borran; los procesos que aún las tengan
+    mapeadas no se ven afectados.
+    """
+    digest = hashlib.sha256(semilla.encode("utf-8"))
+    for nombre, valores in columnas.items():
+        digest.update(nombre.encode("utf-8"))
+        digest.update(np.ascontiguousarray(valores).tobytes())
+    version = digest.hexdigest()[:16]
+
+    os.makedirs(directorio, exist_ok=True)
+    carpeta = os.path.join(directorio, version)
+    if not os.path.isdir(carpeta):
+        temporal = tempfile.mkdtemp(dir=directorio, prefix=".tmp-")
+        for nombre, valores in columnas.items():
+            np.save(os.path.join(temporal, nombre + ".npy"), valores)
+        try:
+            os.replace(temporal, carpeta)
+        except OSError:
+            # Otro proceso publicó la misma versión primero.
+            shutil.rmtree(temporal, ignore_errors=True)
+
+    metadatos = {
+        "version": version,
+        **metadatos,
+        "actualizado": pd.Timestamp.now().isoformat(timespec="seconds"),
+    }
+    _escribir_atomico(
+        os.path.join(directorio, "vigente.json"),
+        json.dumps(metadatos, indent=2).encode("utf-8")
+    )
+
+    for nombre in os.listdir(directorio):
+        ruta = os.path.join(directorio, nombre)
+        if nombre != version and os.path.isdir(ruta) and not nombre.startswith(".tmp-"):
+            shutil.rmtree(ruta, ignore_errors=True)
+
+    return metadatos
+
+
+def escribir_almacen_mercado(
+    df: pd.DataFrame,
+    directorio: str = ALMACEN_MERCADO_DIR,
+    amc_anual: float = AMC_ANUAL,
+    calidad: dict = None,
+    **extra
+) -> dict:
+    """
+    Guarda la serie mensual en el almacén columnar: mes como ordinal int32
+    de ``datetime64[M]``, precio y retornos netos en float64. La serie se
+    valida antes de escribir (salvo que llegue ya validada en ``calidad``);
+    si tiene errores no se publica y se levanta ``DatosMercadoInvalidos``.
+    """
+    calidad = calidad or exigir_serie_valida(df)
+    df = agregar_rendimiento_neto_tracker(df[["Date", "Price"]], amc_anual=amc_anual)
+    columnas = {"Mes": df["Date"].to_numpy().astype("datetime64[M]").astype(np.int32)}
+    for c in COLUMNAS_ALMACEN:
+        columnas[c] = df[c].to_numpy(dtype=np.float64)
+
+    return _publicar_columnas(directorio, columnas, repr(float(amc_anual)), {
+        "filas": int(len(df)),
+        "amc_anual": float(amc_anual),
+        "desde": df["Date"].iloc[0].strftime("%Y-%m") if len(df) else None,
+        "hasta": df["Date"].iloc[-1].strftime("%Y-%m") if len(df) else None,
+        "calidad": calidad,
+        **extra,
+    })
+
+
+def escribir_almacen_diario(df: pd.DataFrame, directorio: str = ALMACEN_DIARIO_DIR, **extra) -> dict:
+    """
+    Guarda la serie diaria en formato compacto: día como ordinal int32 de
+    ``datetime64[D]`` y cierre en float32 (6 bytes por día). Los retornos se
+    derivan al simular, así el error de float32 no se acumula. Se valida
+    igual que la mensual, sin control de huecos.
+    """
+    calidad = exigir_serie_valida(df, "D")
+    columnas = {
+        "Dia": df["Date"].to_numpy().astype("datetime64[D]").astype(np.int32),
+        "Price": df["Price"].to_numpy(dtype=np.float32),
+    }
+    return _publicar_columnas(directorio, columnas, "diario", {
+        "filas": int(len(df)),
+        "desde": df["Date"].iloc[0].strftime("%Y-%m-%d") if len(df) else None,
+        "hasta": df["Date"].iloc[-1].strftime("%Y-%m-%d") if len(df) else None,
+        "calidad": calidad,
+        **extra,
+    })
+
+
+def _abrir_almacen(carpeta: str) -> pd.DataFrame:
+    """
+    Abre una versión del almacén sin copiar: las columnas numéricas son
+    memmaps de sólo lectura compartidos con la caché de páginas del sistema.
+    """
+    meses = np.load(os.path.join(carpeta, "Mes.npy"), mmap_mode="r")
+    fechas = ((meses + 1).astype("datetime64[M]").astype("datetime64[D]") - 1).astype("datetime64[us]")
+
+    datos = {"Date": fechas}
+    for c in COLUMNAS_ALMACEN:
+        datos[c] = np.load(os.path.join(carpeta, c + ".npy"), mmap_mode="r")
+
+    df = pd.DataFrame(datos, copy=False)
+    df.attrs["version_mercado"] = os.path.basename(carpeta)
+    return df
+
+
+@functools.lru_cache(maxsize=4)
+def abrir_almacen_mercado(carpeta: str) -> pd.DataFrame:
+    return _abrir_almacen(carpeta)
+
+
+def _abrir_almacen_diario(carpeta: str) -> pd.DataFrame:
+    dias = np.load(os.path.join(carpeta, "Dia.npy"), mmap_mode="r")
+    df = pd.DataFrame({
+        "Date": dias.astype("datetime64[D]").astype("datetime64[us]"),
+        "Price": np.load(os.path.join(carpeta, "Price.npy"), mmap_mode="r"),
+    }, copy=False)
+    df.attrs["version_mercado"] = os.path.basename(carpeta)
+    return df
+
+
+@functools.lru_cache(maxsize=2)
+def abrir_almacen_diario(carpeta: str) -> pd.DataFrame:
+    return _abrir_almacen_diario(carpeta)
+
+
+def cargar_serie_diaria(directorio: str = ALMACEN_DIARIO_DIR):
+    """Serie diaria publicada, o ``None`` si todavía no se importó."""
+    metadatos = leer_metadatos_almacen(directorio)
+    if metadatos is None:
+        return None
+    try:
+        return abrir_almacen_diario(os.path.join(directorio, metadatos["version"]))
+    except FileNotFoundError:
+        metadatos = leer_metadatos_almacen(directorio)
+        return abrir_almacen_diario(os.path.join(directorio, metadatos["version"]))
+
+
+def actualizar_serie_diaria(fuente=fuente_stooq_diaria, directorio: str = ALMACEN_DIARIO_DIR) -> int:
+    """
+    Igual que ``actualizar_serie_mercado`` para la serie diaria: la marca de
+    agua es el último día guardado, que se vuelve a pedir y se reemplaza.
+    Sin almacén previo descarga la serie completa. Devuelve los días escritos.
+    """
+    metadatos = leer_metadatos_almacen(directorio)
+    if metadatos is None:
+        df = fuente()
+        if df.empty:
+            raise ValueError("La fuente diaria no devolvió datos.")
+        escribir_almacen_diario(df, directorio)
+        return len(df)
+
+    actual = _abrir_almacen_diario(os.path.join(directorio, metadatos["version"]))
+    marca = actual["Date"].iloc[-1]
+
+    nuevos = fuente(marca)
+    nuevos = nuevos[nuevos["Date"] >= marca]
+    if nuevos.empty:
+        return 0
+
+    previos = actual.loc[actual["Date"] < nuevos["Date"].iloc[0], ["Date", "Price"]]
+    combinado = pd.concat([previos, nuevos], ignore_index=True)
+    if len(combinado) == len(actual) and np.array_equal(
+        combinado["Price"].to_numpy(dtype=np.float32), actual["Price"].to_numpy()
+    ):
+        return 0
+
+    escribir_almacen_diario(combinado, directorio)
+    return len(combinado) - len(previos)
+
+
+def actualizar_serie_mercado(
+    fuente=fuente_stooq,
+    directorio: str = ALMACEN_MERCADO_DIR,
+    ruta_csv: str = None,
+    amc_anual: float = AMC_ANUAL
+):
+    """
+    Actualización incremental: toma como marca de agua el último mes
+    guardado, pide a ``fuente`` los cierres desde el inicio de ese mes
+    (que puede haber quedado abierto), reemplaza ese mes, agrega los
+    posteriores y publica la nueva versión del almacén de forma atómica.
+    Devuelve ``(metadatos, meses_nuevos)``; si no hay datos nuevos no escribe.
+    """
+    ruta_csv = ruta_csv or os.path.join(CACHE_DIR, "sp500_stooq_monthly.csv")
+    metadatos = leer_metadatos_almacen(directorio)
+    if metadatos is None:
+        raise FileNotFoundError("No hay almacén de mercado para actualizar.")
+
+    actual = _abrir_almacen(os.path.join(directorio, metadatos["version"]))
+    marca = actual["Date"].iloc[-1].to_period("M")
+
+    nuevos = fuente(marca.to_timestamp())
+    nuevos = nuevos[nuevos["Date"].dt.to_period("M") >= marca]
+    if nuevos.empty:
+        return metadatos, 0
+
+    previos = actual.loc[actual["Date"] < nuevos["Date"].iloc[0], ["Date", "Price"]]
+    combinado = pd.concat([previos, nuevos], ignore_index=True)
+    if len(combinado) == len(actual) and np.array_equal(combinado["Price"].to_numpy(), actual["Price"].to_numpy()):
+        return metadatos, 0
+
+    # Se valida antes de tocar el CSV de intercambio, que se reescribe
+    # primero para que su huella quede registrada en el almacén y no
+    # dispare una reimportación.
+    calidad = exigir_serie_valida(combinado)
+    _escribir_atomico(ruta_csv, combinado.to_csv(index=False).encode("utf-8"))
+    metadatos = escribir_almacen_mercado(
+        combinado,
+        directorio=directorio,
+        amc_anual=amc_anual,
+        calidad=calidad,
+        huella_csv=huella_archivo(ruta_csv)
+    )
+    return metadatos, len(combinado) - len(previos)
+
+
+def leer_rechazo_mercado(directorio: str = ALMACEN_MERCADO_DIR):
+    """Reporte del último CSV rechazado por la validación, o ``None``."""
+    try:
+        with open(os.path.join(directorio, "rechazado.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def registrar_rechazo_mercado(reporte: dict, directorio: str = ALMACEN_MERCADO_DIR, **extra):
+    os.makedirs(directorio, exist_ok=True)
+    rechazo = {"reporte": reporte, "fecha": pd.Timestamp.now().isoformat(timespec="seconds"), **extra}
+    _escribir_atomico(
+        os.path.join(directorio, "rechazado.json"),
+        json.dumps(rechazo, indent=2).encode("utf-8")
+    )
+
+
+def cargar_serie_mercado(forzar_actualizacion: bool = False):
+    cache_file = os.path.join(CACHE_DIR, "sp500_stooq_monthly.csv")
+    origen = "cache local"
+
+    # Una actualización fallida no impide usar la versión publicada, pero
+    # queda a la vista en ``origen`` (y, si la validación rechazó los datos,
+    # en el reporte de rechazo), como hace ``RefrescoMercado`` con su error.
+    if forzar_actualizacion and os.path.exists(cache_file) and leer_metadatos_almacen() is not None:
+        try:
+            actualizar_serie_mercado(ruta_csv=cache_file)
+            origen = "actualización incremental"
+        except DatosMercadoInvalidos as e:
+            registrar_rechazo_mercado(e.reporte, huella_csv=None)
+            origen += " (actualización: datos rechazados por validación)"
+        except (OSError, ValueError) as e:
+            origen += f" (actualización fallida: {type(e).__name__}: {e})"
+    elif forzar_actualizacion or not os.path.exists(cache_file):
+        try:
+            df = descargar_sp500_mensual()
+            _escribir_atomico(cache_file, df.to_csv(index=False).encode("utf-8"))
+            origen = "descarga online"
+        except (OSError, ValueError) as e:
+            if not os.path.exists(cache_file):
+                raise
+            origen += f" (descarga fallida: {type(e).__name__}: {e})"
+
+    # El CSV sigue siendo el formato de intercambio: si cambió (descarga o
+    # reemplazo manual) se vuelve a importar al almacén binario. Un CSV que
+    # no pasa la validación queda registrado como rechazado y se sigue con
+    # la versión publicada, sin volver a validarlo en cada ejecución.
+    huella = huella_archivo(cache_file)
+    metadatos = leer_metadatos_almacen()
+    if (
+        metadatos is None
+        or metadatos.get("huella_csv") != huella
+        or metadatos.get("amc_anual") != AMC_ANUAL
+        or "calidad" not in metadatos
+    ):
+        rechazo = leer_rechazo_mercado()
+        if metadatos is not None and rechazo is not None and rechazo.get("huella_csv") == huella:
+            origen += " (CSV rechazado por validación)"
+        else:
+            try:
+                metadatos = escribir_almacen_mercado(leer_csv_mercado(cache_file), amc_anual=AMC_ANUAL, huella_csv=huella)
+            except DatosMercadoInvalidos as e:
+                registrar_rechazo_mercado(e.reporte, huella_csv=huella)
+                if metadatos is None:
+                    raise
+                origen += " (CSV rechazado por validación)"
+
+    try:
+        df = abrir_almacen_mercado(os.path.join(ALMACEN_MERCADO_DIR, metadatos["version"]))
+    except FileNotFoundError:
+        # Un refresco publicó otra versión entre la lectura del puntero y la apertura.
+        metadatos = leer_metadatos_almacen()
+        df = abrir_almacen_mercado(os.path.join(ALMACEN_MERCADO_DIR, metadatos["version"]))
+
+    return df, origen
+
+
+def refrescar_serie_mercado(fuente=fuente_stooq, fuente_diaria=fuente_stooq_diaria) -> int:
+    """
+    Trae datos nuevos y publica la nueva versión del almacén: incremental si
+    ya hay almacén, descarga completa si no. Con ``fuente_diaria`` también
+    actualiza la serie diaria; con la fuente por defecto también los índices
+    adicionales. Devuelve los meses escritos.
+    """
+    cache_file = os.path.join(CACHE_DIR, "sp500_stooq_monthly.csv")
+    if os.path.exists(cache_file) and leer_metadatos_almacen() is not None:
+        _, meses = actualizar_serie_mercado(fuente, ruta_csv=cache_file)
+    else:
+        df = descargar_sp500_mensual(fuente)
+        calidad = exigir_serie_valida(df)
+        _escribir_atomico(cache_file, df.to_csv(index=False).encode("utf-8"))
+        escribir_almacen_mercado(df, amc_anual=AMC_ANUAL, calidad=calidad, huella_csv=huella_archivo(cache_file))
+        meses = len(df)
+
+    if fuente_diaria is not None:
+        actualizar_serie_diaria(fuente_diaria)
+    if fuente is fuente_stooq:
+        actualizar_indices()
+    return meses
+
+
+class RefrescoMercado:
+    """
+    Refresco de la serie de mercado en un hilo de fondo, con reintentos y
+    espera exponencial. Mientras corre, las sesiones siguen usando la
+    versión publicada; la nueva entra con el reemplazo atómico del puntero
+    del almacén. Hay a lo sumo un refresco en curso por proceso.
+    """
+
+    def __init__(self, reintentos: int = REFRESCO_REINTENTOS, espera_inicial: float = REFRESCO_ESPERA_INICIAL):
+        self.reintentos = reintentos
+        self.espera_inicial = espera_inicial
+        self._lock = threading.Lock()
+        self._hilo = None
+        self._estado = {"estado": "inactivo", "inicio": None, "fin": None, "intento": 0, "meses": None, "error": None}
+
+    def en_curso(self) -> bool:
+        with self._lock:
+            return self._hilo is not None and self._hilo.is_alive()
+
+    def estado(self) -> dict:
+        with self._lock:
+            return dict(self._estado)
+
+    def iniciar(self, fuente=fuente_stooq) -> bool:
+        """Lanza un refresco; devuelve False si ya había uno en curso."""
+        with self._lock:
+            if self._hilo is not None and self._hilo.is_alive():
+                return False
+            self._estado = {
+                "estado": "en curso", "inicio": pd.Timestamp.now(), "fin": None,
+                "intento": 0, "meses": None, "error": None
+            }
+            self._hilo = threading.Thread(target=self._correr, args=(fuente,), name="refresco-mercado", daemon=True)
+            self._hilo.start()
+            return True
+
+    def _actualizar(self, **cambios):
+        with self._lock:
+            self._estado.update(cambios)
+
+    def _correr(self, fuente):
+        for intento in range(1, self.reintentos + 1):
+            self._actualizar(intento=intento)
+            try:
+                meses = refrescar_serie_mercado(fuente)
+            except DatosMercadoInvalidos as e:
+                # Reintentar no cambia los datos: se deja la versión publicada.
+                self._actualizar(error=str(e))
+                break
+            except Exception as e:
+                self._actualizar(error=f"{type(e).__name__}: {e}")
+                if intento < self.reintentos:
+                    time.sleep(self.espera_inicial * 2 ** (intento - 1))
+                continue
+            self._actualizar(estado="ok", meses=meses, error=None, fin=pd.Timestamp.now())
+            return
+        self._actualizar(estado="error", fin=pd.Timestamp.now())
+
+
+# --- ÍNDICES Y CARTERAS ---
+def fuente_desde_config(config: dict):
+    """Fuente mensual descrita en los metadatos del almacén de índices."""
+    if config["tipo"] == "stooq":
+        return lambda desde=None: fuente_stooq(desde, simbolo=config["simbolo"])
+    if config["tipo"] == "archivo":
+        return fuente_archivo(config["ruta"])
+    raise ValueError(f"Tipo de fuente desconocido: {config['tipo']}")
+
+
+def escribir_almacen_indices(series: dict, fuentes: dict, directorio: str = INDICES_DIR, **extra) -> dict:
+    """
+    Publica varias series mensuales (``{nombre: DataFrame Date, Price}``)
+    alineadas sobre la unión de sus meses; cada índice es una columna
+    float64 con NaN donde no tiene dato. Cada serie se valida antes de
+    publicar.
+    """
+    calidad = {nombre: exigir_serie_valida(df) for nombre, df in series.items()}
+    meses_por_indice = {
+        nombre: df["Date"].to_numpy().astype("datetime64[M]").astype(np.int32)
+        for nombre, df in series.items()
+    }
+    meses = np.unique(np.concatenate(list(meses_por_indice.values()))).astype(np.int32)
+
+    columnas = {"Mes": meses}
+    for nombre, df in series.items():
+        precios = np.full(len(meses), np.nan)
+        precios[np.searchsorted(meses, meses_por_indice[nombre])] = df["Price"].to_numpy(dtype=float)
+        columnas[nombre] = precios
+
+    fechas = meses.astype("datetime64[M]")
+    return _publicar_columnas(directorio, columnas, "indices", {
+        "indices": list(series),
+        "fuentes": fuentes,
+        "calidad": calidad,
+        "filas": int(len(meses)),
+        "desde": str(fechas[0]) if len(meses) else None,
+        "hasta": str(fechas[-1]) if len(meses) else None,
+        **extra,
+    })
+
+
+def _abrir_indices(carpeta: str, nombres: tuple) -> pd.DataFrame:
+    meses = np.load(os.path.join(carpeta, "Mes.npy"), mmap_mode="r")
+    datos = {"Date": ((meses + 1).astype("datetime64[M]").astype("datetime64[D]") - 1).astype("datetime64[us]")}
+    for nombre in nombres:
+        datos[nombre] = np.load(os.path.join(carpeta, nombre + ".npy"), mmap_mode="r")
+
+    df = pd.DataFrame(datos, copy=False)
+    df.attrs["version_mercado"] = os.path.basename(carpeta)
+    return df
+
+
+@functools.lru_cache(maxsize=4)
+def abrir_almacen_indices(carpeta: str, nombres: tuple) -> pd.DataFrame:
+    return _abrir_indices(carpeta, nombres)
+
+
+def _series_indices(metadatos: dict, directorio: str) -> dict:
+    df = _abrir_indices(os.path.join(directorio, metadatos["version"]), tuple(metadatos["indices"]))
+    series = {}
+    for nombre in metadatos["indices"]:
+        validos = ~np.isnan(df[nombre].to_numpy())
+        series[nombre] = pd.DataFrame({"Date": df["Date"][validos], "Price": df[nombre][validos]})
+    return series
+
+
+def cargar_indices(df_mercado: pd.DataFrame, directorio: str = INDICES_DIR) -> pd.DataFrame:
+    """
+    Índices alineados por mes. La columna ``SP500`` se toma de la serie
+    mensual y se vuelve a publicar cuando esta cambia de versión.
+    """
+    metadatos = leer_metadatos_almacen(directorio)
+    version_sp500 = version_mercado(df_mercado)
+
+    if metadatos is None or metadatos.get("version_sp500") != version_sp500:
+        series, fuentes = {}, {}
+        if metadatos is not None:
+            series = _series_indices(metadatos, directorio)
+            fuentes = metadatos["fuentes"]
+        series["SP500"] = df_mercado[["Date", "Price"]]
+        fuentes["SP500"] = {"tipo": "serie_mensual"}
+        metadatos = escribir_almacen_indices(series, fuentes, directorio, version_sp500=version_sp500)
+
+    return abrir_almacen_indices(os.path.join(directorio, metadatos["version"]), tuple(metadatos["indices"]))
+
+
+def agregar_indice(nombre: str, config: dict, directorio: str = INDICES_DIR) -> dict:
+    """
+    Agrega (o reemplaza) un índice descrito por ``config`` (``{"tipo":
+    "stooq", "simbolo": ...}`` o ``{"tipo": "archivo", "ruta": ...}``).
+    """
+    if not nombre.isidentifier():
+        raise ValueError(f"Nombre de índice inválido: {nombre!r}")
+
+    metadatos = leer_metadatos_almacen(directorio)
+    if metadatos is None:
+        raise FileNotFoundError("No hay almacén de índices; se crea al cargar la serie de mercado.")
+
+    series = _series_indices(metadatos, directorio)
+    series[nombre] = fuente_desde_config(config)()
+    fuentes = {**metadatos["fuentes"], nombre: config}
+    return escribir_almacen_indices(series, fuentes, directorio, version_sp500=metadatos.get("version_sp500"))
+
+
+def actualizar_indices(directorio: str = INDICES_DIR) -> int:
+    """Vuelve a pedir los índices con fuente propia y republica el almacén."""
+    metadatos = leer_metadatos_almacen(directorio)
+    if metadatos is None:
+        return 0
+
+    externos = {n: c for n, c in metadatos["fuentes"].items() if c["tipo"] != "serie_mensual"}
+    if not externos:
+        return 0
+
+    series = _series_indices(metadatos, directorio)
+    for nombre, config in externos.items():
+        series[nombre] = fuente_desde_config(config)()
+    escribir_almacen_indices(series, metadatos["fuentes"], directorio, version_sp500=metadatos.get("version_sp500"))
+    return len(externos)
+
+
+def retornos_cartera(precios: np.ndarray, meses: np.ndarray, pesos: np.ndarray, rebalanceo_meses: int) -> np.ndarray:
+    """
+    Retornos brutos mensuales de varias carteras a la vez. ``precios`` es
+    meses x índices, ``pesos`` carteras x índices. Los pesos se restablecen
+    al inicio de cada bloque de ``rebalanceo_meses`` meses de calendario
+    (0 = sin rebalanceo) y derivan con el mercado dentro del bloque.
+    Devuelve (meses - 1) x carteras.
+    """
+    crecimiento = precios[1:] / precios[:-1]
+    m = len(crecimiento)
+    if m == 0:
+        return np.zeros((0, len(pesos)))
+
+    if rebalanceo_meses > 0:
+        bloque = np.asarray(meses[1:]).astype("datetime64[M]").astype(np.int64) // rebalanceo_meses
+    else:
+        bloque = np.zeros(m, dtype=np.int64)
+    inicio_bloque = np.r_[True, bloque[1:] != bloque[:-1]]
+
+    # Crecimiento acumulado de cada índice desde el inicio de su bloque.
+    acumulado = np.cumsum(np.log(crecimiento), axis=0)
+    base = np.where(inicio_bloque[:, None], acumulado - np.log(crecimiento), np.nan)
+    base = pd.DataFrame(base).ffill().to_numpy()
+    valor = np.exp(acumulado - base) @ np.asarray(pesos, dtype=float).T
+
+    previo = np.ones_like(valor)
+    previo[1:] = np.where(inicio_bloque[1:, None], 1.0, valor[:-1])
+    return valor / previo - 1
+
+
+def serie_cartera(
+    df_indices: pd.DataFrame,
+    pesos: dict,
+    rebalanceo_meses: int,
+    amc_anual: float = AMC_ANUAL
+) -> pd.DataFrame:
+    """
+    Serie mensual de una cartera ponderada con el mismo formato que la serie
+    de mercado (``Price`` como valor de la cartera, retornos netos e
+    ``Indice_Neto``), para usarla con los motores y el barrido sin cambios.
+    Va del primer al último mes en que todos los índices con peso tienen
+    dato, mes a mes. Los meses intermedios sin dato de algún índice se
+    completan con su último precio (retorno cero en el hueco; el AMC se
+    cobra igual) y se informan en ``attrs["huecos"]``, con el formato de
+    los huecos de ``validar_serie_mercado``.
+    """
+    nombres = [n for n, w in pesos.items() if w > 0]
+    w = np.array([pesos[n] for n in nombres], dtype=float)
+    w = w / w.sum()
+
+    precios = df_indices[nombres].to_numpy(dtype=float)
+    meses = df_indices["Date"].to_numpy().astype("datetime64[M]")
+    completos = np.flatnonzero(~np.isnan(precios).any(axis=1))
+    if not len(completos):
+        raise ValueError("Los índices elegidos no tienen meses con dato en común.")
+    primero, ultimo = completos[0], completos[-1]
+
+    # Calendario continuo: un mes que falta en todos los índices también es un hueco.
+    calendario = np.arange(meses[primero], meses[ultimo] + 1)
+    tabla = np.full((len(calendario), len(nombres)), np.nan)
+    tabla[np.searchsorted(calendario, meses[primero:ultimo + 1])] = precios[primero:ultimo + 1]
+    faltantes = np.isnan(tabla).any(axis=1)
+    tabla = pd.DataFrame(tabla).ffill().to_numpy()
+
+    bordes = np.diff(np.r_[0, faltantes.astype(np.int8), 0])
+    huecos = [
+        {"desde": str(calendario[i]), "hasta": str(calendario[j - 1]), "meses": int(j - i)}
+        for i, j in zip(np.flatnonzero(bordes == 1), np.flatnonzero(bordes == -1))
+    ]
+
+    fechas = ((calendario + 1).astype("datetime64[D]") - 1).astype("datetime64[us]")
+    retornos = retornos_cartera(tabla, fechas, w[None, :], rebalanceo_meses)[:, 0]
+
+    valor = 100 * np.cumprod(np.r_[1.0, 1 + retornos])
+    df = agregar_rendimiento_neto_tracker(pd.DataFrame({"Date": fechas, "Price": valor}), amc_anual=amc_anual)
+
+    firma = json.dumps([sorted(zip(nombres, w.tolist())), int(rebalanceo_meses), float(amc_anual)])
+    df.attrs["version_mercado"] = (
+        f"{df_indices.attrs.get('version_mercado')}-{hashlib.sha256(firma.encode('utf-8')).hexdigest()[:12]}"
+    )
+    df.attrs["huecos"] = huecos
+    return df
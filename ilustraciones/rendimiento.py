@@ -0,0 +1,170 @@
+"""XIRR vectorizado y rendimiento de una ilustración."""
+import numpy as np
+import pandas as pd
+
+
+def xirr(cashflows, guess=0.08):
+    """
+    cashflows: lista de tuplas (fecha, monto)
+    aportes = negativos
+    retiros / valor final = positivos
+    """
+    if not cashflows or len(cashflows) < 2:
+        return None
+
+    t0 = cashflows[0][0]
+    tiempos = np.array([(fecha - t0).days for fecha, _ in cashflows]) / 365.25
+    montos = np.array([float(monto) for _, monto in cashflows])
+
+    tasa = xirr_lote(tiempos, montos, guess=guess)[0]
+    return None if np.isnan(tasa) else float(tasa)
+
+
+def xirr_lote(tiempos: np.ndarray, montos: np.ndarray, guess: float = 0.08) -> np.ndarray:
+    """
+    XIRR de muchos vectores de flujos a la vez: cada fila es un vector, con
+    ``tiempos`` en años desde el primer flujo. Los montos en cero son
+    relleno y no cuentan. Devuelve NaN donde no hay tasa (sin aportes o sin
+    ingresos, o sin cambio de signo en el intervalo).
+
+    Los años se calculan una sola vez; cada fila itera con Newton (derivada
+    analítica) dentro de un intervalo con cambio de signo y cae a bisección
+    cuando el paso sale del intervalo.
+    """
+    tiempos = np.atleast_2d(np.asarray(tiempos, dtype=float))
+    montos = np.atleast_2d(np.asarray(montos, dtype=float))
+
+    # VPN llevado a la fecha del último flujo: mismo signo y misma raíz que
+    # el VPN a la fecha inicial, sin desbordes cuando la tasa se acerca a -100%.
+    hasta_final = tiempos.max(axis=1, keepdims=True) - tiempos
+
+    def crecer(tasas, filas=slice(None)):
+        # Exponente acotado: evita subnormales (muy lentos) cerca de -100%.
+        return np.exp(np.maximum(hasta_final[filas] * np.log1p(tasas[filas])[:, None], -700.0))
+
+    def vpn_final(tasas, filas=slice(None)):
+        return (montos[filas] * crecer(tasas, filas)).sum(axis=1)
+
+    filas = (montos > 0).any(axis=1) & (montos < 0).any(axis=1)
+    low = np.full(len(montos), -0.9999)
+    high = np.full(len(montos), 10.0)
+
+    with np.errstate(over="ignore", invalid="ignore", divide="ignore"):
+        npv_low = vpn_final(low)
+        npv_high = vpn_final(high)
+
+        for _ in range(50):
+            sin_cambio = np.flatnonzero(filas & (npv_low * npv_high > 0))
+            if not sin_cambio.size:
+                break
+            high[sin_cambio] *= 2
+            npv_high[sin_cambio] = vpn_final(high, sin_cambio)
+
+        filas &= npv_low * npv_high <= 0
+
+        tasa = np.where((low < guess) & (guess < high), guess, (low + high) / 2)
+        activas = np.flatnonzero(filas)
+
+        for _ in range(100):
+            if not activas.size:
+                break
+
+            r = tasa[activas]
+            h = hasta_final[activas]
+            flujos = montos[activas] * crecer(tasa, activas)
+            positivos = np.where(flujos > 0, flujos, 0.0)
+            f = flujos.sum(axis=1)
+            valor_entradas = positivos.sum(axis=1)
+            valor_salidas = valor_entradas - f
+
+            # El intervalo se achica en cada iteración: conserva el cambio de signo.
+            lado_low = f * npv_low[activas] > 0
+            low[activas] = np.where(lado_low, r, low[activas])
+            npv_low[activas] = np.where(lado_low, f, npv_low[activas])
+            high[activas] = np.where(lado_low, high[activas], r)
+
+            # Newton sobre log(entradas / salidas) en función de log(1 + r):
+            # casi lineal aun con horizontes de siglos, donde el VPN es muy convexo.
+            phi = np.log(valor_entradas) - np.log(valor_salidas)
+            plazo_entradas = (positivos * h).sum(axis=1)
+            plazo_salidas = plazo_entradas - (flujos * h).sum(axis=1)
+            derivada = plazo_entradas / valor_entradas - plazo_salidas / valor_salidas
+            paso = phi / derivada
+            nueva = np.expm1(np.log1p(r) - paso)
+            convergida = (f == 0) | (np.abs(paso) <= 1e-12)
+
+            fuera = ~convergida & (~np.isfinite(nueva) | (nueva <= low[activas]) | (nueva >= high[activas]))
+            nueva = np.where(fuera, (low[activas] + high[activas]) / 2, nueva)
+            nueva = np.where(f == 0, r, nueva)
+
+            listo = convergida | (high[activas] - low[activas] <= 1e-12)
+            tasa[activas] = nueva
+            activas = activas[~listo]
+
+    return np.where(filas, tasa, np.nan)
+
+
+def extraer_flujos_xirr(df: pd.DataFrame, val_final: float):
+    """
+    Flujos de una simulación listos para ``xirr_lote``: (años desde el primer
+    flujo, monto). Aportes negativos según el salto de ``Aporte_Acum``,
+    retiros positivos y el valor final al cierre.
+    """
+    dias = df["Date"].to_numpy(dtype="datetime64[D]").astype(np.int64)
+    aportes = np.diff(df["Aporte_Acum"].to_numpy(dtype=float), prepend=0.0)
+    retiros = df["Retiro"].to_numpy(dtype=float)
+
+    con_aporte = aportes > 0
+    con_retiro = retiros > 0
+
+    fechas = np.concatenate((dias[con_aporte], dias[con_retiro], dias[-1:]))
+    montos = np.concatenate((-aportes[con_aporte], retiros[con_retiro], [val_final]))
+
+    return (fechas - fechas.min()) / 365.25, montos
+
+
+def calcular_rendimiento_resumen(df: pd.DataFrame, resumen: pd.DataFrame, tipo_plan: str):
+    """
+    MIS  -> rendimiento anual promedio
+    MSS  -> rendimiento anual equivalente del plan (XIRR)
+
+    El resultado queda guardado en ``df.attrs`` junto con la simulación, así
+    la figura y las exportaciones de una misma ilustración lo calculan una vez.
+    """
+    if resumen.empty or df.empty:
+        return "Rendimiento anual", 0.0
+
+    val_final = float(resumen["Valor_Cuenta"].iloc[-1])
+    clave = (tipo_plan, val_final, len(df), df["Date"].iloc[-1])
+
+    memo = df.attrs.get("rendimiento_resumen")
+    if memo is not None and memo[0] == clave:
+        return memo[1]
+
+    resultado = _rendimiento_resumen(df, resumen, tipo_plan, val_final)
+    df.attrs["rendimiento_resumen"] = (clave, resultado)
+    return resultado
+
+
+def _rendimiento_resumen(df: pd.DataFrame, resumen: pd.DataFrame, tipo_plan: str, val_final: float):
+    if tipo_plan == "MIS":
+        inv_total = float(resumen["Aporte_Acum"].iloc[-1])
+
+        if inv_total <= 0 or val_final <= 0 or len(df) < 2:
+            return "Rendimiento anual promedio", 0.0
+
+        años = (df["Date"].iloc[-1] - df["Date"].iloc[0]).days / 365.25
+        if años <= 0:
+            return "Rendimiento anual promedio", 0.0
+
+        tasa = ((val_final / inv_total) ** (1 / años) - 1) * 100
+        return "Rendimiento anual promedio", tasa
+
+    # MSS -> XIRR
+    tiempos, montos = extraer_flujos_xirr(df, val_final)
+    tasa_xirr = xirr_lote(tiempos, montos)[0]
+
+    if np.isnan(tasa_xirr):
+        return "Rendimiento anual equivalente del plan", 0.0
+
+    return "Rendimiento anual equivalente del plan", float(tasa_xirr) * 100
@@ -0,0 +1,247 @@
+"""
+Reporte PDF de una ilustración con fpdf2: encabezado, totales, gráfico
+vectorial y tabla anual, armados directamente desde los datos numéricos.
+La tabla se pagina con el encabezado repetido, así una serie que empieza
+en el siglo XIX no genera una figura gigante.
+"""
+import numpy as np
+import pandas as pd
+
+from .exportar import series_grafico, texto_resumen_ilustracion
+from .utilidades import fmt_pct, fmt_usd
+
+NOTA_SERIE = "Serie histórica neta basada en el S&P 500, con costos anuales prorrateados mensualmente."
+DISCLAIMER = (
+    "Disclaimer: esta herramienta es únicamente ilustrativa. No constituye una proyección garantizada, "
+    "una oferta, ni asesoría financiera, legal o fiscal."
+)
+
+# (encabezado, columna del resumen, formato, ancho en mm)
+COLUMNAS_TABLA = [
+    ("Año", "Periodo_N", str, 14),
+    ("Meses", "Periodo_Label", str, 30),
+    ("Aporte acumulado", "Aporte_Acum", fmt_usd, 34),
+    ("Retiro", "Retiro", fmt_usd, 30),
+    ("Valor en cuenta", "Valor_Cuenta", fmt_usd, 36),
+    ("Valor de rescate", "Valor_Rescate", fmt_usd, 36),
+    ("Rendimiento", "Rendimiento", fmt_pct, 24),
+    ("Rendimiento acumulado", "Rendimiento_Acumulado", fmt_pct, 38),
+    ("Etapa", "Etapa", str, 31),
+]
+
+# (columna, etiqueta, color RGB, grosor mm, guiones)
+SERIES_GRAFICO = [
+    ("Aporte_Acum", "Capital invertido", (44, 160, 44), 0.6, True),
+    ("Valor_Rescate", "Valor rescate", (140, 140, 140), 0.55, True),
+    ("Valor_Cuenta", "Valor cuenta", (11, 92, 173), 0.75, False),
+]
+
+AZUL_ENCABEZADO = (64, 70, 110)
+GRIS_BORDE = (216, 221, 230)
+FONDO_ALTERNO = (247, 249, 252)
+DORADO = (212, 172, 13)
+ALTO_FILA = 6.2
+
+
+def _latin1(texto) -> str:
+    # Las fuentes base del PDF son latin-1; otros caracteres se reemplazan.
+    return str(texto).encode("latin-1", "replace").decode("latin-1")
+
+
+def _paso_redondo(bruto: float) -> float:
+    if bruto <= 0:
+        return 1.0
+    base = 10 ** np.floor(np.log10(bruto))
+    for multiplo in (1, 2, 2.5, 5, 10):
+        if multiplo * base >= bruto:
+            return float(multiplo * base)
+    return float(10 * base)
+
+
+def _nuevo_pdf():
+    from fpdf import FPDF
+
+    class _Reporte(FPDF):
+        def footer(self):
+            self.set_y(-11)
+            self.set_font("Helvetica", size=7.5)
+            self.set_text_color(102, 102, 102)
+            self.cell(0, 4, _latin1(DISCLAIMER), align="C")
+            self.set_x(-30)
+            self.cell(18, 4, f"{self.page_no()}/{{nb}}", align="R")
+
+    pdf = _Reporte(orientation="L", unit="mm", format="A4")
+    pdf.set_margins(12, 12, 12)
+    pdf.set_auto_page_break(False)
+    pdf.set_title("Ilustración financiera")
+    return pdf
+
+
+def _grafico(pdf, df: pd.DataFrame, x: float, y: float, ancho: float, alto: float):
+    if df.empty:
+        return
+    margen_izq, margen_inf = 26, 8
+    x0, y0 = x + margen_izq, y
+    w, h = ancho - margen_izq, alto - margen_inf
+
+    dias = df["Date"].to_numpy(dtype="datetime64[D]").astype(np.int64).astype(float)
+    d_min, d_max = dias[0], max(dias[-1], dias[0] + 1)
+    y_max = max(float(np.nanmax(df[c].to_numpy(dtype=float))) for c, *_ in SERIES_GRAFICO) * 1.05 or 1.0
+    paso = _paso_redondo(y_max / 5)
+    y_max = paso * np.ceil(y_max / paso)
+
+    def px(d):
+        return x0 + (d - d_min) / (d_max - d_min) * w
+
+    def py(v):
+        return y0 + h - v / y_max * h
+
+    # Grilla horizontal y montos del eje.
+    pdf.set_font("Helvetica", size=7.5)
+    pdf.set_text_color(68, 68, 68)
+    pdf.set_line_width(0.15)
+    for k in range(int(round(y_max / paso)) + 1):
+        valor = k * paso
+        pdf.set_draw_color(230, 230, 230)
+        pdf.line(x0, py(valor), x0 + w, py(valor))
+        pdf.set_xy(x, py(valor) - 2)
+        pdf.cell(margen_izq - 2, 4, f"USD {valor:,.0f}", align="R")
+
+    # Años del eje horizontal con un paso redondo (a lo sumo ~10 marcas).
+    anio_ini, anio_fin = df["Date"].iloc[0].year, df["Date"].iloc[-1].year
+    paso_anios = next(p for p in (1, 2, 5, 10, 20, 25, 50, 100, 1000) if (anio_fin - anio_ini) / p <= 10)
+    for anio in range(-(-anio_ini // paso_anios) * paso_anios, anio_fin + 1, paso_anios):
+        d = float(np.datetime64(f"{anio:04d}-01-01", "D").astype(np.int64))
+        if d_min <= d <= d_max:
+            pdf.set_draw_color(200, 200, 200)
+            pdf.line(px(d), y0 + h, px(d), y0 + h + 1.2)
+            pdf.set_xy(px(d) - 8, y0 + h + 1.5)
+            pdf.cell(16, 4, str(anio), align="C")
+
+    pdf.set_draw_color(200, 200, 200)
+    pdf.set_line_width(0.25)
+    pdf.line(x0, y0, x0, y0 + h)
+    pdf.line(x0, y0 + h, x0 + w, y0 + h)
+
+    # Los mismos puntos reducidos que el gráfico de pantalla.
+    series = series_grafico(df)
+    for columna, _, color, grosor, guiones in SERIES_GRAFICO:
+        fechas, valores = series[columna]
+        xs, ys = px(fechas.astype(np.int64).astype(float)), py(valores)
+        pdf.set_draw_color(*color)
+        pdf.set_line_width(grosor)
+        if guiones:
+            pdf.set_dash_pattern(dash=2.2, gap=1.2)
+        pdf.polyline(list(zip(xs.tolist(), ys.tolist())))
+        pdf.set_dash_pattern()
+
+    # Leyenda.
+    lx, ly = x0 + 4, y0 + 3
+    pdf.set_fill_color(255, 255, 255)
+    pdf.set_draw_color(217, 217, 217)
+    pdf.set_line_width(0.2)
+    pdf.rect(lx, ly, 44, 5.5 * len(SERIES_GRAFICO) + 2, style="DF")
+    pdf.set_font("Helvetica", size=8.5)
+    pdf.set_text_color(31, 31, 31)
+    for i, (_, etiqueta, color, grosor, guiones) in enumerate(SERIES_GRAFICO):
+        yy = ly + 3.5 + 5.5 * i
+        pdf.set_draw_color(*color)
+        pdf.set_line_width(grosor)
+        if guiones:
+            pdf.set_dash_pattern(dash=2.2, gap=1.2)
+        pdf.line(lx + 2, yy, lx + 11, yy)
+        pdf.set_dash_pattern()
+        pdf.set_xy(lx + 13, yy - 2)
+        pdf.cell(30, 4, _latin1(etiqueta))
+
+
+def _encabezado_tabla(pdf, columnas: list, escala: float):
+    pdf.set_font("Helvetica", style="B", size=8.5)
+    pdf.set_fill_color(*AZUL_ENCABEZADO)
+    pdf.set_text_color(255, 255, 255)
+    pdf.set_draw_color(*GRIS_BORDE)
+    pdf.set_line_width(0.15)
+    for titulo, _, _, ancho in columnas:
+        pdf.cell(ancho * escala, ALTO_FILA + 1, _latin1(titulo), border=1, align="C", fill=True)
+    pdf.ln()
+
+
+def _tabla(pdf, resumen: pd.DataFrame, titulo: str):
+    columnas = [c for c in COLUMNAS_TABLA if c[1] in resumen.columns]
+    escala = pdf.epw / sum(c[3] for c in columnas)
+    limite = pdf.h - 16
+
+    pdf.add_page()
+    pdf.set_font("Helvetica", style="B", size=14)
+    pdf.set_text_color(31, 31, 31)
+    pdf.cell(0, 9, _latin1(titulo), align="C")
+    pdf.ln(11)
+    _encabezado_tabla(pdf, columnas, escala)
+
+    # El resaltado del rescate se decide con los números, no con el texto formateado.
+    bajo_aporte = (resumen["Valor_Rescate"] < resumen["Aporte_Acum"]).to_numpy()
+    valores = {col: resumen[col].tolist() for _, col, _, _ in columnas}
+
+    for i in range(len(resumen)):
+        if pdf.get_y() + ALTO_FILA > limite:
+            pdf.add_page()
+            _encabezado_tabla(pdf, columnas, escala)
+        pdf.set_fill_color(*(FONDO_ALTERNO if i % 2 else (255, 255, 255)))
+        for _, col, formato, ancho in columnas:
+            resaltar = col == "Valor_Rescate" and bajo_aporte[i]
+            pdf.set_font("Helvetica", style="B" if resaltar else "", size=8)
+            pdf.set_text_color(*(DORADO if resaltar else (31, 31, 31)))
+            pdf.cell(ancho * escala, ALTO_FILA, _latin1(formato(valores[col][i])), border=1, align="C", fill=True)
+        pdf.ln()
+
+
+def _portada(pdf, df: pd.DataFrame, resumen: pd.DataFrame, seleccion: str, nombre_cliente: str, subtitulo: str, tipo_plan: str):
+    pdf.add_page()
+    pdf.set_text_color(31, 31, 31)
+    pdf.set_font("Helvetica", style="B", size=20)
+    pdf.cell(0, 10, _latin1(seleccion), align="C")
+    pdf.ln(10)
+    pdf.set_font("Helvetica", style="B", size=14)
+    pdf.set_text_color(47, 47, 47)
+    pdf.cell(0, 8, _latin1(f"Cliente: {nombre_cliente}"), align="C")
+    pdf.ln(8)
+    pdf.set_font("Helvetica", size=9)
+    pdf.set_text_color(102, 102, 102)
+    pdf.cell(0, 5, _latin1(NOTA_SERIE), align="C")
+    pdf.ln(5)
+    pdf.set_font("Helvetica", size=10.5)
+    pdf.set_text_color(74, 74, 74)
+    pdf.cell(0, 6, _latin1(subtitulo), align="C")
+    pdf.ln(9)
+
+    pdf.set_font("Helvetica", style="B", size=9.5)
+    pdf.set_text_color(31, 31, 31)
+    pdf.set_fill_color(247, 249, 252)
+    pdf.set_draw_color(199, 210, 227)
+    pdf.set_line_width(0.3)
+    pdf.multi_cell(0, 8, _latin1(texto_resumen_ilustracion(df, resumen, tipo_plan)), border=1, align="C", fill=True)
+
+    y = pdf.get_y() + 5
+    _grafico(pdf, df, pdf.l_margin, y, pdf.epw, pdf.h - 18 - y)
+
+
+def generar_pdf_completo(
+    df: pd.DataFrame,
+    resumen: pd.DataFrame,
+    seleccion: str,
+    nombre_cliente: str,
+    subtitulo: str,
+    tipo_plan: str
+) -> bytes:
+    """Ilustración completa: portada con totales y gráfico, y la tabla anual paginada."""
+    pdf = _nuevo_pdf()
+    _portada(pdf, df, resumen, seleccion, nombre_cliente, subtitulo, tipo_plan)
+    _tabla(pdf, resumen, f"Resumen anual - {nombre_cliente}")
+    return bytes(pdf.output())
+
+
+def generar_tabla_pdf(resumen: pd.DataFrame, titulo: str = "Resumen anual") -> bytes:
+    """Sólo la tabla anual, con el mismo formato que el reporte completo."""
+    pdf = _nuevo_pdf()
+    _tabla(pdf, resumen, titulo)
+    return bytes(pdf.output())
@@ -0,0 +1,171 @@
+"""Resúmenes anuales de una o varias ilustraciones."""
+import numpy as np
+import pandas as pd
+
+from .config import LISTA_MESES
+from .utilidades import fmt_pct, fmt_usd
+
+
+def construir_resumen_anual(df: pd.DataFrame, anio_inicio: int, mes_inicio: int) -> pd.DataFrame:
+    if df.empty:
+        return pd.DataFrame()
+
+    resumen = construir_resumenes_anuales([(df, anio_inicio, mes_inicio)])
+
+    if resumen.empty:
+        return pd.DataFrame()
+
+    columnas = [c for c in resumen.columns if c != "Escenario"]
+    if "Etapa" not in df.columns:
+        columnas.remove("Etapa")
+
+    return resumen[columnas].reset_index(drop=True)
+
+
+def construir_resumenes_anuales(resultados) -> pd.DataFrame:
+    """
+    Resumen anual de una o varias simulaciones en una sola agregación por
+    (escenario, año), con las mismas reglas que ``construir_resumen_anual``:
+    el primer año arranca en el mes de inicio y el último se corta en el mes
+    anterior al actual.
+
+    ``resultados``: lista de (df, anio_inicio, mes_inicio) o dict con esas
+    tuplas como valores. La columna ``Escenario`` lleva la posición o la
+    clave de cada simulación.
+    """
+    items = list(resultados.items()) if isinstance(resultados, dict) else list(enumerate(resultados))
+    items = [(clave, df, anio, mes) for clave, (df, anio, mes) in items if not df.empty]
+
+    if not items:
+        return pd.DataFrame()
+
+    hoy = pd.Timestamp.today()
+    columnas = {c: [] for c in ["_esc", "Year", "Month", "Aporte_Acum", "Retiro", "Valor_Cuenta", "Valor_Rescate", "Etapa"]}
+    anios_inicio, meses_inicio, ultimos_anios, ultimos_meses = [], [], [], []
+
+    for codigo, (_, df, anio_inicio, mes_inicio) in enumerate(items):
+        df = df if df["Date"].is_monotonic_increasing else df.sort_values("Date")
+        ultima_fecha = df["Date"].iloc[-1]
+
+        if ultima_fecha.year == hoy.year:
+            ultimo_mes = min(ultima_fecha.month, max(hoy.month - 1, 1))
+        else:
+            ultimo_mes = ultima_fecha.month
+
+        anios_inicio.append(int(anio_inicio))
+        meses_inicio.append(int(mes_inicio))
+        ultimos_anios.append(ultima_fecha.year)
+        ultimos_meses.append(ultimo_mes)
+
+        columnas["_esc"].append(np.full(len(df), codigo))
+        columnas["Year"].append(df["Date"].dt.year.to_numpy())
+        columnas["Month"].append(df["Date"].dt.month.to_numpy())
+        for c in ["Aporte_Acum", "Retiro", "Valor_Cuenta", "Valor_Rescate"]:
+            columnas[c].append(df[c].to_numpy(dtype=float))
+        columnas["Etapa"].append(df["Etapa"].to_numpy(dtype=object) if "Etapa" in df.columns else np.full(len(df), None))
+
+    datos = {c: np.concatenate(v) for c, v in columnas.items()}
+    anios_inicio = np.array(anios_inicio)
+    meses_inicio = np.array(meses_inicio)
+    ultimos_anios = np.array(ultimos_anios)
+    ultimos_meses = np.array(ultimos_meses)
+
+    def rango_meses(esc, anio):
+        es_inicio = anio == anios_inicio[esc]
+        desde = np.where(es_inicio, meses_inicio[esc], 1)
+        hasta = np.where(es_inicio, 12, np.where(anio == ultimos_anios[esc], ultimos_meses[esc], 12))
+        return desde, hasta
+
+    desde, hasta = rango_meses(datos["_esc"], datos["Year"])
+    dentro = (datos["Month"] >= desde) & (datos["Month"] <= hasta)
+    datos = {c: v[dentro] for c, v in datos.items()}
+
+    if not len(datos["_esc"]):
+        return pd.DataFrame()
+
+    # Las filas ya vienen ordenadas por escenario y fecha: cada (escenario, año)
+    # es un bloque contiguo y se agrega con reduceat / último índice del bloque.
+    grupo = datos["_esc"] * 10000 + datos["Year"]
+    inicios = np.flatnonzero(np.r_[True, grupo[1:] != grupo[:-1]])
+    finales = np.r_[inicios[1:], len(grupo)] - 1
+
+    esc = datos["_esc"][inicios]
+    anio = datos["Year"][inicios]
+    aporte_acum = datos["Aporte_Acum"][finales]
+    retiro = np.add.reduceat(datos["Retiro"], inicios)
+    valor_cuenta = datos["Valor_Cuenta"][finales]
+
+    primero = np.r_[True, esc[1:] != esc[:-1]]
+    inicio_escenario = np.maximum.accumulate(np.where(primero, np.arange(len(esc)), 0))
+
+    saldo_inicial = np.where(primero, 0.0, np.r_[0.0, valor_cuenta[:-1]])
+    aporte_nuevo = aporte_acum - np.where(primero, 0.0, np.r_[0.0, aporte_acum[:-1]])
+    ganancia = valor_cuenta - saldo_inicial - aporte_nuevo + retiro
+
+    base_calculo = saldo_inicial + aporte_nuevo
+    retiro_total = np.cumsum(retiro)
+    retiro_acumulado = retiro_total - np.r_[0.0, retiro_total][inicio_escenario]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rendimiento = np.where(base_calculo != 0, ganancia / base_calculo * 100, 0.0)
+        rendimiento_acumulado = np.where(
+            aporte_acum != 0,
+            (valor_cuenta + retiro_acumulado - aporte_acum) / aporte_acum * 100,
+            0.0
+        )
+
+    desde, hasta = rango_meses(esc, anio)
+    nombres = np.array(LISTA_MESES, dtype=object)
+    claves = [clave for clave, _, _, _ in items]
+
+    return pd.DataFrame({
+        "Escenario": [claves[c] for c in esc],
+        "Periodo_N": np.arange(len(esc)) - inicio_escenario + 1,
+        "Periodo_Label": nombres[desde - 1] + " - " + nombres[hasta - 1] + " " + anio.astype(str).astype(object),
+        "Aporte_Acum": aporte_acum,
+        "Retiro": retiro,
+        "Valor_Cuenta": valor_cuenta,
+        "Valor_Rescate": datos["Valor_Rescate"][finales],
+        "Rendimiento": rendimiento,
+        "Rendimiento_Acumulado": rendimiento_acumulado,
+        "Etapa": datos["Etapa"][finales],
+    })
+
+
+def preparar_tabla_mostrar(resumen: pd.DataFrame) -> pd.DataFrame:
+    mostrar = resumen.copy().rename(columns={
+        "Periodo_N": "Año",
+        "Periodo_Label": "Meses",
+        "Aporte_Acum": "Aporte acumulado",
+        "Retiro": "Retiro",
+        "Valor_Cuenta": "Valor en cuenta",
+        "Valor_Rescate": "Valor de rescate",
+        "Rendimiento": "Rendimiento",
+        "Rendimiento_Acumulado": "Rendimiento acumulado"
+    })
+
+    columnas_orden = [
+        "Año",
+        "Meses",
+        "Aporte acumulado",
+        "Retiro",
+        "Valor en cuenta",
+        "Valor de rescate",
+        "Rendimiento",
+        "Rendimiento acumulado"
+    ]
+
+    if "Etapa" in mostrar.columns:
+        columnas_orden.append("Etapa")
+
+    return mostrar[columnas_orden]
+
+
+def preparar_tabla_exportar(mostrar: pd.DataFrame) -> pd.DataFrame:
+    """Tabla de ``preparar_tabla_mostrar`` con montos y porcentajes ya formateados."""
+    tabla_export = mostrar.copy()
+    for columna in ("Aporte acumulado", "Retiro", "Valor en cuenta", "Valor de rescate"):
+        tabla_export[columna] = tabla_export[columna].map(fmt_usd)
+    for columna in ("Rendimiento", "Rendimiento acumulado"):
+        tabla_export[columna] = tabla_export[columna].map(fmt_pct)
+    return tabla_export
@@ -0,0 +1,330 @@
+"""
+API HTTP local con los mismos números que las ilustraciones, para otros
+sistemas internos (CRM, cotizador). Sólo usa la biblioteca estándar:
+
+    python -m ilustraciones.servidor --puerto 8765 --trabajadores 4
+
+Endpoints (cuerpo JSON con los campos de un cliente de la línea de
+comandos: ``plan``, ``monto``, ``frecuencia``, ``inicio``, ``aportes_extra``,
+``retiros``, ``resolucion``, ``nombre``):
+
+- ``GET /salud``: estado y versión de la serie de mercado.
+- ``POST /simular``: resultado mensual completo.
+- ``POST /resumen``: resumen anual y rendimiento.
+- ``POST /xirr``: XIRR de la ilustración, o de ``{"flujos": [[fecha, monto], ...]}``.
+- ``POST /pdf``: ilustración completa en PDF.
+- ``POST /lote``: ``{"operacion": "resumen", "clientes": [...]}``, en paralelo.
+
+Los cálculos corren en un pool acotado de procesos; cada proceso abre el
+almacén de mercado una vez (memmap compartido por la caché de páginas) y
+guarda sus resultados en una ``CacheLRU``. Con el pool y la cola llenos
+responde 503; cada cliente de un lote cuenta como una simulación.
+"""
+import argparse
+import json
+import os
+import signal
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import wait as esperar
+from concurrent.futures import TimeoutError as TiempoAgotado
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from .cache import CacheLRU
+from .cli import calcular_trabajo, iniciar_trabajador, preparar_trabajo
+from .config import (
+    CACHE_RESULTADOS_MAX_BYTES,
+    CACHE_RESULTADOS_MAX_ENTRADAS,
+    CACHE_RESULTADOS_TTL,
+    SERVIDOR_COLA,
+    SERVIDOR_HOST,
+    SERVIDOR_MAX_LOTE,
+    SERVIDOR_PUERTO,
+    SERVIDOR_TIMEOUT,
+)
+from .exportar import subtitulo_ilustracion
+from .mercado import cargar_serie_mercado, leer_metadatos_almacen
+from .rendimiento import calcular_rendimiento_resumen, extraer_flujos_xirr, xirr, xirr_lote
+from .reporte import generar_pdf_completo
+from .simulacion import detectar_planes_csv
+
+OPERACIONES = ("simular", "resumen", "xirr", "pdf")
+
+# Estado de cada proceso de trabajo.
+_PLANES = None
+_CACHE = None
+
+
+def _cache() -> CacheLRU:
+    global _CACHE
+    if _CACHE is None:
+        _CACHE = CacheLRU(
+            max_entradas=CACHE_RESULTADOS_MAX_ENTRADAS,
+            max_bytes=CACHE_RESULTADOS_MAX_BYTES,
+            ttl_segundos=CACHE_RESULTADOS_TTL
+        )
+    return _CACHE
+
+
+def _planes() -> dict:
+    global _PLANES
+    if _PLANES is None:
+        _PLANES = detectar_planes_csv()
+    return _PLANES
+
+
+def _registros(df: pd.DataFrame) -> list:
+    fechas = {c: df[c].dt.strftime("%Y-%m-%d") for c in df.columns if pd.api.types.is_datetime64_any_dtype(df[c])}
+    return json.loads(df.assign(**fechas).to_json(orient="records"))
+
+
+def atender(operacion: str, cuerpo: dict):
+    """
+    Resuelve una operación en el proceso de trabajo. Devuelve un dict
+    serializable a JSON, o ``bytes`` para ``pdf``.
+    """
+    if operacion == "xirr" and "flujos" in cuerpo:
+        flujos = [(pd.Timestamp(fecha), float(monto)) for fecha, monto in cuerpo["flujos"]]
+        return {"xirr": xirr(flujos)}
+
+    trabajo = preparar_trabajo(cuerpo, _planes())
+    df_resultado, resumen = calcular_trabajo(trabajo, cache=_cache())
+    clave = df_resultado.attrs.get("clave_ilustracion")
+
+    if operacion == "simular":
+        return {"clave": clave, "meses": _registros(df_resultado)}
+
+    if operacion == "resumen":
+        etiqueta, tasa = calcular_rendimiento_resumen(df_resultado, resumen, trabajo["tipo_plan"])
+        return {
+            "clave": clave,
+            "rendimiento": {"etiqueta": etiqueta, "porcentaje": float(tasa)},
+            "anual": _registros(resumen),
+        }
+
+    if operacion == "xirr":
+        tiempos, montos = extraer_flujos_xirr(df_resultado, float(resumen["Valor_Cuenta"].iloc[-1]))
+        tasa = xirr_lote(tiempos, montos)[0]
+        return {"clave": clave, "xirr": None if np.isnan(tasa) else float(tasa)}
+
+    if operacion == "pdf":
+        subtitulo = subtitulo_ilustracion(
+            trabajo["tipo_plan"], trabajo["monto"], trabajo["frecuencia_pago"], trabajo["aportes_extra"],
+            trabajo["resolucion"] == "Diaria"
+        )
+        return generar_pdf_completo(
+            df_resultado, resumen, trabajo["seleccion"], trabajo["nombre"], subtitulo, trabajo["tipo_plan"]
+        )
+
+    raise ValueError(f"Operación desconocida: {operacion!r}")
+
+
+class ServicioSaturado(RuntimeError):
+    pass
+
+
+class ServicioSimulacion:
+    """
+    Pool de procesos con admisión acotada por simulaciones, no por pedidos:
+    a lo sumo ``trabajadores + cola`` simulaciones en curso o en espera,
+    contando cada cliente de un lote. Lo que no entra se rechaza en lugar de
+    encolarse sin límite.
+    """
+
+    def __init__(self, trabajadores: int = None, cola: int = SERVIDOR_COLA, timeout: float = SERVIDOR_TIMEOUT):
+        self.trabajadores = trabajadores or os.cpu_count() or 1
+        self.capacidad = self.trabajadores + cola
+        self.timeout = timeout
+        self._en_curso = 0
+        self._lock = threading.Lock()
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.trabajadores, initializer=iniciar_trabajador, initargs=(os.getcwd(),)
+        )
+
+    def _admitir(self, cantidad: int):
+        with self._lock:
+            if self._en_curso + cantidad > self.capacidad:
+                raise ServicioSaturado("Servicio saturado; reintente en unos segundos.")
+            self._en_curso += cantidad
+
+    def _liberar(self, cantidad: int = 1):
+        with self._lock:
+            self._en_curso -= cantidad
+
+    def _enviar(self, operacion: str, cuerpos: list) -> list:
+        """
+        Admite y envía una simulación por cuerpo. Cada una devuelve su cupo
+        al terminar, no cuando vence la espera del pedido: mientras ocupe el
+        pool, ocupa la cola.
+        """
+        self._admitir(len(cuerpos))
+        futuros = []
+        try:
+            for cuerpo in cuerpos:
+                futuro = self._pool.submit(atender, operacion, cuerpo)
+                futuro.add_done_callback(lambda _: self._liberar())
+                futuros.append(futuro)
+        finally:
+            self._liberar(len(cuerpos) - len(futuros))
+        return futuros
+
+    def ejecutar(self, operacion: str, cuerpo: dict):
+        futuro, = self._enviar(operacion, [cuerpo])
+        try:
+            return futuro.result(timeout=self.timeout)
+        except TiempoAgotado:
+            # Si todavía no empezó, deja de ocupar el pool.
+            futuro.cancel()
+            raise
+
+    def lote(self, operacion: str, clientes: list) -> list:
+        """
+        Un pedido con varios clientes, repartidos en el pool y con un único
+        plazo para todo el lote. El error de un cliente (datos inválidos,
+        tiempo agotado, un proceso caído) queda en su fila y no afecta al
+        resto.
+        """
+        if operacion not in OPERACIONES or operacion == "pdf":
+            raise ValueError(f"Operación inválida para un lote: {operacion!r}")
+        if len(clientes) > min(SERVIDOR_MAX_LOTE, self.capacidad):
+            raise ValueError(f"El lote supera {min(SERVIDOR_MAX_LOTE, self.capacidad)} clientes.")
+
+        futuros = self._enviar(operacion, clientes)
+        _, pendientes = esperar(futuros, timeout=self.timeout)
+        for futuro in pendientes:
+            futuro.cancel()
+
+        resultados = []
+        for futuro in futuros:
+            if futuro in pendientes:
+                resultados.append({"estado": "error", "error": "La simulación superó el tiempo máximo."})
+                continue
+            try:
+                resultados.append({"estado": "ok", **futuro.result()})
+            except Exception as e:
+                resultados.append({"estado": "error", "error": _mensaje(e)})
+        return resultados
+
+    def cerrar(self):
+        self._pool.shutdown(cancel_futures=True)
+
+
+def _mensaje(e: Exception) -> str:
+    if isinstance(e, KeyError):
+        return f"Falta el campo {e.args[0]!r}."
+    if isinstance(e, ValueError):
+        return str(e)
+    return f"{type(e).__name__}: {e}"
+
+
+class ManejadorAPI(BaseHTTPRequestHandler):
+    servicio = None
+    silencioso = True
+
+    def _responder(self, codigo: int, cuerpo, tipo: str = "application/json"):
+        datos = cuerpo if isinstance(cuerpo, bytes) else json.dumps(cuerpo, ensure_ascii=False).encode("utf-8")
+        self.send_response(codigo)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(datos)))
+        if codigo == 503:
+            self.send_header("Retry-After", "2")
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def do_GET(self):
+        if self.path.rstrip("/") != "/salud":
+            self._responder(404, {"error": "No encontrado."})
+            return
+        metadatos = leer_metadatos_almacen() or {}
+        self._responder(200, {
+            "estado": "ok",
+            "version_mercado": metadatos.get("version"),
+            "hasta": metadatos.get("hasta"),
+            "trabajadores": self.servicio.trabajadores,
+        })
+
+    def do_POST(self):
+        operacion = self.path.strip("/")
+        if operacion not in OPERACIONES + ("lote",):
+            self._responder(404, {"error": "No encontrado."})
+            return
+
+        try:
+            largo = int(self.headers.get("Content-Length", 0))
+            cuerpo = json.loads(self.rfile.read(largo) or b"{}")
+            if not isinstance(cuerpo, dict):
+                raise ValueError("El cuerpo debe ser un objeto JSON.")
+
+            if operacion == "lote":
+                resultado = {"resultados": self.servicio.lote(cuerpo.get("operacion", "resumen"), cuerpo["clientes"])}
+            else:
+                resultado = self.servicio.ejecutar(operacion, cuerpo)
+        except ServicioSaturado as e:
+            self._responder(503, {"error": str(e)})
+        except TiempoAgotado:
+            self._responder(504, {"error": "La simulación superó el tiempo máximo."})
+        except (KeyError, ValueError) as e:
+            self._responder(400, {"error": _mensaje(e)})
+        except Exception as e:
+            self._responder(500, {"error": f"{type(e).__name__}: {e}"})
+        else:
+            if isinstance(resultado, bytes):
+                self._responder(200, resultado, "application/pdf")
+            else:
+                self._responder(200, resultado)
+
+    def log_message(self, formato, *args):
+        if not self.silencioso:
+            super().log_message(formato, *args)
+
+
+def crear_servidor(
+    host: str = SERVIDOR_HOST,
+    puerto: int = SERVIDOR_PUERTO,
+    trabajadores: int = None,
+    cola: int = SERVIDOR_COLA,
+    silencioso: bool = True
+) -> ThreadingHTTPServer:
+    """Importa la serie de mercado una vez y arma el servidor (sin iniciarlo)."""
+    cargar_serie_mercado()
+    servicio = ServicioSimulacion(trabajadores, cola)
+    manejador = type("Manejador", (ManejadorAPI,), {"servicio": servicio, "silencioso": silencioso})
+    servidor = ThreadingHTTPServer((host, puerto), manejador)
+    servidor.servicio = servicio
+    return servidor
+
+
+def _detener(signum, frame):
+    raise KeyboardInterrupt
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m ilustraciones.servidor", description="API HTTP local de simulación.")
+    parser.add_argument("--host", default=SERVIDOR_HOST)
+    parser.add_argument("--puerto", type=int, default=SERVIDOR_PUERTO)
+    parser.add_argument("--trabajadores", type=int, default=None, help="procesos de cálculo (por defecto, uno por CPU)")
+    parser.add_argument("--cola", type=int, default=SERVIDOR_COLA, help="simulaciones en espera antes de responder 503")
+    parser.add_argument("--registro", action="store_true", help="registrar cada pedido en stderr")
+    args = parser.parse_args(argv)
+
+    servidor = crear_servidor(args.host, args.puerto, args.trabajadores, args.cola, silencioso=not args.registro)
+    # SIGTERM sale igual que Ctrl+C, así se cierra el pool y no quedan
+    # procesos de trabajo huérfanos.
+    signal.signal(signal.SIGTERM, _detener)
+    print(f"Escuchando en http://{args.host}:{servidor.server_address[1]}", file=sys.stderr, flush=True)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        servidor.servicio.cerrar()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
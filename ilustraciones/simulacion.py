@@ -0,0 +1,971 @@
+"""Motores MIS/MSS (mensual, vectorizado y diario) y barrido histórico."""
+import os
+
+import numpy as np
+import pandas as pd
+
+from .cache import CacheDisco, CacheLRU, clave_ilustracion
+from .config import AMC_ANUAL, DIARIO_CELDAS_POR_BLOQUE, FACTORES_COSTOS, MAPA_PASOS_PAGO
+from .mercado import _indice_neto, crecimiento_neto, version_mercado
+from .rendimiento import calcular_rendimiento_resumen, xirr_lote
+from .resumen import construir_resumen_anual
+
+
+def detectar_planes_csv(directorio: str = "."):
+    archivos = [f for f in os.listdir(directorio) if f.lower().endswith(".csv")]
+    planes = {}
+
+    for f in archivos:
+        nombre = f.lower()
+
+        if "mis" in nombre:
+            planes["MIS - Aporte Único"] = (f, 0, "MIS")
+
+        elif "mss" in nombre:
+            plazo = None
+
+            for i in range(5, 21):
+                patrones = [
+                    f"mss - {i}",
+                    f"mss-{i}",
+                    f"mss {i}",
+                    f" {i} años",
+                    f" {i} anos",
+                ]
+                if any(p in nombre for p in patrones):
+                    plazo = i
+                    break
+
+            if plazo is None:
+                for i in range(5, 21):
+                    if nombre.endswith(f"{i}.csv"):
+                        plazo = i
+                        break
+
+            if plazo is not None:
+                planes[f"MSS - {plazo} Años"] = (f, plazo, "MSS")
+
+    return planes
+
+
+def simular_mis(
+    df_base: pd.DataFrame,
+    monto_inicial: float,
+    anio_inicio: int,
+    mes_inicio: int,
+    aportes_extra: list,
+    retiros_programados: list
+) -> pd.DataFrame:
+    df = _filtrar_desde_inicio(df_base, anio_inicio, mes_inicio)
+    retornos_netos = df["Retorno_Neto"].values
+
+    cubetas = [{
+        "monto": float(monto_inicial),
+        "saldo": 0.0,
+        "edad": 0,
+        "activa": False,
+        "ini": (anio_inicio, mes_inicio)
+    }]
+
+    for extra in aportes_extra:
+        cubetas.append({
+            "monto": float(extra["monto"]),
+            "saldo": 0.0,
+            "edad": 0,
+            "activa": False,
+            "ini": (int(extra["anio"]), int(extra["mes"]))
+        })
+
+    lista_vn, lista_vr, lista_aportes_acum, lista_retiros = [], [], [], []
+    acumulado_aportes = 0.0
+
+    for i in range(len(df)):
+        fecha_act = df["Date"].iloc[i]
+        anio_act, mes_act = fecha_act.year, fecha_act.month
+
+        retiro_mes = 0.0
+        for r in retiros_programados:
+            if int(r["anio"]) == anio_act and int(r["mes"]) == mes_act:
+                retiro_mes += float(r["monto"])
+        lista_retiros.append(retiro_mes)
+
+        saldo_total_previo = sum(c["saldo"] for c in cubetas if c["activa"])
+
+        vn_mes_total = 0.0
+        vr_mes_total = 0.0
+
+        for c in cubetas:
+            if not c["activa"] and (
+                anio_act > c["ini"][0] or
+                (anio_act == c["ini"][0] and mes_act >= c["ini"][1])
+            ):
+                c["activa"] = True
+                c["saldo"] = c["monto"]
+                acumulado_aportes += c["monto"]
+                saldo_total_previo += c["monto"]
+
+            if c["activa"]:
+                if c["edad"] > 0:
+                    c["saldo"] *= (1 + retornos_netos[i])
+
+                if retiro_mes > 0 and saldo_total_previo > 0:
+                    peso = c["saldo"] / saldo_total_previo if saldo_total_previo > 0 else 0
+                    deduccion_retiro = retiro_mes * peso
+                    c["saldo"] = max(0.0, c["saldo"] - deduccion_retiro)
+
+                costo_establecimiento = (c["monto"] * 0.016) / 12.0
+                if c["edad"] < 60:
+                    c["saldo"] -= costo_establecimiento
+                else:
+                    c["saldo"] -= (c["saldo"] * (0.01 / 12.0))
+
+                c["saldo"] = max(0.0, c["saldo"])
+
+                penalizacion = 0.0
+                if c["edad"] < 60:
+                    meses_restantes = 60 - (c["edad"] + 1)
+                    penalizacion = meses_restantes * costo_establecimiento
+
+                vr_cubeta = max(0.0, c["saldo"] - penalizacion)
+
+                vn_mes_total += c["saldo"]
+                vr_mes_total += vr_cubeta
+                c["edad"] += 1
+
+        lista_vn.append(vn_mes_total)
+        lista_vr.append(vr_mes_total)
+        lista_aportes_acum.append(acumulado_aportes)
+
+    df["Aporte_Acum"] = lista_aportes_acum
+    df["Valor_Cuenta"] = lista_vn
+    df["Valor_Rescate"] = lista_vr
+    df["Retiro"] = lista_retiros
+    df["Mes_Plan"] = range(1, len(df) + 1)
+    return df
+
+
+def simular_mss(
+    df_base: pd.DataFrame,
+    plazo_anios: int,
+    monto_aporte: float,
+    frecuencia_pago: str,
+    anio_inicio: int,
+    mes_inicio: int,
+    retiros_programados: list
+) -> pd.DataFrame:
+    df = _filtrar_desde_inicio(df_base, anio_inicio, mes_inicio)
+    retornos_netos = df["Retorno_Neto"].values
+
+    step_meses = MAPA_PASOS_PAGO[frecuencia_pago]
+    pagos_anio = 12 / step_meses
+    aporte_anual = monto_aporte * pagos_anio
+
+    factor1, factor2 = FACTORES_COSTOS.get(plazo_anios, (0, 0))
+    costo_total_apertura = (aporte_anual * factor1) + (aporte_anual * factor2)
+    meses_totales = plazo_anios * 12
+    deduccion_mensual = costo_total_apertura / meses_totales if meses_totales > 0 else 0
+
+    lista_vn, lista_vr, lista_aportes_acum, lista_retiros, lista_etapa = [], [], [], [], []
+    saldo_actual = 0.0
+    aporte_acumulado = 0.0
+
+    for i in range(len(df)):
+        fecha_act = df["Date"].iloc[i]
+
+        if i < meses_totales and i % step_meses == 0:
+            saldo_actual += monto_aporte
+            aporte_acumulado += monto_aporte
+
+        if i > 0:
+            saldo_actual *= (1 + retornos_netos[i])
+
+        retiro_mes = 0.0
+        for r in retiros_programados:
+            if int(r["anio"]) == fecha_act.year and int(r["mes"]) == fecha_act.month:
+                retiro_mes += float(r["monto"])
+        lista_retiros.append(retiro_mes)
+
+        if retiro_mes > 0:
+            saldo_actual = max(0.0, saldo_actual - retiro_mes)
+
+        if i < meses_totales:
+            saldo_actual -= deduccion_mensual
+            meses_restantes = meses_totales - (i + 1)
+            penalizacion = meses_restantes * deduccion_mensual if meses_restantes > 0 else 0
+            valor_rescate = max(0.0, saldo_actual - penalizacion)
+            etapa = "Acumulación"
+        else:
+            saldo_actual -= (saldo_actual * (0.01 / 12.0))
+            valor_rescate = max(0.0, saldo_actual)
+            etapa = "Post-maduración"
+
+        saldo_actual = max(0.0, saldo_actual)
+
+        lista_vn.append(saldo_actual)
+        lista_vr.append(valor_rescate)
+        lista_aportes_acum.append(aporte_acumulado)
+        lista_etapa.append(etapa)
+
+    df["Aporte_Acum"] = lista_aportes_acum
+    df["Valor_Cuenta"] = lista_vn
+    df["Valor_Rescate"] = lista_vr
+    df["Retiro"] = lista_retiros
+    df["Etapa"] = lista_etapa
+    df["Mes_Plan"] = range(1, len(df) + 1)
+    return df
+
+
+# --- MOTOR VECTORIZADO ---
+def _filtrar_desde_inicio(df_base: pd.DataFrame, anio_inicio: int, mes_inicio: int) -> pd.DataFrame:
+    fecha_filtro = pd.Timestamp(year=anio_inicio, month=mes_inicio, day=1) + pd.offsets.MonthEnd(0)
+    df = df_base[df_base["Date"] >= fecha_filtro].reset_index(drop=True)
+
+    if df.empty:
+        raise ValueError("No hay datos históricos disponibles desde la fecha seleccionada.")
+
+    df["Year"] = df["Date"].dt.year
+    return df
+
+
+def _montos_por_mes(fechas: pd.Series, movimientos: list) -> np.ndarray:
+    """
+    Suma los movimientos ({"monto", "anio", "mes"}) en cada fila de
+    ``fechas`` que cae en su mismo año y mes.
+    """
+    montos = np.zeros(len(fechas))
+    if not movimientos:
+        return montos
+
+    meses_serie = (fechas.dt.year * 12 + fechas.dt.month - 1).to_numpy()
+    meses_mov = np.array([int(m["anio"]) * 12 + int(m["mes"]) - 1 for m in movimientos])
+    valores = np.array([float(m["monto"]) for m in movimientos])
+
+    coincide = meses_serie[:, None] == meses_mov[None, :]
+    return montos + coincide.astype(float) @ valores
+
+
+def _escanear_afin(a: np.ndarray, b: np.ndarray, inicial) -> np.ndarray:
+    """
+    Resuelve s_t = a_t * s_(t-1) + b_t sobre el último eje con productos y
+    sumas acumuladas, sin recorrer los meses en Python.
+    """
+    producto = np.cumprod(a, axis=-1)
+    return producto * (np.asarray(inicial, dtype=float)[..., None] + np.cumsum(b / producto, axis=-1))
+
+
+def _componer_saldos_mss(
+    crecimiento: np.ndarray,
+    aportes: np.ndarray,
+    retiros: np.ndarray,
+    factor_fee: np.ndarray,
+    deduccion: np.ndarray
+) -> np.ndarray:
+    """
+    Cada mes: saldo = max(0, ((saldo + aporte) * crecimiento - retiro) * factor_fee - deduccion),
+    con piso en cero también después del retiro.
+
+    Mientras ningún piso se activa la recurrencia es afín y se resuelve de una
+    sola pasada; si un mes cae bajo cero se calcula ese mes con los pisos y se
+    retoma el escaneo desde ahí.
+    """
+    n = len(crecimiento)
+    a = crecimiento * factor_fee
+    b = (aportes * crecimiento - retiros) * factor_fee - deduccion
+
+    saldos = np.empty(n)
+    inicio, previo = 0, 0.0
+
+    while inicio < n:
+        tramo = _escanear_afin(a[inicio:], b[inicio:], previo)
+        anteriores = np.concatenate(([previo], tramo[:-1]))
+        antes_fee = (anteriores + aportes[inicio:]) * crecimiento[inicio:] - retiros[inicio:]
+        bajo_cero = (tramo < 0) | ((retiros[inicio:] > 0) & (antes_fee < 0))
+
+        if not bajo_cero.any():
+            saldos[inicio:] = tramo
+            break
+
+        j = int(bajo_cero.argmax())
+        k = inicio + j
+        saldos[inicio:k] = tramo[:j]
+
+        saldo = (anteriores[j] + aportes[k]) * crecimiento[k]
+        if retiros[k] > 0:
+            saldo = max(0.0, saldo - retiros[k])
+        saldos[k] = max(0.0, saldo * factor_fee[k] - deduccion[k])
+
+        previo = saldos[k]
+        inicio = k + 1
+
+    return saldos
+
+
+def _componer_cubetas(
+    crecimiento: np.ndarray,
+    factor_fee: np.ndarray,
+    resta: np.ndarray,
+    entrada: np.ndarray,
+    activa: np.ndarray,
+    nueva: np.ndarray,
+    retiros: np.ndarray,
+    inicial: np.ndarray = None
+) -> np.ndarray:
+    """
+    Saldos cubetas x períodos de ``saldo = max(0, (saldo * crecimiento + entrada
+    - retiro prorrateado) * factor_fee - resta)``, partiendo de ``inicial``
+    (ceros si no se indica). Los tramos sin retiros se componen por cubeta en
+    una pasada; los períodos con retiro (o con algún saldo bajo cero) se
+    resuelven como un paso vectorial sobre las cubetas.
+    """
+    cubetas, n = crecimiento.shape
+    a = crecimiento * factor_fee
+    b = a * entrada - resta
+
+    def paso_exacto(i: int, previo: np.ndarray) -> np.ndarray:
+        previas = activa[:, i] & ~nueva[:, i]
+        saldo = np.where(previas, previo * crecimiento[:, i], entrada[:, i])
+
+        if retiros[i] > 0:
+            saldo_total_previo = previo[previas].sum() + np.cumsum(entrada[:, i])
+            aplica = activa[:, i] & (saldo_total_previo > 0)
+            peso = np.divide(saldo, saldo_total_previo, out=np.zeros_like(saldo), where=aplica)
+            saldo = np.where(aplica, np.maximum(0.0, saldo - retiros[i] * peso), saldo)
+
+        saldo = saldo * factor_fee[:, i] - resta[:, i]
+        return np.where(activa[:, i], np.maximum(0.0, saldo), 0.0)
+
+    saldos = np.zeros((cubetas, n))
+    meses_retiro = np.flatnonzero(retiros > 0)
+    previo = np.zeros(cubetas) if inicial is None else inicial
+    inicio = 0
+
+    while inicio < n:
+        if retiros[inicio] > 0:
+            previo = saldos[:, inicio] = paso_exacto(inicio, previo)
+            inicio += 1
+            continue
+
+        siguiente = np.searchsorted(meses_retiro, inicio, side="right")
+        fin = meses_retiro[siguiente] if siguiente < len(meses_retiro) else n
+
+        tramo = _escanear_afin(a[:, inicio:fin], b[:, inicio:fin], previo)
+        bajo_cero = (tramo < 0).any(axis=0)
+
+        if not bajo_cero.any():
+            saldos[:, inicio:fin] = tramo
+            previo = tramo[:, -1]
+            inicio = fin
+            continue
+
+        j = int(bajo_cero.argmax())
+        k = inicio + j
+        saldos[:, inicio:k] = tramo[:, :j]
+        if j > 0:
+            previo = tramo[:, j - 1]
+        previo = saldos[:, k] = paso_exacto(k, previo)
+        inicio = k + 1
+
+    return saldos
+
+
+def simular_mss_vectorizado(
+    df_base: pd.DataFrame,
+    plazo_anios: int,
+    monto_aporte: float,
+    frecuencia_pago: str,
+    anio_inicio: int,
+    mes_inicio: int,
+    retiros_programados: list
+) -> pd.DataFrame:
+    """
+    Misma ilustración que ``simular_mss``, construida con arreglos:
+    aportes, deducciones, retiros y el 1% post-maduración se arman por
+    adelantado y el saldo se compone sobre ``Retorno_Neto`` en una pasada.
+    """
+    df = _filtrar_desde_inicio(df_base, anio_inicio, mes_inicio)
+    n = len(df)
+    mes_plan = np.arange(n)
+
+    step_meses = MAPA_PASOS_PAGO[frecuencia_pago]
+    aporte_anual = monto_aporte * (12 / step_meses)
+
+    factor1, factor2 = FACTORES_COSTOS.get(plazo_anios, (0, 0))
+    costo_total_apertura = (aporte_anual * factor1) + (aporte_anual * factor2)
+    meses_totales = plazo_anios * 12
+    deduccion_mensual = costo_total_apertura / meses_totales if meses_totales > 0 else 0
+
+    acumulacion = mes_plan < meses_totales
+    aportes = np.where(acumulacion & (mes_plan % step_meses == 0), float(monto_aporte), 0.0)
+    retiros = _montos_por_mes(df["Date"], retiros_programados)
+
+    crecimiento = 1 + df["Retorno_Neto"].to_numpy(dtype=float)
+    crecimiento[0] = 1.0
+
+    saldos = _componer_saldos_mss(
+        crecimiento,
+        aportes,
+        retiros,
+        factor_fee=np.where(acumulacion, 1.0, 1 - 0.01 / 12.0),
+        deduccion=np.where(acumulacion, deduccion_mensual, 0.0)
+    )
+
+    meses_restantes = meses_totales - (mes_plan + 1)
+    penalizacion = np.where(acumulacion & (meses_restantes > 0), meses_restantes * deduccion_mensual, 0.0)
+
+    df["Aporte_Acum"] = np.cumsum(aportes)
+    df["Valor_Cuenta"] = saldos
+    df["Valor_Rescate"] = np.maximum(0.0, saldos - penalizacion)
+    df["Retiro"] = retiros
+    df["Etapa"] = np.where(acumulacion, "Acumulación", "Post-maduración")
+    df["Mes_Plan"] = mes_plan + 1
+    return df
+
+
+def simular_mis_vectorizado(
+    df_base: pd.DataFrame,
+    monto_inicial: float,
+    anio_inicio: int,
+    mes_inicio: int,
+    aportes_extra: list,
+    retiros_programados: list
+) -> pd.DataFrame:
+    """
+    Misma ilustración que ``simular_mis`` con las cubetas como una matriz
+    cubetas x meses. Activación, edad, costo de establecimiento (primeros 60
+    meses) y AMC del 1% se precalculan y el saldo se compone con
+    ``_componer_cubetas``.
+    """
+    df = _filtrar_desde_inicio(df_base, anio_inicio, mes_inicio)
+    n = len(df)
+
+    montos = np.array([float(monto_inicial)] + [float(extra["monto"]) for extra in aportes_extra])
+    meses_inicio = np.array(
+        [anio_inicio * 12 + mes_inicio - 1] +
+        [int(extra["anio"]) * 12 + int(extra["mes"]) - 1 for extra in aportes_extra]
+    )
+    meses_serie = (df["Date"].dt.year * 12 + df["Date"].dt.month - 1).to_numpy()
+    activacion = np.searchsorted(meses_serie, meses_inicio, side="left")
+
+    edad = np.arange(n)[None, :] - activacion[:, None]
+    activa = edad >= 0
+    establecimiento = activa & (edad < 60)
+    nueva = edad == 0
+
+    costo_establecimiento = (montos * 0.016) / 12.0
+    retornos_netos = df["Retorno_Neto"].to_numpy(dtype=float)
+
+    crecimiento = np.where(edad > 0, 1 + retornos_netos[None, :], 1.0)
+    factor_fee = np.where(edad >= 60, 1 - 0.01 / 12.0, 1.0)
+    resta = np.where(establecimiento, costo_establecimiento[:, None], 0.0)
+    entrada = np.where(nueva, montos[:, None], 0.0)
+
+    retiros = _montos_por_mes(df["Date"], retiros_programados)
+    saldos = _componer_cubetas(crecimiento, factor_fee, resta, entrada, activa, nueva, retiros)
+
+    penalizacion = np.where(establecimiento, (60 - (edad + 1)) * costo_establecimiento[:, None], 0.0)
+    aportes_mes = np.bincount(activacion[activacion < n], weights=montos[activacion < n], minlength=n)
+
+    df["Aporte_Acum"] = np.cumsum(aportes_mes)
+    df["Valor_Cuenta"] = saldos.sum(axis=0)
+    df["Valor_Rescate"] = np.maximum(0.0, saldos - penalizacion).sum(axis=0)
+    df["Retiro"] = retiros
+    df["Mes_Plan"] = np.arange(1, n + 1)
+    return df
+
+
+# --- MODO DIARIO ---
+def _filtrar_diario_desde(df_diario: pd.DataFrame, fecha_inicio: pd.Timestamp) -> pd.DataFrame:
+    df = df_diario[df_diario["Date"] >= pd.Timestamp(fecha_inicio)].reset_index(drop=True)
+
+    if df.empty:
+        raise ValueError("No hay datos históricos disponibles desde la fecha seleccionada.")
+
+    return df
+
+
+def _calendario_diario(df: pd.DataFrame, amc_anual: float):
+    """
+    Crecimiento neto por día hábil (AMC prorrateado entre los días hábiles de
+    cada mes, de modo que el producto del mes coincide con el factor mensual),
+    posición del mes de cada día contada desde el primero y marca del último
+    día hábil de cada mes.
+    """
+    precios = df["Price"].to_numpy(dtype=float)
+    meses = df["Date"].to_numpy().astype("datetime64[M]")
+
+    nuevo_mes = np.r_[True, meses[1:] != meses[:-1]]
+    mes_pos = np.cumsum(nuevo_mes) - 1
+    fin_mes = np.r_[nuevo_mes[1:], True]
+    dias_mes = np.bincount(mes_pos)[mes_pos]
+
+    crecimiento = np.ones(len(precios))
+    crecimiento[1:] = precios[1:] / precios[:-1] * (1 - amc_anual) ** (1 / (12 * dias_mes[1:]))
+    return crecimiento, mes_pos, fin_mes
+
+
+def _fecha_movimiento(anio: int, mes: int, dia=None) -> np.datetime64:
+    """Fecha de un movimiento; sin ``dia`` cae en el último día del mes."""
+    primero = np.datetime64(f"{int(anio):04d}-{int(mes):02d}", "M")
+    ultimo = (primero + 1).astype("datetime64[D]") - 1
+    if dia is None:
+        return ultimo
+    return min(primero.astype("datetime64[D]") + int(dia) - 1, ultimo)
+
+
+def _indices_diarios(dias: np.ndarray, fechas: np.ndarray, descartar_previas: bool = True) -> np.ndarray:
+    """
+    Posición del día hábil en que se aplica cada fecha: el mismo día o el
+    siguiente, salvo que el mes ya no tenga días hábiles, en cuyo caso se usa
+    el último del mes. Las fechas sin día hábil posterior (y, con
+    ``descartar_previas``, las anteriores a la serie) devuelven ``len(dias)``.
+    """
+    n = len(dias)
+    fechas = np.asarray(fechas, dtype="datetime64[D]")
+    meses = fechas.astype("datetime64[M]")
+
+    idx = np.searchsorted(dias, fechas, side="left")
+    pasa_de_mes = (idx == n) | (dias[np.minimum(idx, n - 1)].astype("datetime64[M]") > meses)
+    anterior_en_mes = (idx > 0) & (dias[np.maximum(idx - 1, 0)].astype("datetime64[M]") == meses)
+    idx = np.where(pasa_de_mes & anterior_en_mes, idx - 1, idx)
+
+    if descartar_previas:
+        idx = np.where(fechas < dias[0], n, idx)
+    return idx
+
+
+def _montos_por_dia(dias: np.ndarray, movimientos: list) -> np.ndarray:
+    """Suma los movimientos ({"monto", "anio", "mes", "dia" opcional}) en su día hábil."""
+    n = len(dias)
+    if not movimientos:
+        return np.zeros(n)
+
+    fechas = np.array([_fecha_movimiento(m["anio"], m["mes"], m.get("dia")) for m in movimientos])
+    idx = _indices_diarios(dias, fechas)
+    valores = np.array([float(m["monto"]) for m in movimientos])
+    dentro = idx < n
+    return np.bincount(idx[dentro], weights=valores[dentro], minlength=n)
+
+
+def simular_mss_diario(
+    df_diario: pd.DataFrame,
+    plazo_anios: int,
+    monto_aporte: float,
+    frecuencia_pago: str,
+    fecha_inicio: pd.Timestamp,
+    retiros_programados: list,
+    amc_anual: float = AMC_ANUAL
+) -> pd.DataFrame:
+    """
+    ``simular_mss_vectorizado`` sobre la serie diaria: los aportes entran el
+    día hábil de su fecha (mismo día del mes que el inicio), los retiros en
+    su día y los costos del plan siguen cargándose al cierre de cada mes.
+    Devuelve una fila por día hábil; ``resumir_diario_mensual`` la lleva a meses.
+    """
+    df = _filtrar_diario_desde(df_diario, fecha_inicio)
+    n = len(df)
+    dias = df["Date"].to_numpy().astype("datetime64[D]")
+    crecimiento, mes_plan, fin_mes = _calendario_diario(df, amc_anual)
+
+    step_meses = MAPA_PASOS_PAGO[frecuencia_pago]
+    aporte_anual = monto_aporte * (12 / step_meses)
+
+    factor1, factor2 = FACTORES_COSTOS.get(plazo_anios, (0, 0))
+    costo_total_apertura = (aporte_anual * factor1) + (aporte_anual * factor2)
+    meses_totales = plazo_anios * 12
+    deduccion_mensual = costo_total_apertura / meses_totales if meses_totales > 0 else 0
+
+    # Como en el motor mensual, los aportes van cada ``step_meses`` meses de
+    # la serie, el mismo día del mes en que empezó el plan.
+    meses_serie = dias.astype("datetime64[M]")[np.r_[True, fin_mes[:-1]]]
+    plan = np.arange(len(meses_serie))
+    meses_aporte = meses_serie[(plan < meses_totales) & (plan % step_meses == 0)]
+    ultimo_dia = ((meses_aporte + 1).astype("datetime64[D]") - meses_aporte.astype("datetime64[D]")).astype(int)
+    fechas_aporte = meses_aporte.astype("datetime64[D]") + np.minimum(pd.Timestamp(fecha_inicio).day, ultimo_dia) - 1
+    idx_aporte = _indices_diarios(dias, fechas_aporte, descartar_previas=False)
+    aportes = np.bincount(idx_aporte[idx_aporte < n], minlength=n) * float(monto_aporte)
+
+    retiros = _montos_por_dia(dias, retiros_programados)
+    acumulacion = mes_plan < meses_totales
+
+    saldos = _componer_saldos_mss(
+        crecimiento,
+        aportes,
+        retiros,
+        factor_fee=np.where(fin_mes & ~acumulacion, 1 - 0.01 / 12.0, 1.0),
+        deduccion=np.where(fin_mes & acumulacion, deduccion_mensual, 0.0)
+    )
+
+    # Cargos de establecimiento que faltan, contando el del mes en curso si aún no se cobró.
+    meses_restantes = meses_totales - (mes_plan + fin_mes)
+    penalizacion = np.where(acumulacion & (meses_restantes > 0), meses_restantes * deduccion_mensual, 0.0)
+
+    df["Year"] = df["Date"].dt.year
+    df["Aporte_Acum"] = np.cumsum(aportes)
+    df["Valor_Cuenta"] = saldos
+    df["Valor_Rescate"] = np.maximum(0.0, saldos - penalizacion)
+    df["Retiro"] = retiros
+    df["Etapa"] = np.where(acumulacion, "Acumulación", "Post-maduración")
+    df["Mes_Plan"] = mes_plan + 1
+    df["Fin_Mes"] = fin_mes
+    df["Crecimiento_Neto"] = crecimiento
+    return df
+
+
+def simular_mis_diario(
+    df_diario: pd.DataFrame,
+    monto_inicial: float,
+    fecha_inicio: pd.Timestamp,
+    aportes_extra: list,
+    retiros_programados: list,
+    amc_anual: float = AMC_ANUAL
+) -> pd.DataFrame:
+    """
+    ``simular_mis_vectorizado`` sobre la serie diaria: cada cubeta entra el
+    día hábil de su fecha y su edad se cuenta en meses de calendario; el
+    costo de establecimiento y el 1% anual se cobran al cierre de cada mes.
+    """
+    df = _filtrar_diario_desde(df_diario, fecha_inicio)
+    n = len(df)
+    dias = df["Date"].to_numpy().astype("datetime64[D]")
+    crecimiento_dia, mes_pos, fin_mes = _calendario_diario(df, amc_anual)
+
+    inicio = pd.Timestamp(fecha_inicio)
+    montos = np.array([float(monto_inicial)] + [float(extra["monto"]) for extra in aportes_extra])
+    fechas = np.array(
+        [np.datetime64(inicio.strftime("%Y-%m-%d"), "D")] +
+        [_fecha_movimiento(extra["anio"], extra["mes"], extra.get("dia")) for extra in aportes_extra]
+    )
+    activacion = _indices_diarios(dias, fechas, descartar_previas=False)
+    mes_activacion = mes_pos[np.minimum(activacion, n - 1)]
+    costo_establecimiento = (montos * 0.016) / 12.0
+    retiros = _montos_por_dia(dias, retiros_programados)
+
+    # Las matrices cubetas x días se arman por bloques de días, con a lo sumo
+    # DIARIO_CELDAS_POR_BLOQUE celdas, y de cada bloque sólo quedan los
+    # totales por día: la memoria no crece con la cantidad de días.
+    valor_cuenta = np.empty(n)
+    valor_rescate = np.empty(n)
+    saldo = np.zeros(len(montos))
+    paso = max(1, DIARIO_CELDAS_POR_BLOQUE // len(montos))
+    for ini in range(0, n, paso):
+        fin = min(n, ini + paso)
+        cierre_dia = fin_mes[ini:fin]
+        posicion = np.arange(ini, fin)[None, :]
+        activa = posicion >= activacion[:, None]
+        nueva = posicion == activacion[:, None]
+        edad = mes_pos[None, ini:fin] - mes_activacion[:, None]
+        establecimiento = activa & (edad < 60)
+        cierre = activa & cierre_dia[None, :]
+
+        crecimiento = np.where(activa & ~nueva, crecimiento_dia[None, ini:fin], 1.0)
+        factor_fee = np.where(cierre & (edad >= 60), 1 - 0.01 / 12.0, 1.0)
+        resta = np.where(cierre & establecimiento, costo_establecimiento[:, None], 0.0)
+        entrada = np.where(nueva, montos[:, None], 0.0)
+        saldos = _componer_cubetas(crecimiento, factor_fee, resta, entrada, activa, nueva, retiros[ini:fin], saldo)
+        del crecimiento, factor_fee, resta, entrada, cierre, nueva
+
+        cargos_pendientes = 60 - (edad + cierre_dia[None, :])
+        penalizacion = np.where(establecimiento, cargos_pendientes * costo_establecimiento[:, None], 0.0)
+        saldo = saldos[:, -1].copy()
+        valor_cuenta[ini:fin] = saldos.sum(axis=0)
+        valor_rescate[ini:fin] = np.maximum(0.0, saldos - penalizacion, out=penalizacion).sum(axis=0)
+
+    aportes_dia = np.bincount(activacion[activacion < n], weights=montos[activacion < n], minlength=n)
+
+    df["Year"] = df["Date"].dt.year
+    df["Aporte_Acum"] = np.cumsum(aportes_dia)
+    df["Valor_Cuenta"] = valor_cuenta
+    df["Valor_Rescate"] = valor_rescate
+    df["Retiro"] = retiros
+    df["Mes_Plan"] = mes_pos + 1
+    df["Fin_Mes"] = fin_mes
+    df["Crecimiento_Neto"] = crecimiento_dia
+    return df
+
+
+def resumir_diario_mensual(df_dias: pd.DataFrame) -> pd.DataFrame:
+    """
+    Lleva el resultado diario a una fila por mes (al último día hábil, con
+    fecha de fin de mes) con las mismas columnas que el motor mensual, para
+    reutilizar ``construir_resumen_anual``, el gráfico y las exportaciones.
+    """
+    fin_mes = df_dias["Fin_Mes"].to_numpy()
+    finales = np.flatnonzero(fin_mes)
+    inicios = np.r_[0, finales[:-1] + 1]
+
+    fechas = df_dias["Date"].to_numpy()[finales].astype("datetime64[M]")
+    crecimiento_mes = np.multiply.reduceat(df_dias["Crecimiento_Neto"].to_numpy(dtype=float), inicios)
+
+    df = pd.DataFrame({
+        "Date": ((fechas + 1).astype("datetime64[D]") - 1).astype("datetime64[us]"),
+        "Price": df_dias["Price"].to_numpy(dtype=float)[finales],
+        "Retorno_Neto": crecimiento_mes - 1,
+    })
+    df["Year"] = df["Date"].dt.year
+    for c in ["Aporte_Acum", "Valor_Cuenta", "Valor_Rescate"]:
+        df[c] = df_dias[c].to_numpy(dtype=float)[finales]
+    df["Retiro"] = np.add.reduceat(df_dias["Retiro"].to_numpy(dtype=float), inicios)
+    if "Etapa" in df_dias.columns:
+        df["Etapa"] = df_dias["Etapa"].to_numpy()[finales]
+    df["Mes_Plan"] = np.arange(1, len(df) + 1)
+    return df
+
+
+# --- BARRIDO HISTÓRICO ---
+def _preparar_barrido(df_base: pd.DataFrame, horizonte_meses):
+    """
+    Índice neto acumulado de la serie y, para cada mes de inicio k, el mes
+    final E de su corrida: el último de la serie o k + horizonte - 1.
+    """
+    n = len(df_base)
+    indice = _indice_neto(df_base)
+    inicios = np.arange(n)
+
+    if horizonte_meses:
+        finales = inicios + int(horizonte_meses) - 1
+    else:
+        finales = np.full(n, n - 1)
+
+    validos = finales <= n - 1
+    return indice, inicios[validos], finales[validos]
+
+
+def _armar_barrido(df_base, inicios, finales, aporte_acum, valor_cuenta, valor_rescate, tiempos, montos):
+    fechas = df_base["Date"].reset_index(drop=True)
+    tasas = xirr_lote(tiempos, montos)
+
+    return pd.DataFrame({
+        "Fecha_Inicio": fechas.iloc[inicios].to_numpy(),
+        "Fecha_Final": fechas.iloc[finales].to_numpy(),
+        "Meses": finales - inicios + 1,
+        "Aporte_Acum": aporte_acum,
+        "Valor_Cuenta": valor_cuenta,
+        "Valor_Rescate": valor_rescate,
+        "Rendimiento_XIRR": tasas * 100,
+    })
+
+
+def barrer_inicios_mss(
+    df_base: pd.DataFrame,
+    plazo_anios: int,
+    monto_aporte: float,
+    frecuencia_pago: str,
+    horizonte_meses: int = None
+) -> pd.DataFrame:
+    """
+    Plan MSS iniciado en cada mes de ``df_base``, calculado para todas las
+    fechas de inicio a la vez con sumas acumuladas sobre el índice neto.
+
+    Cada corrida llega al último mes de la serie (como ``simular_mss``) o
+    dura ``horizonte_meses``. No admite retiros programados y supone que el
+    saldo no toca el piso de cero, lo que sin retiros sólo fallaría ante una
+    caída casi total del mercado.
+    """
+    indice, k, fin = _preparar_barrido(df_base, horizonte_meses)
+    inverso = 1 / indice
+    prefijo = np.concatenate(([0.0], np.cumsum(inverso)))
+
+    step_meses = MAPA_PASOS_PAGO[frecuencia_pago]
+    aporte_anual = monto_aporte * (12 / step_meses)
+
+    factor1, factor2 = FACTORES_COSTOS.get(plazo_anios, (0, 0))
+    costo_total_apertura = (aporte_anual * factor1) + (aporte_anual * factor2)
+    meses_totales = plazo_anios * 12
+    deduccion_mensual = costo_total_apertura / meses_totales if meses_totales > 0 else 0
+
+    # Aportes posteriores al primero: el del mes j crece desde el cierre de j - 1.
+    n_extra = np.minimum(max(meses_totales - 1, 0), fin - k) // step_meses
+    relleno = np.concatenate((np.zeros(step_meses), inverso))
+    relleno = np.concatenate((relleno, np.zeros(-len(relleno) % step_meses)))
+    salteado = relleno.reshape(-1, step_meses).cumsum(axis=0).ravel()
+    suma_aportes = inverso[k] + salteado[k - 1 + step_meses * (n_extra + 1)] - salteado[k - 1 + step_meses]
+
+    ultimo_costo = np.minimum(k + meses_totales - 1, fin)
+    suma_costos = np.where(ultimo_costo >= k, prefijo[ultimo_costo + 1] - prefijo[k], 0.0)
+
+    meses_post = np.maximum(0, fin - (k + meses_totales) + 1)
+    valor_cuenta = (1 - 0.01 / 12.0) ** meses_post * indice[fin] * (
+        monto_aporte * suma_aportes - deduccion_mensual * suma_costos
+    )
+    valor_cuenta = np.maximum(0.0, valor_cuenta)
+
+    meses_restantes = meses_totales - (fin - k + 1)
+    penalizacion = np.where(meses_restantes > 0, meses_restantes * deduccion_mensual, 0.0)
+
+    # Flujos para XIRR: un aporte por columna y el valor final al cierre.
+    dias = df_base["Date"].to_numpy(dtype="datetime64[D]").astype(np.int64)
+    pagos = np.arange((max(meses_totales - 1, 0) // step_meses) + 1)
+    posiciones = np.minimum(k[:, None] + step_meses * pagos[None, :], len(dias) - 1)
+    pagado = pagos[None, :] <= n_extra[:, None]
+
+    tiempos = np.column_stack((
+        np.where(pagado, (dias[posiciones] - dias[k][:, None]) / 365.25, 0.0),
+        (dias[fin] - dias[k]) / 365.25
+    ))
+    montos = np.column_stack((np.where(pagado, -float(monto_aporte), 0.0), valor_cuenta))
+
+    return _armar_barrido(
+        df_base, k, fin,
+        aporte_acum=monto_aporte * (n_extra + 1),
+        valor_cuenta=valor_cuenta,
+        valor_rescate=np.maximum(0.0, valor_cuenta - penalizacion),
+        tiempos=tiempos,
+        montos=montos
+    )
+
+
+def barrer_inicios_mis(
+    df_base: pd.DataFrame,
+    monto_inicial: float,
+    aportes_extra: list = (),
+    horizonte_meses: int = None
+) -> pd.DataFrame:
+    """
+    Plan MIS iniciado en cada mes de ``df_base``, para todas las fechas de
+    inicio a la vez. Los aportes extra se expresan relativos al inicio
+    ({"monto", "mes_plan"}, con mes_plan 1 = mes de inicio) para que la
+    misma estrategia se desplace junto con la fecha. Mismas salvedades que
+    ``barrer_inicios_mss``.
+    """
+    indice, k, fin = _preparar_barrido(df_base, horizonte_meses)
+    inverso = 1 / indice
+    prefijo = np.concatenate(([0.0], np.cumsum(inverso)))
+    dias = df_base["Date"].to_numpy(dtype="datetime64[D]").astype(np.int64)
+    meses_serie = (df_base["Date"].dt.year * 12 + df_base["Date"].dt.month - 1).to_numpy()
+
+    cubetas = [(float(monto_inicial), 0)] + [
+        (float(extra["monto"]), max(0, int(extra["mes_plan"]) - 1)) for extra in aportes_extra
+    ]
+
+    aporte_acum = np.zeros(len(k))
+    valor_cuenta = np.zeros(len(k))
+    valor_rescate = np.zeros(len(k))
+    tiempos, montos = [], []
+
+    for monto, desfase in cubetas:
+        activacion = np.searchsorted(meses_serie, meses_serie[k] + desfase, side="left")
+        activa = activacion <= fin
+        j = np.minimum(activacion, fin)
+        costo_establecimiento = (monto * 0.016) / 12.0
+
+        ultimo_costo = np.minimum(fin, j + 59)
+        meses_post = np.maximum(0, fin - (j + 60) + 1)
+        saldo = (1 - 0.01 / 12.0) ** meses_post * (
+            monto * crecimiento_neto(df_base, j, fin)
+            - costo_establecimiento * indice[fin] * (prefijo[ultimo_costo + 1] - prefijo[j])
+        )
+        saldo = np.where(activa, np.maximum(0.0, saldo), 0.0)
+
+        edad_final = fin - j
+        penalizacion = np.where(edad_final < 60, (60 - (edad_final + 1)) * costo_establecimiento, 0.0)
+
+        aporte_acum += np.where(activa, monto, 0.0)
+        valor_cuenta += saldo
+        valor_rescate += np.where(activa, np.maximum(0.0, saldo - penalizacion), 0.0)
+        tiempos.append(np.where(activa, (dias[j] - dias[k]) / 365.25, 0.0))
+        montos.append(np.where(activa, -monto, 0.0))
+
+    tiempos.append((dias[fin] - dias[k]) / 365.25)
+    montos.append(valor_cuenta)
+
+    return _armar_barrido(
+        df_base, k, fin,
+        aporte_acum=aporte_acum,
+        valor_cuenta=valor_cuenta,
+        valor_rescate=valor_rescate,
+        tiempos=np.column_stack(tiempos),
+        montos=np.column_stack(montos)
+    )
+
+
+def calcular_ilustracion(
+    df_base: pd.DataFrame,
+    tipo_plan: str,
+    plazo_anios,
+    monto: float,
+    frecuencia_pago,
+    anio_inicio: int,
+    mes_inicio: int,
+    aportes_extra: list,
+    retiros_programados: list,
+    resolucion: str = "Mensual",
+    dia_inicio: int = 1,
+    cache: CacheLRU = None,
+    disco: CacheDisco = None
+):
+    """
+    Simula el plan y arma el resumen anual, reutilizando el resultado si la
+    misma ilustración ya se calculó con la misma versión de mercado, primero
+    en memoria y luego en disco. Con ``resolucion="Diaria"``, ``df_base`` es
+    la serie diaria y el resultado diario se resume a meses. Devuelve
+    ``(df_resultado, resumen)``; ambos se comparten entre sesiones y no deben
+    modificarse.
+    """
+    diaria = resolucion == "Diaria"
+    version = version_mercado(df_base)
+    if diaria:
+        # La serie diaria no incluye el AMC; el prorrateo se hace al simular.
+        version = f"{version}-{AMC_ANUAL!r}"
+    clave = clave_ilustracion(
+        tipo_plan, plazo_anios, monto, frecuencia_pago, anio_inicio, mes_inicio,
+        aportes_extra, retiros_programados, version, resolucion, dia_inicio
+    )
+    if cache is not None:
+        guardado = cache.obtener(clave)
+        if guardado is not None:
+            return guardado
+    if disco is not None:
+        # Un disco lleno o de sólo lectura no impide calcular la ilustración.
+        try:
+            guardado = disco.obtener(version, clave)
+        except OSError:
+            guardado = None
+        if guardado is not None:
+            if cache is not None:
+                cache.guardar(clave, guardado)
+            return guardado
+
+    if diaria:
+        primero = pd.Timestamp(year=int(anio_inicio), month=int(mes_inicio), day=1)
+        fecha_inicio = primero + pd.Timedelta(days=min(int(dia_inicio), primero.days_in_month) - 1)
+        if tipo_plan == "MIS":
+            df_dias = simular_mis_diario(df_base, float(monto), fecha_inicio, aportes_extra, retiros_programados)
+        else:
+            df_dias = simular_mss_diario(
+                df_base, int(plazo_anios), float(monto), frecuencia_pago, fecha_inicio, retiros_programados
+            )
+        df_resultado = resumir_diario_mensual(df_dias)
+    elif tipo_plan == "MIS":
+        df_resultado = simular_mis_vectorizado(
+            df_base=df_base,
+            monto_inicial=float(monto),
+            anio_inicio=int(anio_inicio),
+            mes_inicio=int(mes_inicio),
+            aportes_extra=aportes_extra,
+            retiros_programados=retiros_programados
+        )
+    else:
+        df_resultado = simular_mss_vectorizado(
+            df_base=df_base,
+            plazo_anios=int(plazo_anios),
+            monto_aporte=float(monto),
+            frecuencia_pago=frecuencia_pago,
+            anio_inicio=int(anio_inicio),
+            mes_inicio=int(mes_inicio),
+            retiros_programados=retiros_programados
+        )
+
+    resumen = construir_resumen_anual(df_resultado, anio_inicio=int(anio_inicio), mes_inicio=int(mes_inicio))
+    # Deja memoizado el rendimiento del resumen junto con el resultado.
+    calcular_rendimiento_resumen(df_resultado, resumen, tipo_plan)
+    df_resultado.attrs["clave_ilustracion"] = clave
+
+    resultado = (df_resultado, resumen)
+    if cache is not None:
+        cache.guardar(clave, resultado)
+    if disco is not None:
+        try:
+            disco.guardar(version, clave, resultado)
+        except OSError:
+            pass
+    return resultado
@@ -0,0 +1,28 @@
+"""Formatos y conversiones de uso general."""
+import pandas as pd
+
+from .config import LISTA_MESES
+
+
+# --- UTILIDADES ---
+def mes_numero(nombre_mes: str) -> int:
+    return LISTA_MESES.index(nombre_mes.lower()) + 1
+
+
+def fmt_usd(x):
+    return f"USD {x:,.2f}"
+
+
+def fmt_pct(x):
+    return f"{x:+.2f}%"
+
+
+def antiguedad_texto(desde: pd.Timestamp) -> str:
+    segundos = max((pd.Timestamp.now() - desde).total_seconds(), 0)
+    if segundos < 90:
+        return "hace instantes"
+    if segundos < 90 * 60:
+        return f"hace {segundos / 60:.0f} min"
+    if segundos < 36 * 3600:
+        return f"hace {segundos / 3600:.0f} h"
+    return f"hace {segundos / 86400:.0f} días"